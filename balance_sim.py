@@ -0,0 +1,202 @@
+# balance_sim.py
+# 离线数值模拟：加载插件真实的 ConfigManager 与怪物生成公式，对
+#   境界 × 怪物/Boss模板（即其标签组合）× 入场气血
+# 做蒙特卡洛采样，统计胜率、回合数、气血损失与每场期望灵石/修为/掉落价值，
+# 输出 CSV（或境界为列的透视表，便于直接画热力图），用来在上线前找出打不过或毫无挑战的内容。
+#
+# 单场战斗与 BattleManager.player_vs_monster 的结算完全一致（伤害恒定，结果由闭式公式给出），
+# 随机性来自入场气血：秘境中气血逐层消耗，玩家入场时的气血在 [--min-hp, 1] 倍上限间均匀采样。
+# 需要 NumPy；插件模块依赖 AstrBot，请在装有 AstrBot 的环境中运行。
+#
+# 用法: python balance_sim.py [--samples N] [--levels 0-20] [--kind monster|boss|all]
+#                             [--combos K] [--pivot 指标] [--out 文件]
+
+import argparse
+import csv
+import importlib
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PLUGIN_DIR = Path(__file__).resolve().parent
+
+COLUMNS = [
+    "level_index", "level_name", "kind", "template_id", "name", "tags",
+    "win_rate", "avg_turns", "avg_hp_loss", "gold_per_fight", "exp_per_fight", "loot_value_per_fight", "verdict",
+]
+PIVOT_METRICS = ("win_rate", "avg_turns", "avg_hp_loss", "gold_per_fight", "exp_per_fight", "loot_value_per_fight")
+
+# 判定阈值：胜率低于 UNWINNABLE 视为打不过；必胜且气血损失低于 TRIVIAL_HP_LOSS 视为毫无挑战
+UNWINNABLE = 0.05
+TRIVIAL_HP_LOSS = 0.05
+
+
+def _load_plugin():
+    """以包的形式导入插件目录，返回 (config_manager 模块, combat_manager 模块)"""
+    sys.path.insert(0, str(PLUGIN_DIR.parent))
+    package = PLUGIN_DIR.name
+    return (importlib.import_module(f"{package}.config_manager"),
+            importlib.import_module(f"{package}.core.combat_manager"))
+
+
+def _parse_levels(text: str, level_count: int) -> range:
+    if not text:
+        return range(level_count)
+    low, _, high = text.partition("-")
+    return range(max(0, int(low)), min(level_count - 1, int(high or low)) + 1)
+
+
+def _enemies(config_manager, kind: str, combos: int):
+    """枚举 (类型, 模板ID, 名称, 标签组合)；combos>0 时额外对基础怪物枚举所有不超过 K 个标签的组合"""
+    if kind in ("monster", "all"):
+        for template_id, template in config_manager.monsters.items():
+            yield "monster", template_id, template.name, template.tags
+    if kind in ("boss", "all"):
+        for template_id, template in config_manager.bosses.items():
+            yield "boss", template_id, template.name, template.tags
+    tag_names = sorted(config_manager.tags)
+    for size in range(1, combos + 1):
+        for tags in itertools.combinations(tag_names, size):
+            yield "monster", "+".join(tags), "标签组合", tags
+
+
+def build_tables(config_manager, generator, levels: range, kind: str, combos: int, boss_scaling: float,
+                 samples: int, seed: int):
+    """展开成按 (境界, 敌人) 排列的属性数组；每场胜利的掉落价值由 LootTable.roll_many 掷 samples 次取平均"""
+    level_table = config_manager.levels
+    prices = {item_id: item.price for item_id, item in config_manager.item_data.items()}
+    meta, columns = [], {key: [] for key in (
+        "p_hp", "p_atk", "p_def", "m_hp", "m_atk", "m_def", "gold", "exp", "loot")}
+
+    enemies = list(_enemies(config_manager, kind, combos))
+    for level_index in levels:
+        for enemy_kind, template_id, name, tags in enemies:
+            scaling = boss_scaling if enemy_kind == "boss" else 1.0
+            final_name, stats, loot = generator.fold_stats(enemy_kind, name, tags, level_index, config_manager, scaling)
+            hp, attack, defense, gold, exp = stats
+            # 每场胜利的平均掉落价值：与击杀结算使用同一张掉落表，每行使用独立而可复现的种子
+            rolled = loot.roll_many(samples, seed=seed + len(meta))
+            loot_value = sum(qty * prices.get(item_id, 0) for item_id, qty in rolled.items()) / samples
+            meta.append((level_index, level_table.name_of(level_index), enemy_kind, template_id, final_name, "|".join(tags)))
+            for key, value in zip(columns, (
+                level_table.base_hp[level_index], level_table.base_attack[level_index], level_table.base_defense[level_index],
+                int(hp), int(attack), int(defense), int(gold), int(exp), loot_value,
+            )):
+                columns[key].append(value)
+    return meta, {key: np.asarray(values, dtype=np.float64) for key, values in columns.items()}
+
+
+def simulate(tables, samples: int, min_hp: float, seed: int):
+    """对每一行采样 samples 场战斗，返回各项指标的数组"""
+    rng = np.random.default_rng(seed)
+    rows = len(tables["p_hp"])
+    max_hp = tables["p_hp"][:, None]
+
+    # 入场气血至少为2，否则无法出手（player_vs_monster 在气血<=1时直接判负）
+    start_hp = np.maximum(2.0, np.floor(max_hp * rng.uniform(min_hp, 1.0, size=(rows, samples))))
+    damage_dealt = np.maximum(1.0, tables["p_atk"] - tables["m_def"])[:, None]
+    damage_taken = np.maximum(1.0, tables["m_atk"] - tables["p_def"])[:, None]
+    monster_hp = tables["m_hp"][:, None]
+
+    # 与 resolve_duel(MONSTER_DUEL_RULES) 相同：怪物倒下所需回合 vs 玩家力竭（气血降到1）前能承受的反击次数
+    monster_falls = np.maximum(0.0, np.ceil(monster_hp / damage_dealt))
+    player_falls = np.ceil((start_hp - 1) / damage_taken)
+    win = monster_falls <= player_falls
+    turns = np.where(win, monster_falls, player_falls)
+    counter_hits = np.where(win, np.maximum(monster_falls - 1, 0), player_falls)
+    hp_left = np.maximum(1.0, start_hp - counter_hits * damage_taken)
+    hp_loss = (start_hp - hp_left) / max_hp
+
+    win_rate = win.mean(axis=1)
+    return {
+        "win_rate": win_rate,
+        "avg_turns": turns.mean(axis=1),
+        "avg_hp_loss": hp_loss.mean(axis=1),
+        "gold_per_fight": win_rate * tables["gold"],
+        "exp_per_fight": win_rate * tables["exp"],
+        "loot_value_per_fight": win_rate * tables["loot"],
+    }
+
+
+def _verdict(win_rate: float, hp_loss: float) -> str:
+    if win_rate < UNWINNABLE:
+        return "unwinnable"
+    if win_rate >= 1.0 and hp_loss < TRIVIAL_HP_LOSS:
+        return "trivial"
+    return ""
+
+
+def write_rows(out, meta, metrics):
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    for i, row in enumerate(meta):
+        win_rate, hp_loss = float(metrics["win_rate"][i]), float(metrics["avg_hp_loss"][i])
+        writer.writerow([
+            *row,
+            f"{win_rate:.4f}", f"{metrics['avg_turns'][i]:.2f}", f"{hp_loss:.4f}",
+            f"{metrics['gold_per_fight'][i]:.1f}", f"{metrics['exp_per_fight'][i]:.1f}",
+            f"{metrics['loot_value_per_fight'][i]:.1f}", _verdict(win_rate, hp_loss),
+        ])
+
+
+def write_pivot(out, meta, metrics, metric: str, levels: range):
+    """透视表：每个敌人一行，每个境界一列"""
+    cells = {}
+    for i, (level_index, _, kind, template_id, name, _) in enumerate(meta):
+        cells.setdefault((kind, template_id, name), {})[level_index] = metrics[metric][i]
+    writer = csv.writer(out)
+    writer.writerow(["kind", "template_id", "name", *levels])
+    for (kind, template_id, name), by_level in cells.items():
+        # 同一模板在不同境界的名称相同（前缀只来自标签）
+        writer.writerow([kind, template_id, name, *(f"{by_level[level]:.4f}" for level in levels)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="修仙插件离线数值模拟")
+    parser.add_argument("--samples", type=int, default=2000, help="每个 (境界, 敌人) 组合的模拟场数")
+    parser.add_argument("--levels", default="", help="境界序号范围，如 0-20；默认全部")
+    parser.add_argument("--kind", choices=("monster", "boss", "all"), default="all", help="秘境怪物、秘境Boss或全部")
+    parser.add_argument("--combos", type=int, default=0, help="额外枚举不超过 K 个标签的组合（作用于基础怪物）")
+    parser.add_argument("--min-hp", type=float, default=0.3, help="入场气血占上限的最小比例")
+    parser.add_argument("--boss-scaling", type=float, default=None, help="秘境Boss强度系数，默认读取插件配置")
+    parser.add_argument("--pivot", choices=PIVOT_METRICS, default=None, help="输出以境界为列的透视表")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="", help="输出文件，默认标准输出")
+    args = parser.parse_args()
+
+    config_module, combat_module = _load_plugin()
+    config_manager = config_module.ConfigManager(PLUGIN_DIR)
+    boss_scaling = args.boss_scaling
+    if boss_scaling is None:
+        boss_scaling = config_manager.settings.realm_rules.realm_boss_scaling_factor
+    levels = _parse_levels(args.levels, len(config_manager.levels))
+
+    start = time.perf_counter()
+    meta, tables = build_tables(config_manager, combat_module.MonsterGenerator, levels, args.kind, args.combos, boss_scaling,
+                                args.samples, args.seed)
+    metrics = simulate(tables, args.samples, args.min_hp, args.seed)
+    elapsed = time.perf_counter() - start
+
+    out = open(args.out, "w", encoding="utf-8", newline="") if args.out else sys.stdout
+    try:
+        if args.pivot:
+            write_pivot(out, meta, metrics, args.pivot, levels)
+        else:
+            write_rows(out, meta, metrics)
+    finally:
+        if args.out:
+            out.close()
+
+    verdicts = [_verdict(float(w), float(h)) for w, h in zip(metrics["win_rate"], metrics["avg_hp_loss"])]
+    print(
+        f"共模拟 {len(meta) * args.samples} 场（{len(meta)} 个组合 × {args.samples} 场），用时 {elapsed:.2f}s；"
+        f"打不过 {verdicts.count('unwinnable')} 个，毫无挑战 {verdicts.count('trivial')} 个。",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
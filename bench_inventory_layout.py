@@ -0,0 +1,107 @@
+# bench_inventory_layout.py
+# 对比 inventory 表两种存储布局在背包密集型负载下的性能：
+#   rowid       —— v16 及以前：自增 id 主键 + UNIQUE(user_id, item_id)，每次写入维护两棵 B 树
+#   without_rowid —— v17 起：以 (user_id, item_id) 为主键聚簇的 WITHOUT ROWID 表
+# 用法: python bench_inventory_layout.py [玩家数] [物品种类数]
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+LAYOUTS = {
+    "rowid": """
+        CREATE TABLE inventory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, item_id TEXT NOT NULL,
+            quantity INTEGER NOT NULL, UNIQUE(user_id, item_id)
+        )
+    """,
+    "without_rowid": """
+        CREATE TABLE inventory (
+            user_id TEXT NOT NULL, item_id TEXT NOT NULL, quantity INTEGER NOT NULL,
+            PRIMARY KEY (user_id, item_id)
+        ) WITHOUT ROWID
+    """,
+}
+
+UPSERT_SQL = """
+    INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)
+    ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity
+"""
+
+
+def _timed(label: str, results: dict, func):
+    start = time.perf_counter()
+    func()
+    results[label] = time.perf_counter() - start
+
+
+def run_layout(create_sql: str, players: int, items: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    user_ids = [f"{100000 + i}" for i in range(players)]
+    item_ids = [str(1000 + i) for i in range(items)]
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(create_sql)
+    results = {}
+
+    # 秘境掉落：每名玩家一次事务内获得若干物品
+    def realm_loot():
+        for user_id in user_ids:
+            conn.execute("BEGIN")
+            for item_id in rng.sample(item_ids, 5):
+                conn.execute(UPSERT_SQL, (user_id, item_id, rng.randint(1, 3)))
+            conn.execute("COMMIT")
+
+    # 批量购买：大量对已有物品的数量累加
+    def bulk_buys():
+        conn.execute("BEGIN")
+        for _ in range(players * 5):
+            conn.execute(UPSERT_SQL, (rng.choice(user_ids), rng.choice(item_ids), 1))
+        conn.execute("COMMIT")
+
+    # 使用物品前的按键查找
+    def point_lookups():
+        for _ in range(players * 5):
+            conn.execute(
+                "SELECT item_id, quantity FROM inventory WHERE user_id = ? AND item_id = ?",
+                (rng.choice(user_ids), rng.choice(item_ids))
+            ).fetchone()
+
+    # 查看背包
+    def backpack_scans():
+        for user_id in rng.sample(user_ids, min(players, 2000)):
+            conn.execute("SELECT item_id, quantity FROM inventory WHERE user_id = ?", (user_id,)).fetchall()
+
+    _timed("秘境掉落写入", results, realm_loot)
+    _timed("批量购买累加", results, bulk_buys)
+    _timed("按键查找", results, point_lookups)
+    _timed("背包整表读取", results, backpack_scans)
+
+    conn.close()
+    results["文件大小(KB)"] = os.path.getsize(path) / 1024
+    os.remove(path)
+    return results
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"SQLite {sqlite3.sqlite_version}，{players} 名玩家，{items} 种物品")
+
+    all_results = {name: run_layout(sql, players, items) for name, sql in LAYOUTS.items()}
+    base, new = all_results["rowid"], all_results["without_rowid"]
+    print(f"{'场景':<12}{'rowid':>12}{'without_rowid':>16}{'加速比':>10}")
+    for label in base:
+        if label == "文件大小(KB)":
+            print(f"{label:<12}{base[label]:>12.0f}{new[label]:>16.0f}{base[label] / new[label]:>10.2f}")
+        else:
+            print(f"{label:<12}{base[label] * 1000:>10.1f}ms{new[label] * 1000:>14.1f}ms{base[label] / new[label]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
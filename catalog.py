@@ -0,0 +1,301 @@
+# catalog.py
+
+import random
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from astrbot.api import logger
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 NumPy 时批量掷骰退回逐次循环
+    np = None
+
+class CatalogError(ValueError):
+    """配置数据不符合定义，热重载时抛出以保留旧配置"""
+
+_REQUIRED = object()
+
+# 字段定义：键名 -> (类型, 默认值)。默认值为 _REQUIRED 表示必填；
+# 境界表的默认值可以是以境界序号为参数的函数
+LEVEL_SCHEMA: Dict[str, Tuple[type, Any]] = {
+    "level_name": (str, _REQUIRED),
+    "exp_needed": (int, _REQUIRED),
+    "success_rate": (float, _REQUIRED),
+    "base_hp": (int, lambda i: 100 + i * 50),
+    "base_attack": (int, lambda i: 10 + i * 8),
+    "base_defense": (int, lambda i: 5 + i * 4),
+    "base_spiritual_power": (int, lambda i: 50 + i * 20),
+    "base_mental_power": (int, lambda i: 50 + i * 20),
+}
+
+TAG_SCHEMA: Dict[str, Tuple[type, Any]] = {
+    "hp_multiplier": (float, 1.0),
+    "attack_multiplier": (float, 1.0),
+    "defense_multiplier": (float, 1.0),
+    "gold_multiplier": (float, 1.0),
+    "exp_multiplier": (float, 1.0),
+    "name_prefix": (str, None),
+    "description_suffix": (str, None),
+    "add_to_loot": (list, ()),
+}
+
+LOOT_SCHEMA: Dict[str, Tuple[type, Any]] = {
+    "item_id": (str, _REQUIRED),
+    "chance": (float, 0.0),
+    "quantity": (list, (1, 1)),
+}
+
+MONSTER_SCHEMA: Dict[str, Tuple[type, Any]] = {
+    "name": (str, _REQUIRED),
+    "tags": (list, ()),
+}
+
+BOSS_SCHEMA: Dict[str, Tuple[type, Any]] = {
+    "name": (str, _REQUIRED),
+    "tags": (list, ()),
+    "cooldown_minutes": (int, _REQUIRED),
+}
+
+@dataclass(frozen=True, slots=True)
+class LootEntry:
+    item_id: str
+    chance: float
+    min_qty: int
+    max_qty: int
+
+@dataclass(frozen=True, slots=True)
+class LootTable:
+    """编译后的掉落表：物品ID、概率与数量区间按列存放"""
+
+    item_ids: Tuple[str, ...] = ()
+    chances: Tuple[float, ...] = ()
+    min_qty: Tuple[int, ...] = ()
+    max_qty: Tuple[int, ...] = ()
+
+    @classmethod
+    def compile(cls, entries: Iterable[LootEntry]) -> "LootTable":
+        entries = tuple(entries)
+        return cls(
+            item_ids=tuple(e.item_id for e in entries),
+            chances=tuple(e.chance for e in entries),
+            min_qty=tuple(e.min_qty for e in entries),
+            max_qty=tuple(e.max_qty for e in entries),
+        )
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def roll(self) -> Dict[str, int]:
+        """单次击杀的掉落，逐条判定概率后在数量区间内取整数"""
+        gained_items = {}
+        for item_id, chance, low, high in zip(self.item_ids, self.chances, self.min_qty, self.max_qty):
+            if random.random() < chance:
+                gained_items[item_id] = gained_items.get(item_id, 0) + random.randint(low, high)
+        return gained_items
+
+    def roll_many(self, n: int, seed: Optional[int] = None) -> Dict[str, int]:
+        """一次掷出 n 次击杀的掉落并汇总，供扫荡、自动战斗与数值模拟使用"""
+        if n <= 0 or not self.item_ids:
+            return {}
+        if np is None:
+            rng = random.Random(seed)
+            totals: Dict[str, int] = {}
+            for _ in range(n):
+                for item_id, chance, low, high in zip(self.item_ids, self.chances, self.min_qty, self.max_qty):
+                    if rng.random() < chance:
+                        totals[item_id] = totals.get(item_id, 0) + rng.randint(low, high)
+            return totals
+
+        rng = np.random.default_rng(seed)
+        chances = np.asarray(self.chances)
+        hits = (rng.random((n, len(chances))) < chances).sum(axis=0)
+        totals = {}
+        for column, (item_id, low, high) in enumerate(zip(self.item_ids, self.min_qty, self.max_qty)):
+            count = int(hits[column])
+            if not count:
+                continue
+            amount = count * low if low == high else int(rng.integers(low, high + 1, size=count).sum())
+            totals[item_id] = totals.get(item_id, 0) + amount
+        return totals
+
+@dataclass(frozen=True, slots=True)
+class TagTemplate:
+    name: str
+    hp_multiplier: float = 1.0
+    attack_multiplier: float = 1.0
+    defense_multiplier: float = 1.0
+    gold_multiplier: float = 1.0
+    exp_multiplier: float = 1.0
+    name_prefix: Optional[str] = None
+    description_suffix: Optional[str] = None
+    add_to_loot: Tuple[LootEntry, ...] = ()
+
+@dataclass(frozen=True, slots=True)
+class MonsterTemplate:
+    id: str
+    name: str
+    tags: Tuple[str, ...] = ()
+
+@dataclass(frozen=True, slots=True)
+class BossTemplate:
+    id: str
+    name: str
+    cooldown_minutes: int
+    tags: Tuple[str, ...] = ()
+
+@dataclass(frozen=True, slots=True)
+class LevelTable:
+    """境界表，各属性按境界序号存放在平行数组中"""
+
+    names: Tuple[str, ...] = ()
+    exp_needed: Tuple[int, ...] = ()
+    success_rate: Tuple[float, ...] = ()
+    base_hp: Tuple[int, ...] = ()
+    base_attack: Tuple[int, ...] = ()
+    base_defense: Tuple[int, ...] = ()
+    base_spiritual_power: Tuple[int, ...] = ()
+    base_mental_power: Tuple[int, ...] = ()
+    name_to_index: Dict[str, int] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def name_of(self, index: int, default: str = "未知境界") -> str:
+        return self.names[index] if 0 <= index < len(self.names) else default
+
+    def index_of(self, name: str) -> Optional[int]:
+        return self.name_to_index.get(name)
+
+
+class _Validator:
+    """收集校验错误，加载结束后统一输出或抛出"""
+
+    def __init__(self, strict: bool):
+        self.strict = strict
+        self.errors: List[str] = []
+
+    def error(self, message: str):
+        self.errors.append(message)
+
+    def check(self, raw: Any, schema: Dict[str, Tuple[type, Any]], where: str,
+              index: int = 0) -> Optional[Dict[str, Any]]:
+        """按定义校验一条记录并补全默认值，有错误时返回None"""
+        if not isinstance(raw, dict):
+            self.error(f"{where} 应为对象")
+            return None
+        unknown = [key for key in raw if key not in schema]
+        if unknown:
+            logger.warning(f"{where} 含有无法识别的配置项 {unknown}，已忽略。")
+
+        values, ok = {}, True
+        for key, (kind, default) in schema.items():
+            if key not in raw:
+                if default is _REQUIRED:
+                    self.error(f"{where} 缺少必填项 {key}")
+                    ok = False
+                else:
+                    values[key] = default(index) if callable(default) else default
+                continue
+            value = raw[key]
+            if kind is float and isinstance(value, int) and not isinstance(value, bool):
+                value = float(value)
+            elif kind is str and isinstance(value, int) and not isinstance(value, bool):
+                value = str(value)
+            if not isinstance(value, kind) or isinstance(value, bool):
+                self.error(f"{where}.{key} 应为 {kind.__name__}，实际为 {value!r}")
+                ok = False
+                continue
+            values[key] = value
+        return values if ok else None
+
+    def finish(self, source: str):
+        if not self.errors:
+            return
+        if self.strict:
+            raise CatalogError(f"{source} 校验失败：" + "；".join(self.errors))
+        for message in self.errors:
+            logger.error(f"{source} 校验失败：{message}")
+        logger.error(f"{source} 中校验失败的条目已跳过，请修正后重新加载。")
+        self.errors = []
+
+
+def compile_levels(raw: Any, strict: bool = False) -> LevelTable:
+    validator = _Validator(strict)
+    rows = []
+    if not isinstance(raw, list):
+        if raw:
+            validator.error("境界配置应为列表")
+        raw = []
+    for i, entry in enumerate(raw):
+        values = validator.check(entry, LEVEL_SCHEMA, f"境界[{i}]", i)
+        if values is not None and not 0.0 <= values["success_rate"] <= 1.0:
+            validator.error(f"境界[{i}].success_rate 应在 0 到 1 之间")
+            values = None
+        if values is None:
+            # 玩家以序号记录境界，跳过中间某条会让后续境界整体错位，因此在此截断
+            validator.error(f"境界表在第 {i} 条处截断，其后的境界暂不可用")
+            break
+        rows.append(values)
+    validator.finish("level_config.json")
+
+    columns = {key: tuple(row[key] for row in rows) for key in LEVEL_SCHEMA}
+    names = columns.pop("level_name")
+    return LevelTable(names=names, **columns, name_to_index={name: i for i, name in enumerate(names)})
+
+def _compile_loot(raw: list, where: str, validator: _Validator) -> Tuple[LootEntry, ...]:
+    entries = []
+    for i, entry in enumerate(raw):
+        values = validator.check(entry, LOOT_SCHEMA, f"{where}.add_to_loot[{i}]")
+        if values is None:
+            continue
+        quantity = values["quantity"]
+        if not 1 <= len(quantity) <= 2 or not all(isinstance(q, int) for q in quantity):
+            validator.error(f"{where}.add_to_loot[{i}].quantity 应为一到两个整数")
+            continue
+        if quantity[0] > quantity[-1]:
+            validator.error(f"{where}.add_to_loot[{i}].quantity 下限不应大于上限")
+            continue
+        entries.append(LootEntry(values["item_id"], values["chance"], quantity[0], quantity[-1]))
+    return tuple(entries)
+
+def compile_tags(raw: Any, strict: bool = False) -> Dict[str, TagTemplate]:
+    validator = _Validator(strict)
+    tags = {}
+    for name, entry in (raw.items() if isinstance(raw, dict) else ()):
+        values = validator.check(entry, TAG_SCHEMA, f"标签「{name}」")
+        if values is None:
+            continue
+        values["add_to_loot"] = _compile_loot(values["add_to_loot"], f"标签「{name}」", validator)
+        tags[name] = TagTemplate(name=name, **values)
+    validator.finish("tags.json")
+    return tags
+
+def _compile_templates(raw: Any, schema: Dict[str, Tuple[type, Any]], record: Callable, label: str,
+                       source: str, tags: Dict[str, TagTemplate], strict: bool) -> Dict[str, Any]:
+    validator = _Validator(strict)
+    templates = {}
+    for template_id, entry in (raw.items() if isinstance(raw, dict) else ()):
+        values = validator.check(entry, schema, f"{label} {template_id}")
+        if values is None:
+            continue
+        missing = [tag for tag in values["tags"] if tag not in tags]
+        if missing:
+            logger.warning(f"{label} {template_id} 引用了不存在的标签 {missing}，这些标签不会生效。")
+        values["tags"] = tuple(str(tag) for tag in values["tags"])
+        templates[template_id] = record(id=template_id, **values)
+    validator.finish(source)
+    return templates
+
+def compile_monsters(raw: Any, tags: Dict[str, TagTemplate], strict: bool = False) -> Dict[str, MonsterTemplate]:
+    return _compile_templates(raw, MONSTER_SCHEMA, MonsterTemplate, "怪物", "monsters.json", tags, strict)
+
+def compile_bosses(raw: Any, tags: Dict[str, TagTemplate], strict: bool = False) -> Dict[str, BossTemplate]:
+    return _compile_templates(raw, BOSS_SCHEMA, BossTemplate, "Boss", "bosses.json", tags, strict)
+
+def check_loot_items(tags: Dict[str, TagTemplate], item_ids) -> None:
+    """掉落表引用的物品必须存在，否则玩家会获得未知物品"""
+    for tag in tags.values():
+        missing = [entry.item_id for entry in tag.add_to_loot if entry.item_id not in item_ids]
+        if missing:
+            logger.warning(f"标签「{tag.name}」的掉落表引用了不存在的物品 {missing}。")
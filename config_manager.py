@@ -1,14 +1,97 @@
 # config_manager.py
 
+import asyncio
+import hashlib
 import json
+import os
+import pickle
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Dict, Any, Tuple, Optional, List
+from typing import Dict, Any, Tuple, Optional, List, Iterator, FrozenSet, Callable
 
 from astrbot.api import logger
-from .models import Item
+from .models import Item, EffectProgram
+from .settings import Settings
+from .name_index import NameIndex
+from .mapped_catalog import MappedRecords, open_catalog, write_atomic, write_catalog
+from .catalog import (
+    LevelTable, TagTemplate, MonsterTemplate, BossTemplate,
+    compile_levels, compile_tags, compile_monsters, compile_bosses, check_loot_items
+)
+
+SNAPSHOT_FORMAT_VERSION = 5
+SNAPSHOT_FILE_NAME = "config_snapshot.pickle"
+CATALOG_FILE_NAME = "config_catalog.bin"
+# 以下插件配置项只在插件加载时读取一次，修改后需重载插件才会生效；其余配置项在下一条指令时即生效
+RESTART_REQUIRED_SETTINGS = (
+    ("files", "database_file"),
+    ("files", "config_hot_reload"),
+    ("files", "config_poll_seconds"),
+    ("files", "config_shared_catalog"),
+    ("storage", "in_memory_mode"),
+    ("storage", "checkpoint_interval_seconds"),
+    ("diagnostics", "sql_profiler_enabled"),
+    ("diagnostics", "slow_command_log_enabled"),
+    ("diagnostics", "slow_command_log_file"),
+)
+
+class ConfigSnapshot:
+    """由配置目录编译出的只读数据快照，包含原始数据及派生索引"""
+
+    def __init__(self, content_hash: str = ""):
+        self.content_hash = content_hash
+        # 每次热重载换入新快照时递增，派生缓存据此判断是否失效
+        self.version = 0
+        # 境界、标签、怪物与Boss模板均已校验并编译为类型化记录
+        self.levels = LevelTable()
+        self.item_data: Dict[str, Item] = {}
+        self.bosses: Dict[str, BossTemplate] = {}
+        self.monsters: Dict[str, MonsterTemplate] = {}
+        self.realm_data: Dict[str, dict] = {}
+        self.tags: Dict[str, TagTemplate] = {}
+
+        self.item_name_to_id: Dict[str, str] = {}
+        self.realm_name_to_id: Dict[str, str] = {}
+        self.boss_name_to_id: Dict[str, str] = {}
+        # 名称模糊/前缀索引，供指令在名称打错时给出建议
+        self.item_name_index = NameIndex({})
+        # 物品分类索引：可售物品保持配置顺序（每日商品抽样依赖该顺序），
+        # 各类别下的物品ID按价格升序排列，另附成员集合用于快速过滤
+        self.sellable_items: List[Item] = []
+        self.items_by_type: Dict[str, List[str]] = {}
+        self.items_by_rank: Dict[str, List[str]] = {}
+        self.items_by_subtype: Dict[str, List[str]] = {}
+        self.category_members: Dict[str, FrozenSet[str]] = {}
+        self.effect_programs: Dict[str, EffectProgram] = {}
+
+class MappedSnapshot(ConfigSnapshot):
+    """由共享目录文件映射出的快照：大表逐条延迟解码，其余属性在首次访问时解码"""
+
+    def __init__(self, content_hash: str, sections: Dict[str, Any]):
+        self.content_hash = content_hash
+        self.version = 0
+        self._lazy = {}
+        for name, section in sections.items():
+            if isinstance(section, MappedRecords):
+                setattr(self, name, section)
+            else:
+                self._lazy[name] = section
+
+    def __getattr__(self, name: str) -> Any:
+        loader = self.__dict__.get("_lazy", {}).pop(name, None)
+        if loader is None:
+            raise AttributeError(name)
+        value = loader()
+        setattr(self, name, value)
+        return value
+
+# 指令执行期间固定使用的快照，保证热重载时进行中的指令看到一致的数据
+_pinned_snapshot: ContextVar[Optional[ConfigSnapshot]] = ContextVar("xiuxian_config_snapshot", default=None)
 
 class ConfigManager:
-    def __init__(self, base_dir: Path):
+    def __init__(self, base_dir: Path, cache_dir: Optional[Path] = None, config: Optional[Dict[str, Any]] = None):
         self._base_dir = base_dir
         self._paths = {
             "level": base_dir / "config" / "level_config.json",
@@ -18,22 +101,122 @@ class ConfigManager:
             "realm": base_dir / "config" / "realms.json",
             "tag": base_dir / "config" / "tags.json"
         }
+        self._cache_path = cache_dir / SNAPSHOT_FILE_NAME if cache_dir else None
+        self._catalog_path = cache_dir / CATALOG_FILE_NAME if cache_dir else None
+        self._snapshot = ConfigSnapshot()
+        self._mtimes: Dict[str, Optional[int]] = {}
+        self._failed_mtimes: Optional[Dict[str, Optional[int]]] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._config = config if config is not None else {}
+        self._settings_fingerprint = ""
+        self._settings: Optional[Settings] = None
+        self._settings_listeners: List[Callable[[Settings], None]] = []
 
-        self.level_data: List[dict] = []
-        self.item_data: Dict[str, Item] = {}
-        self.boss_data: Dict[str, dict] = {}
-        self.monster_data: Dict[str, dict] = {}
-        self.realm_data: Dict[str, dict] = {}
-        self.tag_data: Dict[str, dict] = {}
+        self.refresh_settings()
+        self._mtimes = self._stat_sources()
+        self._load_all()
 
-        self.level_map: Dict[str, dict] = {}
-        self.item_name_to_id: Dict[str, str] = {}
-        self.realm_name_to_id: Dict[str, str] = {}
-        self.boss_name_to_id: Dict[str, str] = {}
+    @property
+    def settings(self) -> Settings:
+        return self._settings
 
-        self._load_all()
+    def refresh_settings(self) -> bool:
+        """插件配置有变动时重建 Settings 并通知订阅方，返回是否发生了重建"""
+        fingerprint = json.dumps(self._config, sort_keys=True, ensure_ascii=False, default=str)
+        if fingerprint == self._settings_fingerprint:
+            return False
+        previous = self._settings
+        self._settings = Settings.build(self._base_dir / "_conf_schema.json", self._config)
+        self._settings_fingerprint = fingerprint
+        if previous is None:
+            return True
+
+        pending = [
+            f"{section.upper()}.{key.upper()}" for section, key in RESTART_REQUIRED_SETTINGS
+            if getattr(getattr(previous, section), key) != getattr(getattr(self._settings, section), key)
+        ]
+        if pending:
+            logger.warning(f"检测到插件配置变动，以下配置项需重载插件后生效: {', '.join(pending)}")
+        else:
+            logger.info("检测到插件配置变动，已更新插件设置。")
+        for callback in self._settings_listeners:
+            try:
+                callback(self._settings)
+            except Exception as e:
+                logger.error(f"应用插件配置变动失败: {e}")
+        return True
+
+    def on_settings_changed(self, callback: Callable[[Settings], None]):
+        """登记在插件配置重建后调用的回调，供构造时复制了配置值的组件同步更新"""
+        self._settings_listeners.append(callback)
+
+    # 以下属性均转发到当前快照，调用方无需关心快照的存在
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        return _pinned_snapshot.get() or self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.version
+
+    @property
+    def levels(self) -> LevelTable:
+        return self.snapshot.levels
+
+    @property
+    def item_data(self) -> Dict[str, Item]:
+        return self.snapshot.item_data
 
-    def _load_json_data(self, file_path: Path) -> Any:
+    @property
+    def bosses(self) -> Dict[str, BossTemplate]:
+        return self.snapshot.bosses
+
+    @property
+    def monsters(self) -> Dict[str, MonsterTemplate]:
+        return self.snapshot.monsters
+
+    @property
+    def realm_data(self) -> Dict[str, dict]:
+        return self.snapshot.realm_data
+
+    @property
+    def tags(self) -> Dict[str, TagTemplate]:
+        return self.snapshot.tags
+
+    @property
+    def item_name_to_id(self) -> Dict[str, str]:
+        return self.snapshot.item_name_to_id
+
+    @property
+    def realm_name_to_id(self) -> Dict[str, str]:
+        return self.snapshot.realm_name_to_id
+
+    @property
+    def boss_name_to_id(self) -> Dict[str, str]:
+        return self.snapshot.boss_name_to_id
+
+    @contextmanager
+    def pin(self) -> Iterator[ConfigSnapshot]:
+        """
+        在当前上下文中固定使用此刻的快照，期间发生的热重载不会影响本次指令。
+        插件配置在此一并检查：未开启文件热重载时，配置面板中的修改也会在下一条指令时生效。
+        """
+        if _pinned_snapshot.get() is not None:
+            yield _pinned_snapshot.get()
+            return
+        self.refresh_settings()
+        snapshot = self._snapshot
+        token = _pinned_snapshot.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            try:
+                _pinned_snapshot.reset(token)
+            except ValueError:
+                _pinned_snapshot.set(None)
+
+    def _load_json_data(self, file_path: Path, strict: bool = False) -> Any:
+        """读取数据文件；strict 为真时（热重载）解析失败直接抛出，避免用空数据替换现有配置"""
         if not file_path.exists():
             logger.warning(f"数据文件 {file_path} 不存在，将使用空数据。")
             return {} if file_path.suffix == '.json' else []
@@ -43,44 +226,213 @@ class ConfigManager:
                 logger.info(f"成功加载 {file_path.name} (共 {len(data)} 条数据)。")
                 return data
         except Exception as e:
+            if strict:
+                raise
             logger.error(f"加载数据文件 {file_path} 失败: {e}")
             return {} if file_path.suffix == '.json' else []
 
-    def _load_all(self):
-        """加载所有数据文件并进行后处理"""
-        self.level_data = self._load_json_data(self._paths["level"])
-        raw_item_data = self._load_json_data(self._paths["item"])
-        self.boss_data = self._load_json_data(self._paths["boss"])
-        self.monster_data = self._load_json_data(self._paths["monster"])
-        self.realm_data = self._load_json_data(self._paths["realm"])
-        self.tag_data = self._load_json_data(self._paths["tag"])
-
-        self.level_map = {info["level_name"]: {"index": i, **info}
-                          for i, info in enumerate(self.level_data) if "level_name" in info}
-
-        self.item_data = {}
-        self.item_name_to_id = {}
+    def _content_hash(self) -> str:
+        """配置目录下所有源文件内容的哈希，任一文件变动都会使快照失效"""
+        digest = hashlib.sha256(str(SNAPSHOT_FORMAT_VERSION).encode())
+        for key in sorted(self._paths):
+            path = self._paths[key]
+            digest.update(key.encode())
+            digest.update(path.read_bytes() if path.exists() else b"<missing>")
+        return digest.hexdigest()
+
+    @property
+    def _shared_catalog(self) -> bool:
+        return self._catalog_path is not None and self._settings.files.config_shared_catalog
+
+    def _read_cached_snapshot(self, content_hash: str) -> Optional[ConfigSnapshot]:
+        if self._shared_catalog:
+            sections = open_catalog(self._catalog_path, content_hash)
+            return MappedSnapshot(content_hash, sections) if sections is not None else None
+        if not self._cache_path or not self._cache_path.exists():
+            return None
+        try:
+            with open(self._cache_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"配置快照读取失败，将重新解析配置: {e}")
+            return None
+        if not isinstance(snapshot, ConfigSnapshot) or snapshot.content_hash != content_hash:
+            return None
+        return snapshot
+
+    def _write_cached_snapshot(self, snapshot: ConfigSnapshot) -> ConfigSnapshot:
+        """写入缓存并返回此后应使用的快照；共享目录模式下换用映射出的快照，本进程不再持有完整副本"""
+        if self._shared_catalog:
+            try:
+                write_catalog(self._catalog_path, snapshot)
+            except OSError as e:
+                logger.warning(f"共享配置目录写入失败，本进程使用独立副本: {e}")
+                return snapshot
+            return self._read_cached_snapshot(snapshot.content_hash) or snapshot
+        if not self._cache_path:
+            return snapshot
+        try:
+            write_atomic(self._cache_path, pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            logger.warning(f"配置快照写入失败: {e}")
+        return snapshot
+
+    def _build_snapshot(self, content_hash: str, strict: bool = False) -> ConfigSnapshot:
+        """解析全部数据文件，校验并编译为类型化记录，再构建派生索引"""
+        snapshot = ConfigSnapshot(content_hash)
+        snapshot.levels = compile_levels(self._load_json_data(self._paths["level"], strict), strict)
+        raw_item_data = self._load_json_data(self._paths["item"], strict)
+        snapshot.tags = compile_tags(self._load_json_data(self._paths["tag"], strict), strict)
+        snapshot.bosses = compile_bosses(self._load_json_data(self._paths["boss"], strict), snapshot.tags, strict)
+        snapshot.monsters = compile_monsters(self._load_json_data(self._paths["monster"], strict), snapshot.tags, strict)
+        snapshot.realm_data = self._load_json_data(self._paths["realm"], strict)
+
         for item_id, info in raw_item_data.items():
             try:
-                self.item_data[item_id] = Item(id=item_id, **info)
-                if "name" in info:
-                    self.item_name_to_id[info["name"]] = item_id
+                item = Item(id=item_id, **info)
             except TypeError as e:
                 logger.error(f"加载物品 {item_id} 失败，配置项不匹配: {e}")
+                continue
+            snapshot.item_data[item_id] = item
+            snapshot.item_name_to_id[item.name] = item_id
+            program, unknown_keys = EffectProgram.compile(item)
+            if unknown_keys:
+                logger.warning(f"物品 {item_id}({item.name}) 的效果含有无法识别的配置项 {unknown_keys}，已忽略。")
+            snapshot.effect_programs[item_id] = program
+
+        snapshot.realm_name_to_id = {info["name"]: realm_id
+                                     for realm_id, info in snapshot.realm_data.items() if "name" in info}
+        snapshot.boss_name_to_id = {boss.name: boss_id for boss_id, boss in snapshot.bosses.items()}
+        check_loot_items(snapshot.tags, snapshot.item_data)
+        self._build_item_categories(snapshot)
+        snapshot.item_name_index = NameIndex(snapshot.item_name_to_id)
+        return snapshot
+
+    @staticmethod
+    def _build_item_categories(snapshot: ConfigSnapshot):
+        snapshot.sellable_items = [item for item in snapshot.item_data.values() if item.price > 0]
+        for item in sorted(snapshot.item_data.values(), key=lambda i: i.price):
+            snapshot.items_by_type.setdefault(item.type, []).append(item.id)
+            snapshot.items_by_rank.setdefault(item.rank, []).append(item.id)
+            if item.subtype:
+                snapshot.items_by_subtype.setdefault(item.subtype, []).append(item.id)
+        # 类型、子类型、品阶的名称互不重复，合并为一张表供指令按任一类别过滤
+        for index in (snapshot.items_by_rank, snapshot.items_by_subtype, snapshot.items_by_type):
+            for category, item_ids in index.items():
+                snapshot.category_members[category] = frozenset(item_ids)
+
+    def _load_all(self):
+        """加载所有数据：内容未变时直接读取编译好的快照，否则完整解析并重新生成快照"""
+        start = time.perf_counter()
+        content_hash = self._content_hash()
+        hashed = time.perf_counter()
 
-        self.realm_name_to_id = {info["name"]: realm_id
-                                 for realm_id, info in self.realm_data.items() if "name" in info}
-        self.boss_name_to_id = {info["name"]: boss_id
-                                for boss_id, info in self.boss_data.items() if "name" in info}
+        snapshot = self._read_cached_snapshot(content_hash)
+        if snapshot is not None:
+            self._snapshot = snapshot
+            logger.info(f"配置快照命中：哈希 {(hashed - start) * 1000:.1f}ms，"
+                        f"载入快照 {(time.perf_counter() - hashed) * 1000:.1f}ms")
+            return
+
+        snapshot = self._build_snapshot(content_hash)
+        parsed = time.perf_counter()
+        self._snapshot = self._write_cached_snapshot(snapshot)
+        logger.info(f"配置已重新解析：哈希 {(hashed - start) * 1000:.1f}ms，"
+                    f"解析与建索引 {(parsed - hashed) * 1000:.1f}ms，"
+                    f"写入快照 {(time.perf_counter() - parsed) * 1000:.1f}ms")
 
     def get_item_by_name(self, name: str) -> Optional[Tuple[str, Item]]:
         item_id = self.item_name_to_id.get(name)
         return (item_id, self.item_data[item_id]) if item_id and item_id in self.item_data else None
 
+    def get_effect_program(self, item_id: str) -> Optional[EffectProgram]:
+        return self.snapshot.effect_programs.get(item_id)
+
+    def find_item(self, name: str) -> Tuple[Optional[Tuple[str, Item]], List[str]]:
+        """按名称查找物品，允许省略后缀；找不到时返回最多三个相近名称"""
+        item_id, suggestions = self.snapshot.item_name_index.lookup(name)
+        if item_id and item_id in self.item_data:
+            return (item_id, self.item_data[item_id]), []
+        return None, suggestions
+
+    def suggest_items(self, name: str) -> List[str]:
+        """名称不完全一致时给出候选：可唯一补全的名称，或最多三个相近名称"""
+        match, suggestions = self.find_item(name)
+        return [match[1].name] if match else suggestions
+
+    @property
+    def sellable_items(self) -> List[Item]:
+        return self.snapshot.sellable_items
+
+    @property
+    def item_categories(self) -> List[str]:
+        snapshot = self.snapshot
+        return [*snapshot.items_by_type, *snapshot.items_by_subtype, *snapshot.items_by_rank]
+
+    def items_in_category(self, category: str) -> Optional[FrozenSet[str]]:
+        """返回类型、子类型或品阶为 category 的物品ID集合，类别不存在时返回None"""
+        return self.snapshot.category_members.get(category)
+
     def get_realm_by_name(self, name: str) -> Optional[Tuple[str, dict]]:
         realm_id = self.realm_name_to_id.get(name)
         return (realm_id, self.realm_data[realm_id]) if realm_id else None
 
-    def get_boss_by_name(self, name: str) -> Optional[Tuple[str, dict]]:
+    def get_boss_by_name(self, name: str) -> Optional[Tuple[str, BossTemplate]]:
         boss_id = self.boss_name_to_id.get(name)
-        return (boss_id, self.boss_data[boss_id]) if boss_id else None
\ No newline at end of file
+        return (boss_id, self.bosses[boss_id]) if boss_id else None
+
+    # --- 热重载 ---
+    def _stat_sources(self) -> Dict[str, Optional[int]]:
+        mtimes = {}
+        for key, path in self._paths.items():
+            try:
+                mtimes[key] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[key] = None
+        return mtimes
+
+    def start_watching(self, interval: float = 5.0):
+        """启动配置文件监视：轮询修改时间，发现变动后在后台重建快照并原子替换"""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch_loop(max(1.0, interval)))
+
+    def stop_watching(self):
+        if self._watch_task and not self._watch_task.done():
+            self._watch_task.cancel()
+        self._watch_task = None
+
+    async def _watch_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self._check_for_changes()
+
+    async def _check_for_changes(self):
+        """检查一次配置文件是否有变动并热重载；重载失败时不记下修改时间，下一轮继续重试"""
+        self.refresh_settings()
+        mtimes = self._stat_sources()
+        if mtimes == self._mtimes:
+            return
+        changed = [self._paths[k].name for k in mtimes if mtimes[k] != self._mtimes.get(k)]
+        try:
+            await self.reload()
+        except Exception as e:
+            # 同一次改动反复失败时只记录一次，修复文件或故障消除后自动换入
+            if mtimes != self._failed_mtimes:
+                logger.error(f"配置热重载失败，继续使用旧配置，将在下次检查时重试: {e}")
+                self._failed_mtimes = mtimes
+            return
+        self._mtimes = mtimes
+        self._failed_mtimes = None
+        logger.info(f"检测到配置文件变动 {changed}，已热重载到版本 {self._snapshot.version}。")
+
+    async def reload(self):
+        """在线程池中解析配置并构建新快照，完成后一次赋值换入；构建期间指令仍使用旧快照"""
+        loop = asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(None, self._rebuild)
+        snapshot.version = self._snapshot.version + 1
+        self._snapshot = snapshot
+
+    def _rebuild(self) -> ConfigSnapshot:
+        content_hash = self._content_hash()
+        snapshot = self._build_snapshot(content_hash, strict=True)
+        return self._write_cached_snapshot(snapshot)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+测试公共夹具：插件模块依赖 AstrBot，未安装时相关测试自动跳过。
+插件目录以包的形式导入，数据库建在每个测试独立的临时目录中。
+"""
+
+import asyncio
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+PLUGIN_DIR = Path(__file__).resolve().parent
+
+
+def load_plugin_module(name: str):
+    """以包的形式导入插件内的模块，如 load_plugin_module("data")"""
+    pytest.importorskip("astrbot")
+    if str(PLUGIN_DIR.parent) not in sys.path:
+        sys.path.insert(0, str(PLUGIN_DIR.parent))
+    return importlib.import_module(f"{PLUGIN_DIR.name}.{name}")
+
+
+class MessageEvent:
+    """只实现处理器用到的消息事件接口，回复直接返回文本"""
+
+    def __init__(self, sender_id):
+        self.sender_id = sender_id
+
+    def get_sender_id(self):
+        return self.sender_id
+
+    def get_sender_name(self):
+        return self.sender_id
+
+    def plain_result(self, text):
+        return text
+
+
+@pytest.fixture
+def plugin():
+    return load_plugin_module
+
+
+@pytest.fixture
+def config_manager(plugin, tmp_path):
+    return plugin("config_manager").ConfigManager(PLUGIN_DIR, cache_dir=tmp_path / "cache")
+
+
+@pytest.fixture
+def new_db(plugin, config_manager, tmp_path, monkeypatch):
+    """返回异步工厂：在临时目录中创建数据库并迁移到最新版本，用完须 await db.close()"""
+    data = plugin("data")
+    star = importlib.import_module("astrbot.api.star")
+    monkeypatch.setattr(star.StarTools, "get_data_dir", staticmethod(lambda name: tmp_path / name))
+
+    opened = []
+
+    async def factory(**kwargs):
+        db = data.DataBase("test.db", **kwargs)
+        await db.connect()
+        opened.append(db)
+        await data.MigrationManager(db.conn, config_manager).migrate()
+        return db
+    yield factory
+
+    # 断言失败时测试来不及关闭连接，aiosqlite 的工作线程会让进程无法退出
+    for db in opened:
+        if db.conn is not None:
+            asyncio.run(db._raw_conn.close())
+
+
+@pytest.fixture
+def add_players(plugin):
+    """返回异步函数：按 user_id 批量创建玩家，其余字段可用关键字参数覆盖"""
+    Player = plugin("models").Player
+
+    async def add(db, user_ids, **overrides):
+        players = [Player(user_id=user_id, **overrides) for user_id in user_ids]
+        for player in players:
+            await db.create_player(player)
+        return players
+    return add
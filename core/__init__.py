@@ -4,5 +4,6 @@ from .combat_manager import BattleManager
 from .cultivation_manager import CultivationManager
 from .realm_manager import RealmManager
 from .sect_manager import SectManager
+from .season_manager import SeasonManager
 
-__all__ = ["BattleManager", "CultivationManager", "RealmManager", "SectManager"]
\ No newline at end of file
+__all__ = ["BattleManager", "CultivationManager", "RealmManager", "SectManager", "SeasonManager"]
\ No newline at end of file
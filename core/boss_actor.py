@@ -0,0 +1,186 @@
+# core/boss_actor.py
+
+import asyncio
+import contextvars
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from astrbot.api import logger
+from ..data import DataBase
+from ..models import ActiveWorldBoss
+
+# 攻击方的结算函数：传入Boss当前气血，返回 (扣除的气血, 计入贡献榜的伤害, 攻击方自己的战斗结果)
+Strike = Callable[[int], Tuple[int, int, Any]]
+
+@dataclass
+class BossHit:
+    """一次攻击在Boss侧的结算结果"""
+
+    hp_damage: int
+    credited_damage: int
+    payload: Any
+    hp_before: int
+    hp_after: int
+    killed: bool = False
+
+class BossRevision:
+    """世界Boss对外可见状态的版本号：气血、伤害贡献、生成与击败任一变化都会使其递增"""
+
+    def __init__(self):
+        self.value = 0
+
+    def bump(self):
+        self.value += 1
+
+class BossActor:
+    """
+    单个活跃世界Boss的执行者：在内存中持有权威的剩余气血，所有攻击经队列按到达顺序串行结算，
+    剩余气血与伤害贡献每隔一段时间批量写库。击杀只会出现在一次攻击的结果中，由该攻击方负责结算奖励。
+    """
+
+    def __init__(self, db: DataBase, instance: ActiveWorldBoss, flush_interval: Callable[[], float],
+                 revision: BossRevision):
+        self.db = db
+        self.instance = instance
+        self.revision = revision
+        self.defeated = instance.current_hp <= 0
+        # 每次等待前重新取值，插件配置中修改的写库间隔对正在进行的Boss战同样生效
+        self._flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending: Dict[str, List[Any]] = {}  # user_id -> [user_name, 伤害]
+        self._hp_dirty = False
+        self._last_flush = time.monotonic()
+        self._flush_lock = asyncio.Lock()
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def boss_id(self) -> str:
+        return self.instance.boss_id
+
+    @property
+    def dirty(self) -> bool:
+        return self._hp_dirty or bool(self._pending)
+
+    async def attack(self, user_id: str, user_name: str, strike: Strike) -> Optional[BossHit]:
+        """排队结算一次攻击，Boss已被击败时返回None"""
+        if self.defeated or self._closed:
+            return None
+        if self._worker is None or self._worker.done():
+            # 在空白上下文中启动，不继承发起指令的工作单元、配置快照与SQL统计归属
+            self._worker = contextvars.Context().run(asyncio.create_task, self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((user_id, user_name, strike, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), self._flush_interval() if self.dirty else None)
+            except asyncio.TimeoutError:
+                await self._flush_quietly()
+                continue
+            if item is None:
+                return
+
+            user_id, user_name, strike, future = item
+            if future.done():
+                continue
+            try:
+                future.set_result(self._apply(user_id, user_name, strike))
+            except Exception as e:
+                future.set_exception(e)
+            if self.dirty and time.monotonic() - self._last_flush >= self._flush_interval():
+                await self._flush_quietly()
+
+    def _apply(self, user_id: str, user_name: str, strike: Strike) -> Optional[BossHit]:
+        if self.defeated:
+            return None
+        hp_before = self.instance.current_hp
+        hp_damage, credited_damage, payload = strike(hp_before)
+        hp_damage = max(0, min(hp_damage, hp_before))
+        self.instance.current_hp = hp_before - hp_damage
+
+        if hp_damage > 0:
+            self._hp_dirty = True
+        if credited_damage > 0:
+            entry = self._pending.setdefault(user_id, [user_name, 0])
+            entry[1] += credited_damage
+        if self.instance.current_hp <= 0:
+            self.defeated = True
+        if hp_damage > 0 or credited_damage > 0:
+            self.revision.bump()
+        return BossHit(hp_damage, credited_damage, payload, hp_before, self.instance.current_hp, self.defeated)
+
+    async def flush(self):
+        """将内存中的剩余气血与待写伤害在一个事务中写库"""
+        async with self._flush_lock:
+            if not self.dirty:
+                return
+            pending, self._pending = self._pending, {}
+            self._hp_dirty = False
+            damages = [(user_id, name, damage) for user_id, (name, damage) in pending.items()]
+            try:
+                await self.db.save_boss_progress(self.boss_id, self.instance.current_hp, damages)
+            except Exception:
+                # 写库失败时把数据放回，下个周期重试
+                for user_id, name, damage in damages:
+                    self._pending.setdefault(user_id, [name, 0])[1] += damage
+                self._hp_dirty = True
+                raise
+            else:
+                # 伤害贡献榜从库中读取，写库后才会变化
+                self.revision.bump()
+            finally:
+                self._last_flush = time.monotonic()
+
+    async def _flush_quietly(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"世界Boss {self.boss_id} 战况写库失败，将在下个周期重试: {e}")
+
+    async def close(self):
+        """处理完已排队的攻击后停止执行者，并写入剩余数据"""
+        self._closed = True
+        if self._worker is not None and not self._worker.done():
+            await self._queue.put(None)
+            await self._worker
+        await self._flush_quietly()
+
+class BossArena:
+    """活跃世界Boss执行者的注册表，保证每个Boss同一时刻只有一个执行者"""
+
+    def __init__(self, db: DataBase, flush_interval_ms: Callable[[], int], revision: BossRevision):
+        self.db = db
+        self.revision = revision
+        self._flush_interval_ms = flush_interval_ms
+        self._actors: Dict[str, BossActor] = {}
+
+    async def get(self, boss_id: str) -> Optional[BossActor]:
+        """取得Boss的执行者，Boss不存在、已被击败或正在结算时返回None"""
+        actor = self._actors.get(boss_id)
+        if actor is None:
+            instance = await self.db.get_active_boss(boss_id)
+            if instance is None or instance.current_hp <= 0:
+                return None
+            # 读库期间其他指令可能已经创建了执行者，以先创建的为准
+            actor = self._actors.setdefault(boss_id, BossActor(self.db, instance, self._flush_interval, self.revision))
+        return None if actor.defeated else actor
+
+    def _flush_interval(self) -> float:
+        return self._flush_interval_ms() / 1000
+
+    def live_hp(self, boss_id: str) -> Optional[int]:
+        actor = self._actors.get(boss_id)
+        return actor.instance.current_hp if actor else None
+
+    async def discard(self, boss_id: str):
+        actor = self._actors.pop(boss_id, None)
+        if actor is not None:
+            await actor.close()
+
+    async def close(self):
+        for boss_id in list(self._actors):
+            await self.discard(boss_id)
@@ -0,0 +1,150 @@
+# core/boss_scheduler.py
+
+import asyncio
+import contextvars
+import heapq
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from astrbot.api import logger
+from ..data import DataBase
+from ..config_manager import ConfigManager
+from ..models import ActiveWorldBoss
+from .boss_actor import BossRevision
+
+def format_cooldown(minutes: int) -> str:
+    """把冷却分钟数格式化为「X小时Y分钟」"""
+    hours, rest = divmod(max(0, int(minutes)), 60)
+    if not hours:
+        return f"{rest}分钟"
+    return f"{hours}小时{rest}分钟" if rest else f"{hours}小时"
+
+class BossScheduler:
+    """
+    世界Boss重生调度器：以最小堆维护各Boss的 respawn_at，后台任务在到点时生成Boss。
+    启动时补齐所有未激活且不在冷却中的Boss；配置热重载后新增的Boss在下次唤醒时补齐。
+    """
+
+    # 堆为空或下次重生较远时，最长隔多久醒来按库中状态重新核对一次
+    RESYNC_SECONDS = 60
+
+    def __init__(self, db: DataBase, config_manager: ConfigManager, create_boss, revision: BossRevision):
+        self.db = db
+        self.config_manager = config_manager
+        self.revision = revision
+        # create_boss(boss_id, level_index, config_manager) -> Optional[Boss]
+        self._create_boss = create_boss
+        self._heap: List[Tuple[float, str]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._synced_version: Optional[int] = None
+
+    async def start(self):
+        """补齐启动时就该存在的Boss，再开始按重生时间调度"""
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            await self._sync()
+        except Exception as e:
+            logger.error(f"世界Boss重生调度初始化失败，将在后台重试: {e}")
+        # 在空白上下文中启动，不继承任何指令的工作单元与配置快照
+        self._task = contextvars.Context().run(asyncio.create_task, self._run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def schedule(self, boss_id: str, respawn_at: float):
+        """Boss被击败后登记重生时间"""
+        heapq.heappush(self._heap, (respawn_at, boss_id))
+        self._wakeup.set()
+
+    async def _run(self):
+        resync = False
+        while True:
+            try:
+                # 配置变动或定期核对时按库中状态重建，补齐既不活跃也不在冷却中的Boss
+                if resync or self._synced_version != self.config_manager.version:
+                    await self._sync()
+                due = []
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[1])
+                if due:
+                    await self._spawn(due)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"世界Boss重生调度出错: {e}")
+
+            timeout = self.RESYNC_SECONDS
+            if self._heap:
+                timeout = min(timeout, max(0.0, self._heap[0][0] - time.time()))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+                resync = False
+            except asyncio.TimeoutError:
+                resync = timeout >= self.RESYNC_SECONDS
+
+    async def _sync(self):
+        """按库中的活跃Boss与冷却记录重建堆，并生成应当存在却缺失的Boss"""
+        version = self.config_manager.version
+        templates = self.config_manager.bosses
+        active = {boss.boss_id for boss in await self.db.get_active_bosses()}
+        cooldowns = await self.db.get_all_boss_cooldowns()
+
+        self._heap = [
+            (info["respawn_at"], boss_id) for boss_id, info in cooldowns.items()
+            if boss_id in templates and boss_id not in active
+        ]
+        heapq.heapify(self._heap)
+        missing = [boss_id for boss_id in templates if boss_id not in active and boss_id not in cooldowns]
+        if missing:
+            await self._spawn(missing)
+        self._synced_version = version
+
+    async def _spawn(self, boss_ids: Iterable[str]):
+        templates = self.config_manager.bosses
+        active = {boss.boss_id for boss in await self.db.get_active_bosses()}
+        cooldowns = await self.db.get_all_boss_cooldowns()
+        now = time.time()
+        avg_level_index: Optional[int] = None
+
+        for boss_id in dict.fromkeys(boss_ids):
+            template = templates.get(boss_id)
+            if template is None or boss_id in active:
+                continue
+            cooldown_info = cooldowns.get(boss_id)
+            if cooldown_info and cooldown_info["respawn_at"] > now:
+                # 堆中的旧记录：该Boss已被重新安排了更晚的重生时间
+                continue
+            if avg_level_index is None:
+                # 使用排名前N的玩家的平均境界来决定Boss境界
+                avg_level_index = await self.db.get_top_players_avg_level(
+                    self.config_manager.settings.values.world_boss_top_players_avg
+                )
+
+            boss_with_stats = self._create_boss(boss_id, avg_level_index, self.config_manager)
+            if not boss_with_stats:
+                logger.error(f"无法为Boss ID {boss_id} 生成属性，请检查配置。")
+                continue
+            # 清除冷却与生成Boss在同一个事务中完成，经共享写锁与指令的写入串行
+            async with self.db.transaction():
+                if cooldown_info:
+                    await self.db.remove_boss_cooldown(boss_id)
+                await self.db.create_active_boss(ActiveWorldBoss(
+                    boss_id=boss_id,
+                    current_hp=boss_with_stats.max_hp,
+                    max_hp=boss_with_stats.max_hp,
+                    spawned_at=time.time(),
+                    level_index=avg_level_index
+                ))
+            active.add(boss_id)
+            self.revision.bump()
+            logger.info(f"世界Boss {template.name} (ID: {boss_id}) 已生成，境界索引 {avg_level_index}。")
@@ -2,70 +2,100 @@
 
 import random
 import time
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Sequence, Tuple, Any, Union
 
 from astrbot.api import logger, AstrBotConfig
 from ..models import Player, Boss, ActiveWorldBoss, Monster
 from ..data import DataBase
 from ..config_manager import ConfigManager
+from ..catalog import LootTable
+from .combat_resolver import DuelRules, resolve_duel
+from .boss_actor import BossArena, BossRevision
+from .boss_scheduler import BossScheduler, format_cooldown
+
+# 打怪：玩家气血降到1即力竭，不限回合
+MONSTER_DUEL_RULES = DuelRules(attacker_floor=1, defender_floor=0)
+# 世界Boss：每次挑战最多50回合
+BOSS_DUEL_RULES = DuelRules(attacker_floor=0, defender_floor=0, max_turns=50)
+# 切磋：任一方气血降到1即分出胜负，最多30回合
+PVP_DUEL_RULES = DuelRules(attacker_floor=1, defender_floor=1, max_turns=30)
+
+# 基础属性公式：境界序号 -> [气血, 攻击, 防御, 灵石, 修为]
+BASE_STAT_FORMULAS = {
+    "monster": lambda i: [15 * i + 60, 2 * i + 8, 1 * i + 4, 3 * i + 10, 5 * i + 20],
+    "boss": lambda i: [100 * i + 500, 10 * i + 40, 5 * i + 20, 50 * i + 1000, 100 * i + 2000],
+}
 
 class MonsterGenerator:
     """基于标签系统的怪物和Boss生成器"""
 
+    # 属性只取决于模板、境界与强度系数，按配置快照缓存；快照换新（热重载）时整体失效。
+    # 缓存中的实例为共享只读对象，掉落物品由 roll_loot 在击杀结算时单独掷骰
+    _stats_cache: Dict[Tuple[str, str, int, float], Any] = {}
+    _stats_snapshot: Any = None
+
     @staticmethod
-    def _generate_rewards(base_loot: List) -> Dict[str, int]:
-        gained_items = {}
-        for entry in base_loot:
-            if random.random() < entry.get("chance", 0):
-                quantity_range = entry.get("quantity", [1, 1])
-                min_qty = quantity_range[0]
-                max_qty = quantity_range[1] if len(quantity_range) > 1 else min_qty
-
-                item_id = str(entry["item_id"])
-                amount = random.randint(min_qty, max_qty)
-                gained_items[item_id] = gained_items.get(item_id, 0) + amount
-        return gained_items
+    def roll_loot(enemy: Union[Monster, Boss]) -> Dict[str, int]:
+        """击杀结算时为敌人掷一次掉落"""
+        return enemy.loot.roll() if enemy.loot is not None else {}
 
     @classmethod
-    def create_monster(cls, template_id: str, player_level_index: int, config_manager: ConfigManager) -> Optional[Monster]:
-        template = config_manager.monster_data.get(template_id)
-        if not template:
-            logger.warning(f"尝试创建怪物失败：找不到模板ID {template_id}")
-            return None
+    def _cached(cls, key: Tuple[str, str, int, float], config_manager: ConfigManager, build):
+        snapshot = config_manager.snapshot
+        if cls._stats_snapshot is not snapshot:
+            cls._stats_cache = {}
+            cls._stats_snapshot = snapshot
+        instance = cls._stats_cache.get(key)
+        if instance is None:
+            instance = build()
+            if instance is not None:
+                cls._stats_cache[key] = instance
+        return instance
 
-        base_hp = 15 * player_level_index + 60
-        base_attack = 2 * player_level_index + 8
-        base_defense = 1 * player_level_index + 4
-        base_gold = 3 * player_level_index + 10
-        base_exp = 5 * player_level_index + 20
-
-        final_name = template["name"]
-        final_hp = base_hp
-        final_attack = base_attack
-        final_defense = base_defense
-        final_gold = base_gold
-        final_exp = base_exp
+    @staticmethod
+    def fold_stats(kind: str, name: str, tags: Sequence[str], level_index: int, config_manager: ConfigManager,
+                   scaling_factor: float = 1.0) -> Tuple[str, List[float], LootTable]:
+        """
+        按基础公式与标签倍率计算属性 [气血, 攻击, 防御, 灵石, 修为]（未取整），
+        强度系数只作用于气血、攻击与防御。返回名称、属性与合并编译后的掉落表
+        """
+        stats = BASE_STAT_FORMULAS[kind](level_index)
         combined_loot_table = []
-
-        for tag_name in template.get("tags", []):
-            tag_effect = config_manager.tag_data.get(tag_name)
+        for tag_name in tags:
+            tag_effect = config_manager.tags.get(tag_name)
             if not tag_effect:
                 continue
+            if tag_effect.name_prefix is not None:
+                name = f"【{tag_effect.name_prefix}】{name}"
+            stats[0] *= tag_effect.hp_multiplier
+            stats[1] *= tag_effect.attack_multiplier
+            stats[2] *= tag_effect.defense_multiplier
+            stats[3] *= tag_effect.gold_multiplier
+            stats[4] *= tag_effect.exp_multiplier
+            combined_loot_table.extend(tag_effect.add_to_loot)
+
+        if scaling_factor != 1.0:
+            for i in range(3):
+                stats[i] *= scaling_factor
+        return name, stats, LootTable.compile(combined_loot_table)
 
-            if "name_prefix" in tag_effect:
-                final_name = f"【{tag_effect['name_prefix']}】{final_name}"
+    @classmethod
+    def create_monster(cls, template_id: str, player_level_index: int, config_manager: ConfigManager) -> Optional[Monster]:
+        return cls._cached(("monster", template_id, player_level_index, 1.0), config_manager,
+                           lambda: cls._build_monster(template_id, player_level_index, config_manager))
 
-            final_hp *= tag_effect.get("hp_multiplier", 1.0)
-            final_attack *= tag_effect.get("attack_multiplier", 1.0)
-            final_defense *= tag_effect.get("defense_multiplier", 1.0)
-            final_gold *= tag_effect.get("gold_multiplier", 1.0)
-            final_exp *= tag_effect.get("exp_multiplier", 1.0)
+    @classmethod
+    def _build_monster(cls, template_id: str, player_level_index: int, config_manager: ConfigManager) -> Optional[Monster]:
+        template = config_manager.monsters.get(template_id)
+        if not template:
+            logger.warning(f"尝试创建怪物失败：找不到模板ID {template_id}")
+            return None
 
-            if "add_to_loot" in tag_effect:
-                combined_loot_table.extend(tag_effect["add_to_loot"])
+        final_name, stats, loot = cls.fold_stats("monster", template.name, template.tags, player_level_index, config_manager)
+        final_hp, final_attack, final_defense, final_gold, final_exp = stats
 
         final_hp = int(final_hp)
-        instance = Monster(
+        return Monster(
             id=template_id,
             name=final_name,
             hp=final_hp,
@@ -75,65 +105,41 @@ class MonsterGenerator:
             rewards={
                 "gold": int(final_gold),
                 "experience": int(final_exp),
-                "items": cls._generate_rewards(combined_loot_table)
-            }
+            },
+            loot=loot
         )
-        return instance
 
     @classmethod
     def create_boss(cls, template_id: str, player_level_index: int, config_manager: ConfigManager, scaling_factor: float = 1.0) -> Optional[Boss]:
-        template = config_manager.boss_data.get(template_id)
+        return cls._cached(("boss", template_id, player_level_index, scaling_factor), config_manager,
+                           lambda: cls._build_boss(template_id, player_level_index, config_manager, scaling_factor))
+
+    @classmethod
+    def _build_boss(cls, template_id: str, player_level_index: int, config_manager: ConfigManager, scaling_factor: float) -> Optional[Boss]:
+        template = config_manager.bosses.get(template_id)
         if not template:
             logger.warning(f"尝试创建Boss失败：找不到模板ID {template_id}")
             return None
 
-        base_hp = 100 * player_level_index + 500
-        base_attack = 10 * player_level_index + 40
-        base_defense = 5 * player_level_index + 20
-        base_gold = 50 * player_level_index + 1000
-        base_exp = 100 * player_level_index + 2000
-
-        final_name = template["name"]
-        final_hp = base_hp
-        final_attack = base_attack
-        final_defense = base_defense
-        final_gold = base_gold
-        final_exp = base_exp
-        combined_loot_table = []
-
-        for tag_name in template.get("tags", []):
-            tag_effect = config_manager.tag_data.get(tag_name, {})
-            if "name_prefix" in tag_effect:
-                final_name = f"【{tag_effect['name_prefix']}】{final_name}"
-            final_hp *= tag_effect.get("hp_multiplier", 1.0)
-            final_attack *= tag_effect.get("attack_multiplier", 1.0)
-            final_defense *= tag_effect.get("defense_multiplier", 1.0)
-            final_gold *= tag_effect.get("gold_multiplier", 1.0)
-            final_exp *= tag_effect.get("exp_multiplier", 1.0)
-            if "add_to_loot" in tag_effect:
-                combined_loot_table.extend(tag_effect["add_to_loot"])
-        
-        # 应用强度系数
-        final_hp *= scaling_factor
-        final_attack *= scaling_factor
-        final_defense *= scaling_factor
+        final_name, stats, loot = cls.fold_stats("boss", template.name, template.tags, player_level_index, config_manager,
+                                                 scaling_factor)
+        final_hp, final_attack, final_defense, final_gold, final_exp = stats
 
         final_hp = int(final_hp)
-        instance = Boss(
+        return Boss(
             id=template_id,
             name=final_name,
             hp=final_hp,
             max_hp=final_hp,
             attack=int(final_attack),
             defense=int(final_defense),
-            cooldown_minutes=template["cooldown_minutes"],
+            cooldown_minutes=template.cooldown_minutes,
             rewards={
                 "gold": int(final_gold),
                 "experience": int(final_exp),
-                "items": cls._generate_rewards(combined_loot_table)
-            }
+            },
+            loot=loot
         )
-        return instance
 
 class BattleManager:
     """战斗管理器"""
@@ -142,55 +148,22 @@ class BattleManager:
         self.db = db
         self.config = config
         self.config_manager = config_manager
-
-    async def ensure_bosses_are_spawned(self) -> List[Tuple[ActiveWorldBoss, Boss]]:
-        active_boss_instances = await self.db.get_active_bosses()
-        active_boss_map = {b.boss_id: b for b in active_boss_instances}
-        all_boss_templates = self.config_manager.boss_data
-        
-        # 获取所有Boss的冷却信息
-        boss_cooldowns = await self.db.get_all_boss_cooldowns()
-        current_time = time.time()
-
-        # 使用所有玩家的平均境界来决定Boss境界
-        avg_level_index = await self.db.get_all_players_avg_level()
-        logger.info(f"当前所有玩家平均境界索引: {avg_level_index}")
-
-        for boss_id, template in all_boss_templates.items():
-            if boss_id not in active_boss_map:
-                # 检查Boss是否在冷却中
-                cooldown_info = boss_cooldowns.get(boss_id)
-                if cooldown_info:
-                    respawn_at = cooldown_info["respawn_at"]
-                    if current_time < respawn_at:
-                        # Boss仍在冷却中，计算剩余时间
-                        remaining_hours = (respawn_at - current_time) / 3600
-                        logger.info(f"世界Boss {template['name']} (ID: {boss_id}) 仍在冷却中，剩余 {remaining_hours:.1f} 小时")
-                        continue
-                    else:
-                        # 冷却时间已过，清除冷却记录
-                        await self.db.remove_boss_cooldown(boss_id)
-                        logger.info(f"世界Boss {template['name']} (ID: {boss_id}) 冷却时间已过，清除冷却记录")
-                
-                logger.info(f"世界Boss {template['name']} (ID: {boss_id}) 当前未激活，开始生成...")
-
-                boss_with_stats = MonsterGenerator.create_boss(boss_id, avg_level_index, self.config_manager)
-                if not boss_with_stats:
-                    logger.error(f"无法为Boss ID {boss_id} 生成属性，请检查配置。")
-                    continue
-
-                new_boss_instance = ActiveWorldBoss(
-                    boss_id=boss_id,
-                    current_hp=boss_with_stats.max_hp,
-                    max_hp=boss_with_stats.max_hp,
-                    spawned_at=time.time(),
-                    level_index=avg_level_index
-                )
-                await self.db.create_active_boss(new_boss_instance)
-                active_boss_map[boss_id] = new_boss_instance
-
+        # 世界Boss状态的版本号，查看世界boss的渲染缓存以此判断是否过期
+        self.revision = BossRevision()
+        # 世界Boss的剩余气血由各自的执行者在内存中维护，攻击串行结算、批量写库
+        self.arena = BossArena(db, lambda: config_manager.settings.storage.boss_flush_interval_ms, self.revision)
+        # 世界Boss按各自的冷却时间在后台定时重生
+        self.scheduler = BossScheduler(db, config_manager, MonsterGenerator.create_boss, self.revision)
+
+    async def list_active_bosses(self) -> List[Tuple[ActiveWorldBoss, Boss]]:
+        """当前活跃的世界Boss及其属性（只读，生成与重生由 BossScheduler 负责）"""
         result = []
-        for boss_id, active_instance in active_boss_map.items():
+        for active_instance in await self.db.get_active_bosses():
+            boss_id = active_instance.boss_id
+            # 库中的气血可能落后于执行者最多一个写库周期，以内存中的为准
+            live_hp = self.arena.live_hp(boss_id)
+            if live_hp is not None:
+                active_instance.current_hp = live_hp
             boss_template = MonsterGenerator.create_boss(boss_id, active_instance.level_index, self.config_manager)
             if boss_template:
                 result.append((active_instance, boss_template))
@@ -201,9 +174,10 @@ class BattleManager:
         if player.hp <= 1:
             return "你当前气血不足，无法挑战Boss，请先恢复气血！"
 
-        active_boss_instance = next((b for b in await self.db.get_active_bosses() if b.boss_id == boss_id), None)
-        if not active_boss_instance or active_boss_instance.current_hp <= 0:
+        actor = await self.arena.get(boss_id)
+        if actor is None:
             return f"来晚了一步，ID为【{boss_id}】的Boss已被击败或已消失！"
+        active_boss_instance = actor.instance
 
         boss = MonsterGenerator.create_boss(boss_id, active_boss_instance.level_index, self.config_manager)
         if not boss:
@@ -211,113 +185,89 @@ class BattleManager:
 
         # 检查是否满足境界压制条件（玩家境界比Boss高一个大境界，这里简化为高3个小境界）
         level_advantage = player.level_index - active_boss_instance.level_index
-        instant_kill = False
-        
-        # 如果玩家境界比Boss高至少3个境界，则有30%概率直接击杀
-        if level_advantage >= 2:
-            import random
-            if random.random() < 0.3:  # 30%概率
-                instant_kill = True
-
-        if instant_kill:
-            # 境界压制直接击杀，不需要进行战斗循环
-            active_boss_instance.current_hp = 0  # 直接设置Boss血量为0
-            await self.db.update_active_boss_hp(boss_id, 0)  # 立即更新Boss血量为0
-            
-            final_report = [f"你向【{boss.name}】发起了挑战！", "【境界压制】你凭借高深的修为直接碾压了Boss！\n"]
-            player.hp = player.hp  # 玩家血量不变
-            await self.db.update_player(player)
-            
-            # 记录玩家造成的伤害（用于奖励分配）
-            await self.db.record_boss_damage(boss_id, player.user_id, player_name, active_boss_instance.max_hp)
-            final_report.append(f"\n你本次共对Boss贡献了 {active_boss_instance.max_hp} 点伤害！")
-            
-            # 结束战斗并分配奖励
-            final_report.append(f"\n**惊天动地！【{boss.name}】在众位道友的合力之下倒下了！**")
-            final_report.append(await self._end_battle(boss, active_boss_instance))
-            
-            return "\n".join(final_report)
-
         p_clone = player.clone()
         p_stats = p_clone.get_combat_stats(self.config_manager) # 获取最终战斗属性
-        boss_hp = active_boss_instance.current_hp
-
-        total_damage_dealt = 0
-        total_damage_taken = 0
-        turn = 0
-        max_turns = 50
-
-        while p_clone.hp > 0 and boss_hp > 0 and turn < max_turns:
-            turn += 1
-            damage_to_boss = max(1, p_stats['attack'] - boss.defense)
-            damage_to_boss = min(damage_to_boss, boss_hp)
-            boss_hp -= damage_to_boss
-            total_damage_dealt += damage_to_boss
 
-            if boss_hp <= 0:
-                break
-
-            damage_to_player = max(1, boss.attack - p_stats['defense'])
-            p_clone.hp -= damage_to_player
-            total_damage_taken += damage_to_player
-
-        # 确保玩家血量不低于1
-        if p_clone.hp < 1:
-            p_clone.hp = 1
+        def strike(boss_hp: int):
+            """在Boss执行者中按攻击顺序结算，boss_hp 为此刻的权威剩余气血"""
+            # 如果玩家境界比Boss高至少3个境界，则有30%概率直接击杀
+            if level_advantage >= 2 and random.random() < 0.3:
+                return boss_hp, active_boss_instance.max_hp, None
+            outcome = resolve_duel(
+                p_clone.hp, boss_hp,
+                max(1, p_stats['attack'] - boss.defense), max(1, boss.attack - p_stats['defense']),
+                BOSS_DUEL_RULES
+            )
+            # Boss的最后一击不计溢出伤害
+            dealt = min(outcome.damage_dealt, max(boss_hp, 0))
+            return dealt, dealt, outcome
+
+        hit = await actor.attack(player.user_id, player_name, strike)
+        if hit is None:
+            return f"来晚了一步，ID为【{boss_id}】的Boss已被击败或已消失！"
 
-        combat_summary = [f"你向【{boss.name}】发起了挑战！", "……激战过后……"]
-        if p_clone.hp <= 1 and boss_hp > 0:
-            combat_summary.append("✗ 你不敌妖兽，力竭倒下！")
+        if hit.payload is None:
+            # 境界压制直接击杀，不需要进行战斗
+            final_report = [f"你向【{boss.name}】发起了挑战！", "【境界压制】你凭借高深的修为直接碾压了Boss！\n"]
+            await self.db.update_player(player)  # 玩家血量不变
+            final_report.append(f"\n你本次共对Boss贡献了 {hit.credited_damage} 点伤害！")
         else:
-            combat_summary.append("✓ 你坚持到了最后！")
-
-        combat_summary.append(f"- 战斗历时: {turn}回合")
-        combat_summary.append(f"- 总计伤害: {total_damage_dealt}点")
-        combat_summary.append(f"- 承受伤害: {total_damage_taken}点")
-
-        final_report = ["\n".join(combat_summary)]
-        player.hp = p_clone.hp
-        await self.db.update_player(player)
-        await self.db.update_active_boss_hp(boss_id, boss_hp)
-        if total_damage_dealt > 0:
-            await self.db.record_boss_damage(boss_id, player.user_id, player_name, total_damage_dealt)
-            final_report.append(f"\n你本次共对Boss贡献了 {total_damage_dealt} 点伤害！")
+            outcome = hit.payload
+            total_damage_dealt = hit.hp_damage
+            p_clone.hp = outcome.attacker_hp
+
+            # 确保玩家血量不低于1
+            if p_clone.hp < 1:
+                p_clone.hp = 1
+
+            combat_summary = [f"你向【{boss.name}】发起了挑战！", "……激战过后……"]
+            if p_clone.hp <= 1 and hit.hp_after > 0:
+                combat_summary.append("✗ 你不敌妖兽，力竭倒下！")
+            else:
+                combat_summary.append("✓ 你坚持到了最后！")
+
+            combat_summary.append(f"- 战斗历时: {outcome.turns}回合")
+            combat_summary.append(f"- 总计伤害: {total_damage_dealt}点")
+            combat_summary.append(f"- 承受伤害: {outcome.damage_taken}点")
+
+            final_report = ["\n".join(combat_summary)]
+            player.hp = p_clone.hp
+            await self.db.update_player(player)
+            if total_damage_dealt > 0:
+                final_report.append(f"\n你本次共对Boss贡献了 {total_damage_dealt} 点伤害！")
 
-        if boss_hp <= 0:
+        if hit.killed:
+            # 只有击杀的那一次攻击会走到这里：先写入全部伤害并停止执行者，再结算奖励
+            await self.arena.discard(boss_id)
             final_report.append(f"\n**惊天动地！【{boss.name}】在众位道友的合力之下倒下了！**")
             final_report.append(await self._end_battle(boss, active_boss_instance))
 
         return "\n".join(final_report)
 
     async def _end_battle(self, boss_template: Boss, boss_instance: ActiveWorldBoss) -> str:
-        participants = await self.db.get_boss_participants(boss_instance.boss_id)
-        if not participants:
-            await self.db.clear_boss_data(boss_instance.boss_id)
-            return "但似乎无人对此Boss造成伤害，奖励无人获得。"
-        total_damage_dealt = sum(p['total_damage'] for p in participants) or 1
-        reward_report = ["\n--- 战利品结算 ---"]
-        updated_players = []
-        for p_data in participants:
-            player_obj = await self.db.get_player_by_id(p_data['user_id'])
-            if player_obj:
-                damage_contribution = p_data['total_damage'] / total_damage_dealt
-                gold_reward = int(boss_template.rewards['gold'] * damage_contribution)
-                exp_reward = int(boss_template.rewards['experience'] * damage_contribution)
-                player_obj.gold += gold_reward
-                player_obj.experience += exp_reward
-                updated_players.append(player_obj)
-                reward_report.append(f"道友 {p_data['user_name']} 获得灵石 {gold_reward}，修为 {exp_reward}！")
-        if updated_players:
-            await self.db.update_players_in_transaction(updated_players)
-        
-        # Boss被击败，设置24小时冷却
+        # 按伤害占比在一条语句中为所有参与者发放奖励，耗时与参与人数无关
+        winners = await self.db.award_boss_rewards(
+            boss_instance.boss_id, boss_template.rewards['gold'], boss_template.rewards['experience']
+        )
+        if winners:
+            reward_report = ["\n--- 战利品结算 ---"]
+            for winner in winners:
+                reward_report.append(f"道友 {winner['user_name']} 获得灵石 {winner['gold_reward']}，修为 {winner['exp_reward']}！")
+        else:
+            # 例如执行者最后一次写库失败导致没有伤害记录；无论是否发放奖励，Boss都要进入冷却并安排重生
+            reward_report = ["但似乎无人对此Boss造成伤害，奖励无人获得。"]
+
+        # Boss被击败，按模板配置的冷却时间重生
+        cooldown = format_cooldown(boss_template.cooldown_minutes)
         defeated_at = time.time()
-        respawn_at = defeated_at + 24 * 3600  # 24小时后重生
+        respawn_at = defeated_at + boss_template.cooldown_minutes * 60
         await self.db.set_boss_cooldown(boss_instance.boss_id, defeated_at, respawn_at)
-        logger.info(f"世界Boss {boss_template.name} (ID: {boss_instance.boss_id}) 已被击败，冷却时间24小时")
-        
+        logger.info(f"世界Boss {boss_template.name} (ID: {boss_instance.boss_id}) 已被击败，冷却时间{cooldown}")
+
         await self.db.clear_boss_data(boss_instance.boss_id)
-        reward_report.append(f"\n💀 {boss_template.name} 已被击败，将于24小时后重生！")
+        self.revision.bump()
+        self.scheduler.schedule(boss_instance.boss_id, respawn_at)
+        reward_report.append(f"\n💀 {boss_template.name} 已被击败，将于{cooldown}后重生！")
         return "\n".join(reward_report)
 
     def player_vs_monster(self, player: Player, monster) -> Tuple[bool, List[str], Player]:
@@ -325,22 +275,16 @@ class BattleManager:
         p_stats = p_clone.get_combat_stats(self.config_manager) # 获取最终战斗属性
         monster_hp = monster.hp
 
-        total_damage_dealt = 0
-        total_damage_taken = 0
-        turn = 0
-
-        while p_clone.hp > 1 and monster_hp > 0:
-            turn += 1
-            damage_to_monster = max(1, p_stats['attack'] - monster.defense)
-            monster_hp -= damage_to_monster
-            total_damage_dealt += damage_to_monster
-
-            if monster_hp <= 0:
-                break
-
-            damage_to_player = max(1, monster.attack - p_stats['defense'])
-            p_clone.hp -= damage_to_player
-            total_damage_taken += damage_to_player
+        outcome = resolve_duel(
+            p_clone.hp, monster_hp,
+            max(1, p_stats['attack'] - monster.defense), max(1, monster.attack - p_stats['defense']),
+            MONSTER_DUEL_RULES
+        )
+        turn = outcome.turns
+        total_damage_dealt = outcome.damage_dealt
+        total_damage_taken = outcome.damage_taken
+        monster_hp = outcome.defender_hp
+        p_clone.hp = outcome.attacker_hp
 
         if p_clone.hp < 1:
             p_clone.hp = 1
@@ -369,26 +313,17 @@ class BattleManager:
         p1_display = attacker_name or attacker.user_id[-4:]
         p2_display = defender_name or defender.user_id[-4:]
 
-        p1_damage_dealt = 0
-        p2_damage_dealt = 0
-        turn = 0
-        max_turns = 30
-
-        while p1.hp > 1 and p2.hp > 1 and turn < max_turns:
-            turn += 1
-            damage_to_p2 = max(1, p1_stats['attack'] - p2_stats['defense'])
-            p2.hp -= damage_to_p2
-            p1_damage_dealt += damage_to_p2
-            if p2.hp <= 1:
-                p2.hp = 1
-                break
-
-            damage_to_p1 = max(1, p2_stats['attack'] - p1_stats['defense'])
-            p1.hp -= damage_to_p1
-            p2_damage_dealt += damage_to_p1
-            if p1.hp <= 1:
-                p1.hp = 1
-                break
+        outcome = resolve_duel(
+            p1.hp, p2.hp,
+            max(1, p1_stats['attack'] - p2_stats['defense']), max(1, p2_stats['attack'] - p1_stats['defense']),
+            PVP_DUEL_RULES
+        )
+        p1_damage_dealt = outcome.damage_dealt
+        p2_damage_dealt = outcome.damage_taken
+        if outcome.turns:
+            # 倒下的一方气血保留为1
+            p1.hp = 1 if outcome.attacker_down else outcome.attacker_hp
+            p2.hp = 1 if outcome.defender_down else outcome.defender_hp
 
         combat_summary = [f"⚔️【切磋】{p1_display} vs {p2_display}", "……一番激斗……"]
 
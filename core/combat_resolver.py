@@ -0,0 +1,113 @@
+# core/combat_resolver.py
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+@dataclass(frozen=True)
+class DuelRules:
+    """
+    一场回合制对决的规则：先手方每回合先出手，后手方未倒下时反击。
+    一方生命值降到 floor 及以下即倒下；max_turns 为 None 表示不限回合。
+    """
+
+    attacker_floor: int = 0
+    defender_floor: int = 0
+    max_turns: Optional[int] = None
+
+@dataclass
+class DuelState:
+    """逐回合推演时的可变状态，供 TurnEffect 修改"""
+
+    turn: int
+    attacker_hp: int
+    defender_hp: int
+    attacker_damage: int
+    defender_damage: int
+
+class TurnEffect:
+    """
+    逐回合效果的扩展点（如流血、护盾、蓄力）。
+    on_turn 在每回合双方出手前调用，可修改生命值与本回合伤害。
+    只要存在任何效果，结算就退回逐回合推演。
+    """
+
+    def on_turn(self, state: DuelState) -> None:
+        pass
+
+@dataclass(frozen=True)
+class DuelOutcome:
+    turns: int
+    attacker_hits: int    # 先手方出手次数
+    defender_hits: int    # 后手方出手次数
+    damage_dealt: int     # 先手方造成的总伤害（含溢出）
+    damage_taken: int     # 先手方承受的总伤害
+    attacker_hp: int      # 未作任何钳制的剩余生命
+    defender_hp: int
+    defender_down: bool = False
+    attacker_down: bool = False
+
+
+def _hits_to_floor(hp: int, floor: int, damage: int) -> int:
+    """把生命值打到 floor 及以下所需的出手次数"""
+    return -(-(hp - floor) // damage)
+
+def resolve_duel(attacker_hp: int, defender_hp: int, attacker_damage: int, defender_damage: int,
+                 rules: DuelRules, effects: Sequence[TurnEffect] = ()) -> DuelOutcome:
+    """
+    结算一场每回合伤害恒定的对决，O(1) 求出回合数、双方伤害与胜负。
+    伤害须至少为1（调用方已按 max(1, 攻击-防御) 计算）。
+    """
+    if effects:
+        return _simulate(attacker_hp, defender_hp, attacker_damage, defender_damage, rules, effects)
+
+    if attacker_hp <= rules.attacker_floor or defender_hp <= rules.defender_floor:
+        return DuelOutcome(0, 0, 0, 0, 0, attacker_hp, defender_hp,
+                           defender_down=defender_hp <= rules.defender_floor,
+                           attacker_down=attacker_hp <= rules.attacker_floor)
+
+    # 后手方在第 defender_falls 回合被先手方击倒；先手方在承受第 attacker_falls 次反击后倒下
+    defender_falls = _hits_to_floor(defender_hp, rules.defender_floor, attacker_damage)
+    attacker_falls = _hits_to_floor(attacker_hp, rules.attacker_floor, defender_damage)
+    cap = rules.max_turns
+
+    if defender_falls <= attacker_falls and (cap is None or defender_falls <= cap):
+        turns, counter_hits = defender_falls, defender_falls - 1
+    elif cap is None or attacker_falls <= cap:
+        turns, counter_hits = attacker_falls, attacker_falls
+    else:
+        turns, counter_hits = cap, cap
+
+    dealt = turns * attacker_damage
+    taken = counter_hits * defender_damage
+    return DuelOutcome(
+        turns, turns, counter_hits, dealt, taken,
+        attacker_hp - taken, defender_hp - dealt,
+        defender_down=defender_hp - dealt <= rules.defender_floor,
+        attacker_down=attacker_hp - taken <= rules.attacker_floor,
+    )
+
+def _simulate(attacker_hp: int, defender_hp: int, attacker_damage: int, defender_damage: int,
+              rules: DuelRules, effects: Sequence[TurnEffect]) -> DuelOutcome:
+    state = DuelState(0, attacker_hp, defender_hp, attacker_damage, defender_damage)
+    hits = counter_hits = dealt = taken = 0
+    while (state.attacker_hp > rules.attacker_floor and state.defender_hp > rules.defender_floor
+           and (rules.max_turns is None or state.turn < rules.max_turns)):
+        state.turn += 1
+        state.attacker_damage, state.defender_damage = attacker_damage, defender_damage
+        for effect in effects:
+            effect.on_turn(state)
+
+        state.defender_hp -= state.attacker_damage
+        dealt += state.attacker_damage
+        hits += 1
+        if state.defender_hp <= rules.defender_floor:
+            break
+        state.attacker_hp -= state.defender_damage
+        taken += state.defender_damage
+        counter_hits += 1
+
+    return DuelOutcome(
+        state.turn, hits, counter_hits, dealt, taken, state.attacker_hp, state.defender_hp,
+        defender_down=state.defender_hp <= rules.defender_floor,
+        attacker_down=state.attacker_hp <= rules.attacker_floor,
+    )
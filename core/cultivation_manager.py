@@ -96,21 +96,16 @@ class CultivationManager:
 
     def _calculate_base_stats(self, level_index: int) -> Dict[str, int]:
         """从境界配置中读取基础属性"""
-        if 0 <= level_index < len(self.config_manager.level_data):
-            level_config = self.config_manager.level_data[level_index]
-            base_hp = level_config.get("base_hp", 100 + level_index * 50)
-            base_attack = level_config.get("base_attack", 10 + level_index * 8)
-            base_defense = level_config.get("base_defense", 5 + level_index * 4)
-            base_spiritual_power = level_config.get("base_spiritual_power", 50 + level_index * 20)
-            base_mental_power = level_config.get("base_mental_power", 50 + level_index * 20)
-            
+        levels = self.config_manager.levels
+        if 0 <= level_index < len(levels):
+            base_hp = levels.base_hp[level_index]
             return {
                 "hp": base_hp,
                 "max_hp": base_hp,
-                "attack": base_attack,
-                "defense": base_defense,
-                "spiritual_power": base_spiritual_power,
-                "mental_power": base_mental_power
+                "attack": levels.base_attack[level_index],
+                "defense": levels.base_defense[level_index],
+                "spiritual_power": levels.base_spiritual_power[level_index],
+                "mental_power": levels.base_mental_power[level_index]
             }
         else:
             # 回退逻辑，使用默认计算
@@ -126,49 +121,49 @@ class CultivationManager:
 
     def _get_random_spiritual_root(self) -> str:
         """基于权重随机抽取灵根"""
-        weights_config = self.config.get("SPIRIT_ROOT_WEIGHTS", {})
+        weights = self.config_manager.settings.spirit_root_weights
         
         # 构建权重池
         weight_pool = []
         
         # 伪灵根
-        pseudo_weight = weights_config.get("PSEUDO_ROOT_WEIGHT", 1)
+        pseudo_weight = weights.pseudo_root_weight
         weight_pool.extend([("PSEUDO", root) for root in self.root_pools["PSEUDO"]] * pseudo_weight)
         
         # 四灵根
-        quad_weight = weights_config.get("QUAD_ROOT_WEIGHT", 10)
+        quad_weight = weights.quad_root_weight
         weight_pool.extend([("QUAD", root) for root in self.root_pools["QUAD"]] * quad_weight)
         
         # 三灵根
-        tri_weight = weights_config.get("TRI_ROOT_WEIGHT", 30)
+        tri_weight = weights.tri_root_weight
         weight_pool.extend([("TRI", root) for root in self.root_pools["TRI"]] * tri_weight)
         
         # 双灵根
-        dual_weight = weights_config.get("DUAL_ROOT_WEIGHT", 100)
+        dual_weight = weights.dual_root_weight
         weight_pool.extend([("DUAL", root) for root in self.root_pools["DUAL"]] * dual_weight)
         
         # 五行单灵根
-        wuxing_weight = weights_config.get("WUXING_ROOT_WEIGHT", 200)
+        wuxing_weight = weights.wuxing_root_weight
         weight_pool.extend([("WUXING", root) for root in self.root_pools["WUXING"]] * wuxing_weight)
         
         # 变异灵根
-        variant_weight = weights_config.get("VARIANT_ROOT_WEIGHT", 20)
+        variant_weight = weights.variant_root_weight
         weight_pool.extend([("VARIANT", root) for root in self.root_pools["VARIANT"]] * variant_weight)
         
         # 天灵根
-        heavenly_weight = weights_config.get("HEAVENLY_ROOT_WEIGHT", 5)
+        heavenly_weight = weights.heavenly_root_weight
         weight_pool.extend([("HEAVENLY", root) for root in self.root_pools["HEAVENLY"]] * heavenly_weight)
         
         # 传说级
-        legendary_weight = weights_config.get("LEGENDARY_ROOT_WEIGHT", 2)
+        legendary_weight = weights.legendary_root_weight
         weight_pool.extend([("LEGENDARY", root) for root in self.root_pools["LEGENDARY"]] * legendary_weight)
         
         # 神话级
-        mythic_weight = weights_config.get("MYTHIC_ROOT_WEIGHT", 1)
+        mythic_weight = weights.mythic_root_weight
         weight_pool.extend([("MYTHIC", root) for root in self.root_pools["MYTHIC"]] * mythic_weight)
         
         # 禁忌级体质
-        divine_weight = weights_config.get("DIVINE_BODY_WEIGHT", 1)
+        divine_weight = weights.divine_body_weight
         weight_pool.extend([("DIVINE_BODY", root) for root in self.root_pools["DIVINE_BODY"]] * divine_weight)
         
         if not weight_pool:
@@ -257,7 +252,7 @@ class CultivationManager:
         return Player(
             user_id=user_id,
             spiritual_root=f"{root}灵根",
-            gold=self.config["VALUES"]["INITIAL_GOLD"],
+            gold=self.config_manager.settings.values.initial_gold,
             **initial_stats
         )
 
@@ -266,7 +261,8 @@ class CultivationManager:
         if now - player.last_check_in < 22 * 60 * 60:
             return False, "道友，今日已经签到过了，请明日再来。", player
 
-        reward = random.randint(self.config["VALUES"]["CHECK_IN_REWARD_MIN"], self.config["VALUES"]["CHECK_IN_REWARD_MAX"])
+        values = self.config_manager.settings.values
+        reward = random.randint(values.check_in_reward_min, values.check_in_reward_max)
         p_clone = player.clone()
         p_clone.gold += reward
         p_clone.last_check_in = now
@@ -302,14 +298,15 @@ class CultivationManager:
 
         player_root_name = p_clone.spiritual_root.replace("灵根", "")
         config_key = self.root_to_config_key.get(player_root_name, "WUXING_ROOT_SPEED")
-        speed_multiplier = self.config["SPIRIT_ROOT_SPEEDS"].get(config_key, 1.0)
+        settings = self.config_manager.settings
+        speed_multiplier = settings.spirit_root_speeds.speed_for(config_key)
         
-        base_exp_per_min = self.config["VALUES"]["BASE_EXP_PER_MINUTE"]
+        base_exp_per_min = settings.values.base_exp_per_minute
         exp_gained = int(duration_minutes * base_exp_per_min * speed_multiplier)
         p_clone.experience += exp_gained
 
         # 计算回血
-        hp_recovery_ratio = self.config["VALUES"].get("CULTIVATION_HP_RECOVERY_RATIO", 0.0)
+        hp_recovery_ratio = settings.values.cultivation_hp_recovery_ratio
         hp_recovered = int(exp_gained * hp_recovery_ratio)
         hp_before = p_clone.hp
         p_clone.hp = min(p_clone.max_hp, p_clone.hp + hp_recovered)
@@ -332,15 +329,16 @@ class CultivationManager:
         current_level_index = player.level_index
         p_clone = player.clone()
 
-        if current_level_index >= len(self.config_manager.level_data) - 1:
+        levels = self.config_manager.levels
+        if current_level_index >= len(levels) - 1:
             return False, "道友已臻化境，达到当前世界的顶峰，无法再进行突破！", p_clone
 
-        next_level_info = self.config_manager.level_data[current_level_index + 1]
-        exp_needed = next_level_info['exp_needed']
-        success_rate = next_level_info['success_rate']
+        next_level_index = current_level_index + 1
+        exp_needed = levels.exp_needed[next_level_index]
+        success_rate = levels.success_rate[next_level_index]
 
         if p_clone.experience < exp_needed:
-            msg = (f"突破失败！\n目标境界：{next_level_info['level_name']}\n"
+            msg = (f"突破失败！\n目标境界：{levels.names[next_level_index]}\n"
                    f"所需修为：{exp_needed} (当前拥有 {p_clone.experience})")
             return False, msg, p_clone
 
@@ -375,7 +373,7 @@ class CultivationManager:
                    f"✨ 灵力：{p_clone.spiritual_power} | 🧠 精神力：{p_clone.mental_power}\n"
                    f"剩余修为: {p_clone.experience}")
         else:
-            punishment = int(exp_needed * self.config["VALUES"]["BREAKTHROUGH_FAIL_PUNISHMENT_RATIO"])
+            punishment = int(exp_needed * self.config_manager.settings.values.breakthrough_fail_punishment_ratio)
             p_clone.experience -= punishment
             
             # 清除突破加成buff（失败也会消耗）
@@ -394,7 +392,7 @@ class CultivationManager:
         return True, msg, p_clone
     
     def handle_reroll_spirit_root(self, player: Player) -> Tuple[bool, str, Player]:
-        cost = self.config["VALUES"].get("REROLL_SPIRIT_ROOT_COST", 10000)
+        cost = self.config_manager.settings.values.reroll_spirit_root_cost
         
         if player.gold < cost:
             return False, f"重入仙途乃逆天之举，需消耗 {cost} 灵石，道友的家底还不够。", player
@@ -13,14 +13,14 @@ class RealmGenerator:
     """秘境生成器"""
     
     @staticmethod
-    def generate_for_player(player: Player, config: AstrBotConfig, config_manager: ConfigManager) -> Optional[RealmInstance]:
+    def generate_for_player(player: Player, config_manager: ConfigManager) -> Optional[RealmInstance]:
         level_index = player.level_index
+        rules = config_manager.settings.realm_rules
 
-        total_floors = config["REALM_RULES"]["REALM_BASE_FLOORS"] + \
-                       (level_index // config["REALM_RULES"]["REALM_FLOORS_PER_LEVEL_DIVISOR"])
+        total_floors = rules.realm_base_floors + (level_index // rules.realm_floors_per_level_divisor)
 
-        monster_pool = list(config_manager.monster_data.keys())
-        boss_pool = list(config_manager.boss_data.keys())
+        monster_pool = list(config_manager.monsters.keys())
+        boss_pool = list(config_manager.bosses.keys())
 
         if not monster_pool or not boss_pool:
             logger.error("秘境生成失败：怪物池或Boss池为空，请检查 monsters.json 和 bosses.json。")
@@ -29,7 +29,7 @@ class RealmGenerator:
         floor_events: List[FloorEvent] = []
 
         for _ in range(total_floors - 1):
-            if random.random() < config["REALM_RULES"]["REALM_MONSTER_CHANCE"]:
+            if random.random() < rules.realm_monster_chance:
                 monster_id = random.choice(monster_pool)
                 floor_events.append(FloorEvent(type="monster", data={"id": monster_id}))
             else:
@@ -66,7 +66,7 @@ class RealmManager:
         if p.gold < cost:
             return False, f"本次历练需要 {cost} 灵石作为盘缠，你的灵石不足。", p
 
-        realm_instance = RealmGenerator.generate_for_player(p, self.config, self.config_manager)
+        realm_instance = RealmGenerator.generate_for_player(p, self.config_manager)
         if not realm_instance:
              return False, "天机混乱，秘境生成失败，请稍后再试。", p
 
@@ -140,7 +140,7 @@ class RealmManager:
         monster_template_id = event.data["id"]
         
         if event.type == "boss":
-            scaling_factor = self.config["REALM_RULES"].get("REALM_BOSS_SCALING_FACTOR", 1.0)
+            scaling_factor = self.config_manager.settings.realm_rules.realm_boss_scaling_factor
             enemy = MonsterGenerator.create_boss(monster_template_id, player_level_index, self.config_manager, scaling_factor=scaling_factor)
         else:
             enemy = MonsterGenerator.create_monster(monster_template_id, player_level_index, self.config_manager)
@@ -156,7 +156,7 @@ class RealmManager:
             rewards = enemy.rewards
             p.gold += int(rewards.get('gold', 0))
             p.experience += int(rewards.get('experience', 0))
-            gained_items = rewards.get('items', {})
+            gained_items = MonsterGenerator.roll_loot(enemy)
 
             if event.type == "boss":
                  combat_log.append(f"\n成功击败最终头目！")
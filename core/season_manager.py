@@ -0,0 +1,70 @@
+# core/season_manager.py
+
+import asyncio
+import time
+from typing import Tuple, Optional
+
+from astrbot.api import AstrBotConfig, logger
+from ..config_manager import ConfigManager
+from ..data import DataBase
+from .cultivation_manager import CultivationManager
+
+RESET_CHUNK_SIZE = 500
+
+class SeasonManager:
+    """赛季重置流水线：先归档最终排名，再分块重置全服玩家，重启后可从断点继续"""
+
+    def __init__(self, db: DataBase, config: AstrBotConfig, config_manager: ConfigManager):
+        self.db = db
+        self.config = config
+        self.config_manager = config_manager
+        self.cultivation_manager = CultivationManager(config, config_manager)
+        # 同一时间只允许一次赛季重置；在第一次 await 之前即已持有，并发的两次调用不会同时通过检查
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _reset_values(self) -> dict:
+        values = self.cultivation_manager._calculate_base_stats(0)
+        values["gold"] = self.config_manager.settings.values.initial_gold
+        return values
+
+    async def start_new_season(self) -> Tuple[bool, str]:
+        if self._lock.locked():
+            return False, "赛季重置正在进行中，请稍候。"
+        async with self._lock:
+            pending = await self.db.get_pending_season_reset()
+            if pending:
+                return False, f"第 {pending['season_id']} 赛季的重置尚未完成，请先继续完成该次重置。"
+
+            season_id = await self.db.get_latest_season_id() + 1
+            archived = await self.db.archive_season(season_id, time.time())
+            logger.info(f"第 {season_id} 赛季排名已归档，共 {archived} 名玩家，开始重置。")
+            processed = await self._run_reset(season_id)
+        return True, f"第 {season_id} 赛季已结算！共归档 {archived} 名道友的排名，已重置 {processed} 名道友。"
+
+    async def resume_pending(self) -> Optional[int]:
+        """继续上次中断的赛季重置，没有待完成的重置时返回None"""
+        if self._lock.locked():
+            return None
+        async with self._lock:
+            pending = await self.db.get_pending_season_reset()
+            if not pending:
+                return None
+            logger.info(f"检测到第 {pending['season_id']} 赛季重置未完成（已处理 {pending['processed']} 名），继续执行...")
+            return await self._run_reset(pending["season_id"], pending["cursor"], pending["processed"])
+
+    async def _run_reset(self, season_id: int, cursor: str = "", processed: int = 0) -> int:
+        """分块重置全服玩家，调用方须持有 self._lock"""
+        reset_values = self._reset_values()
+        while True:
+            count, cursor = await self.db.reset_season_chunk(season_id, cursor, RESET_CHUNK_SIZE, reset_values)
+            if count == 0:
+                break
+            processed += count
+            # 进度已随分块一并提交，每块之间让出事件循环，避免长时间占用数据库
+            await asyncio.sleep(0)
+        logger.info(f"第 {season_id} 赛季重置完成，共重置 {processed} 名玩家。")
+        return processed
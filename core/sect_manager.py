@@ -5,11 +5,13 @@ from typing import Tuple, Optional
 from astrbot.api import AstrBotConfig
 from ..models import Player
 from ..data import DataBase
+from ..config_manager import ConfigManager
 
 class SectManager:
-    def __init__(self, db: DataBase, config: AstrBotConfig):
+    def __init__(self, db: DataBase, config: AstrBotConfig, config_manager: ConfigManager):
         self.db = db
         self.config = config
+        self.config_manager = config_manager
 
     async def handle_create_sect(self, player: Player, sect_name: str) -> Tuple[bool, str, Optional[Player]]:
         if player.sect_id is not None:
@@ -18,7 +20,7 @@ class SectManager:
         if await self.db.get_sect_by_name(sect_name):
             return False, f"「{sect_name}」之名已响彻修仙界，请道友另择佳名。", None
 
-        cost = self.config["VALUES"]["CREATE_SECT_COST"]
+        cost = self.config_manager.settings.values.create_sect_cost
         if player.gold < cost:
             return False, f"开宗立派非同小可，需消耗 {cost} 灵石，道友的家底还不够。", None
 
@@ -2,5 +2,6 @@
 
 from .data_manager import DataBase
 from .migration import MigrationManager
+from .profiler import SqlProfiler, SlowCommandLog
 
-__all__ = ["DataBase", "MigrationManager"]
\ No newline at end of file
+__all__ = ["DataBase", "MigrationManager", "SqlProfiler", "SlowCommandLog"]
\ No newline at end of file
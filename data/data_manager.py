@@ -1,66 +1,203 @@
 # data/data_manager.py
 
 import aiosqlite
+import asyncio
+import time
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from dataclasses import fields
 
 from astrbot.api import logger
 from astrbot.api.star import StarTools
 
 from ..config_manager import ConfigManager
-from ..models import Player, PlayerEffect, ActiveWorldBoss
+from ..models import Player, PlayerEffect, PlayerFilter, ActiveWorldBoss
+from .profiler import SqlProfiler, ProfiledConnection
+from .unit_of_work import UnitOfWork, current_unit_of_work
+
+# 当前上下文正持有写锁的数据库，用于让嵌套的写操作并入外层事务
+_transaction_owner: ContextVar[Optional["DataBase"]] = ContextVar("xiuxian_transaction_owner", default=None)
 
 class DataBase:
     """数据库管理器，封装所有数据库操作"""
     
-    def __init__(self, db_file_name: str):
+    def __init__(self, db_file_name: str, profiler: Optional[SqlProfiler] = None,
+                 in_memory: bool = False, checkpoint_interval: int = 5):
         data_dir = StarTools.get_data_dir("xiuxian")
         data_dir.mkdir(parents=True, exist_ok=True)
         self.db_path = data_dir / db_file_name
         self.conn: Optional[aiosqlite.Connection] = None
+        self.profiler = profiler or SqlProfiler()
+        # 内存模式：主库运行在 :memory: 中，定期通过 backup API 写回磁盘文件
+        self.in_memory = in_memory
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self._raw_conn: Optional[aiosqlite.Connection] = None
+        self._checkpoint_task: Optional[asyncio.Task] = None
+        self._checkpointed_changes = 0
+        # 指令、Boss执行者、重生调度与内存模式写回共用同一个连接，写操作经此锁串行
+        self._write_lock = asyncio.Lock()
 
     async def connect(self):
         if self.conn is None:
-            self.conn = await aiosqlite.connect(self.db_path)
+            if self.in_memory:
+                self._raw_conn = await aiosqlite.connect(":memory:")
+                if self.db_path.exists():
+                    async with aiosqlite.connect(self.db_path) as disk_conn:
+                        await disk_conn.backup(self._raw_conn)
+                    logger.info(f"内存模式：已从 {self.db_path} 载入数据。")
+                self._checkpointed_changes = self._raw_conn.total_changes
+                self._checkpoint_task = asyncio.create_task(self._checkpoint_loop())
+            else:
+                self._raw_conn = await aiosqlite.connect(self.db_path)
+            self.conn = self._raw_conn
             self.conn.row_factory = aiosqlite.Row
-            logger.info(f"数据库连接已创建: {self.db_path}")
+            if self.profiler.active:
+                self.conn = ProfiledConnection(self.conn, self.profiler)
+                logger.info("SQL分析器已启用，所有语句将按指令归集统计。")
+            if self.in_memory:
+                logger.info(f"数据库以内存模式运行，每 {self.checkpoint_interval} 秒写回: {self.db_path}")
+            else:
+                logger.info(f"数据库连接已创建: {self.db_path}")
 
     async def close(self):
         if self.conn:
+            if self._checkpoint_task:
+                self._checkpoint_task.cancel()
+                try:
+                    await self._checkpoint_task
+                except asyncio.CancelledError:
+                    pass
+                self._checkpoint_task = None
+            if self.in_memory:
+                # 写锁保证进行中的事务先结束，卸载时不会因此跳过最后一次写回
+                await self.checkpoint()
             await self.conn.close()
             self.conn = None
+            self._raw_conn = None
             logger.info("数据库连接已关闭。")
 
+    async def checkpoint(self) -> bool:
+        """内存模式下将内存库完整备份到磁盘文件；自上次写回后没有变更时跳过"""
+        if not self.in_memory or self._raw_conn is None:
+            return False
+        # 持有写锁完成检查与备份，期间不会有指令开启事务，备份中不会混入未提交的数据
+        async with self._write_lock:
+            if self._raw_conn.in_transaction:
+                # 只有启动时的数据库迁移不经写锁，迁移提交前跳过本次写回
+                return False
+            changes = self._raw_conn.total_changes
+            if changes == self._checkpointed_changes and self.db_path.exists():
+                return False
+            try:
+                async with aiosqlite.connect(self.db_path) as disk_conn:
+                    await self._raw_conn.backup(disk_conn)
+            except (aiosqlite.Error, OSError) as e:
+                logger.error(f"内存数据库写回磁盘失败: {e}")
+                return False
+            self._checkpointed_changes = changes
+            return True
+
+    async def _checkpoint_loop(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                logger.error(f"内存数据库定期写回出错，将在下个周期重试: {e}")
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        独占写锁并开启显式事务，正常退出时提交、抛出异常时回滚。
+        所有写操作都须经由此处：共享连接上一方的 BEGIN 会撞上另一方未提交的事务，
+        提交或回滚也会波及对方的语句。同一上下文内嵌套调用时并入外层事务。
+        """
+        if _transaction_owner.get() is self:
+            yield self.conn
+            return
+        async with self._write_lock:
+            token = _transaction_owner.set(self)
+            try:
+                await self.conn.execute("BEGIN")
+                try:
+                    yield self.conn
+                except BaseException:
+                    await self.conn.rollback()
+                    raise
+                await self.conn.commit()
+            finally:
+                _transaction_owner.reset(token)
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        """在当前上下文中开启工作单元，退出时写入所有待提交的玩家更新"""
+        if current_unit_of_work.get() is not None:
+            yield current_unit_of_work.get()
+            return
+
+        uow = UnitOfWork()
+        token = current_unit_of_work.set(uow)
+        try:
+            yield uow
+        finally:
+            try:
+                await self.flush()
+            finally:
+                try:
+                    current_unit_of_work.reset(token)
+                except ValueError:
+                    current_unit_of_work.set(None)
+
+    async def flush(self, user_ids: Optional[List[str]] = None):
+        """将工作单元中待写入的玩家一次性落库，不指定 user_ids 时写入全部"""
+        uow = current_unit_of_work.get()
+        if uow is None:
+            return
+        players = uow.take_dirty(user_ids)
+        if players:
+            await self._write_players(players)
+
+    async def _flush_and_evict(self, user_ids: Optional[List[str]] = None):
+        """直接以SQL修改玩家数据前调用：先落库待写入的更新，再丢弃缓存，之后的读取将拿到最新数据"""
+        await self.flush(user_ids)
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.evict(user_ids)
+
     async def get_active_bosses(self) -> List[ActiveWorldBoss]:
         async with self.conn.execute("SELECT * FROM active_world_bosses") as cursor:
             rows = await cursor.fetchall()
             return [ActiveWorldBoss(**dict(row)) for row in rows]
 
     async def create_active_boss(self, boss: ActiveWorldBoss):
-        await self.conn.execute(
-            "INSERT INTO active_world_bosses (boss_id, current_hp, max_hp, spawned_at, level_index) VALUES (?, ?, ?, ?, ?)",
-            (boss.boss_id, boss.current_hp, boss.max_hp, boss.spawned_at, boss.level_index)
-        )
-        await self.conn.commit()
-
-    async def update_active_boss_hp(self, boss_id: str, new_hp: int):
-        await self.conn.execute(
-            "UPDATE active_world_bosses SET current_hp = ? WHERE boss_id = ?",
-            (new_hp, boss_id)
-        )
-        await self.conn.commit()
-
-    async def delete_active_boss(self, boss_id: str):
-        await self.conn.execute("DELETE FROM active_world_bosses WHERE boss_id = ?", (boss_id,))
-        await self.conn.commit()
-
-    async def record_boss_damage(self, boss_id: str, user_id: str, user_name: str, damage: int):
-        await self.conn.execute("""
-            INSERT INTO world_boss_participants (boss_id, user_id, user_name, total_damage) VALUES (?, ?, ?, ?)
-            ON CONFLICT(boss_id, user_id) DO UPDATE SET total_damage = total_damage + excluded.total_damage;
-        """, (boss_id, user_id, user_name, damage))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute(
+                "INSERT INTO active_world_bosses (boss_id, current_hp, max_hp, spawned_at, level_index) VALUES (?, ?, ?, ?, ?)",
+                (boss.boss_id, boss.current_hp, boss.max_hp, boss.spawned_at, boss.level_index)
+            )
+
+    async def save_boss_progress(self, boss_id: str, current_hp: int, damages: List[Tuple[str, str, int]]):
+        """在一个事务中写入Boss剩余气血并累加各玩家的伤害贡献 (user_id, user_name, damage)"""
+        try:
+            async with self.transaction():
+                await self.conn.execute(
+                    "UPDATE active_world_bosses SET current_hp = ? WHERE boss_id = ?", (current_hp, boss_id)
+                )
+                if damages:
+                    await self.conn.executemany("""
+                        INSERT INTO world_boss_participants (boss_id, user_id, user_name, total_damage) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(boss_id, user_id) DO UPDATE SET total_damage = total_damage + excluded.total_damage;
+                    """, [(boss_id, user_id, user_name, damage) for user_id, user_name, damage in damages])
+        except aiosqlite.Error as e:
+            logger.error(f"写入Boss {boss_id} 战况失败: {e}")
+            raise
+
+    async def get_active_boss(self, boss_id: str) -> Optional[ActiveWorldBoss]:
+        async with self.conn.execute("SELECT * FROM active_world_bosses WHERE boss_id = ?", (boss_id,)) as cursor:
+            row = await cursor.fetchone()
+            return ActiveWorldBoss(**dict(row)) if row else None
 
     async def get_boss_participants(self, boss_id: str) -> List[Dict[str, Any]]:
         sql = "SELECT user_id, user_name, total_damage FROM world_boss_participants WHERE boss_id = ? ORDER BY total_damage DESC"
@@ -68,27 +205,94 @@ class DataBase:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
 
+    async def get_boss_leaderboards(self, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        """一次查询取出所有Boss伤害前 limit 名的参与者，返回 {boss_id: [按伤害降序的参与者]}"""
+        sql = """
+            SELECT boss_id, user_id, user_name, total_damage FROM (
+                SELECT boss_id, user_id, user_name, total_damage,
+                       ROW_NUMBER() OVER (PARTITION BY boss_id ORDER BY total_damage DESC, user_id) AS rank
+                FROM world_boss_participants
+            ) WHERE rank <= ? ORDER BY boss_id, rank
+        """
+        leaderboards: Dict[str, List[Dict[str, Any]]] = {}
+        async with self.conn.execute(sql, (limit,)) as cursor:
+            for row in await cursor.fetchall():
+                entry = dict(row)
+                leaderboards.setdefault(entry.pop("boss_id"), []).append(entry)
+        return leaderboards
+
+    async def award_boss_rewards(self, boss_id: str, gold: int, experience: int) -> List[Dict[str, Any]]:
+        """
+        按伤害占比一次性为所有参与者发放灵石与修为，返回获奖明细（按伤害降序）。
+        取整方式与逐人计算 int(奖励 * 伤害 / 总伤害) 一致：先乘伤害再除总伤害，避免占比先舍入带来的误差。
+        统计总伤害、发放与读取明细在同一事务中完成，期间不会混入新的伤害记录。
+        """
+        share = "CAST(:{reward} * p.total_damage * 1.0 / :total AS INTEGER)"
+        gold_share, exp_share = share.format(reward="gold"), share.format(reward="experience")
+        try:
+            async with self.transaction():
+                await self._flush_and_evict()
+                async with self.conn.execute(
+                    "SELECT COALESCE(SUM(total_damage), 0) FROM world_boss_participants WHERE boss_id = ?", (boss_id,)
+                ) as cursor:
+                    total_damage = (await cursor.fetchone())[0] or 1
+
+                params = {"boss_id": boss_id, "gold": gold, "experience": experience, "total": total_damage}
+                await self.conn.execute(f"""
+                    UPDATE players SET
+                        gold = gold + (SELECT {gold_share} FROM world_boss_participants p
+                                       WHERE p.boss_id = :boss_id AND p.user_id = players.user_id),
+                        experience = experience + (SELECT {exp_share} FROM world_boss_participants p
+                                                   WHERE p.boss_id = :boss_id AND p.user_id = players.user_id)
+                    WHERE user_id IN (SELECT user_id FROM world_boss_participants WHERE boss_id = :boss_id)
+                """, params)
+
+                async with self.conn.execute(f"""
+                    SELECT p.user_id, p.user_name, p.total_damage,
+                           {gold_share} AS gold_reward,
+                           {exp_share} AS exp_reward
+                    FROM world_boss_participants p JOIN players pl ON pl.user_id = p.user_id
+                    WHERE p.boss_id = :boss_id
+                    ORDER BY p.total_damage DESC
+                """, params) as cursor:
+                    return [dict(row) for row in await cursor.fetchall()]
+        except aiosqlite.Error as e:
+            logger.error(f"发放Boss {boss_id} 奖励失败: {e}")
+            raise
+
     async def clear_boss_data(self, boss_id: str):
         try:
-            await self.conn.execute("BEGIN")
-            await self.conn.execute("DELETE FROM active_world_bosses WHERE boss_id = ?", (boss_id,))
-            await self.conn.execute("DELETE FROM world_boss_participants WHERE boss_id = ?", (boss_id,))
-            await self.conn.commit()
+            async with self.transaction():
+                await self.conn.execute("DELETE FROM active_world_bosses WHERE boss_id = ?", (boss_id,))
+                await self.conn.execute("DELETE FROM world_boss_participants WHERE boss_id = ?", (boss_id,))
             logger.info(f"Boss {boss_id} 的数据已清理。")
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"清理Boss {boss_id} 数据失败: {e}")
 
+    def _register_players(self, rows) -> List[Player]:
+        """将查询结果转为玩家对象，在工作单元内会复用已缓存的同一对象"""
+        uow = current_unit_of_work.get()
+        players = [Player(**dict(row)) for row in rows]
+        if uow is None:
+            return players
+        return [uow.register(player) for player in players]
+
     async def get_top_players(self, limit: int) -> List[Player]:
+        await self.flush()
         async with self.conn.execute(
             "SELECT * FROM players ORDER BY level_index DESC, experience DESC LIMIT ?", (limit,)
         ) as cursor:
             rows = await cursor.fetchall()
-            return [Player(**dict(row)) for row in rows]
+            return self._register_players(rows)
 
-    async def get_all_players_avg_level(self) -> int:
-        """获取所有玩家的平均境界level_index"""
-        async with self.conn.execute("SELECT AVG(level_index) as avg_level FROM players") as cursor:
+    async def get_top_players_avg_level(self, limit: int) -> int:
+        """获取排名前 limit 名玩家（境界、修为降序）的平均境界level_index，沿排名索引只读取 limit 行"""
+        await self.flush()
+        async with self.conn.execute(
+            "SELECT AVG(level_index) as avg_level FROM "
+            "(SELECT level_index FROM players ORDER BY level_index DESC, experience DESC LIMIT ?)",
+            (limit,)
+        ) as cursor:
             row = await cursor.fetchone()
             if row and row['avg_level'] is not None:
                 return max(1, int(row['avg_level']))  # 至少返回1
@@ -96,6 +300,7 @@ class DataBase:
 
     async def is_dao_name_taken(self, dao_name: str, exclude_user_id: Optional[str] = None) -> bool:
         """检查道号是否已被占用"""
+        await self.flush()
         if exclude_user_id:
             async with self.conn.execute(
                 "SELECT COUNT(*) FROM players WHERE dao_name = ? AND user_id != ?",
@@ -112,49 +317,108 @@ class DataBase:
                 return row[0] > 0
 
     async def get_player_by_id(self, user_id: str) -> Optional[Player]:
+        uow = current_unit_of_work.get()
+        if uow is not None and uow.get(user_id) is not None:
+            return uow.get(user_id)
         async with self.conn.execute("SELECT * FROM players WHERE user_id = ?", (user_id,)) as cursor:
             row = await cursor.fetchone()
-            return Player(**dict(row)) if row else None
+            if not row:
+                return None
+            return self._register_players([row])[0]
+
+    async def get_players_by_ids(self, user_ids: List[str]) -> Dict[str, Player]:
+        """一次 IN 查询批量读取玩家，工作单元中已缓存的玩家不会重复查询"""
+        uow = current_unit_of_work.get()
+        result: Dict[str, Player] = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            cached = uow.get(user_id) if uow is not None else None
+            if cached is not None:
+                result[user_id] = cached
+            else:
+                missing.append(user_id)
+
+        # 分批查询，避免超出 SQLite 的参数个数上限
+        for i in range(0, len(missing), 500):
+            batch = missing[i:i + 500]
+            placeholders = ", ".join("?" * len(batch))
+            async with self.conn.execute(f"SELECT * FROM players WHERE user_id IN ({placeholders})", batch) as cursor:
+                for player in self._register_players(await cursor.fetchall()):
+                    result[player.user_id] = player
+        return result
 
     async def create_player(self, player: Player):
         player_fields = [f.name for f in fields(Player)]
         columns = ", ".join(player_fields)
         placeholders = ", ".join([f":{f}" for f in player_fields])
         sql = f"INSERT INTO players ({columns}) VALUES ({placeholders})"
-        await self.conn.execute(sql, player.__dict__)
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute(sql, player.__dict__)
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.register(player)
 
     async def update_player(self, player: Player):
-        player_fields = [f.name for f in fields(Player) if f.name != 'user_id']
-        set_clause = ", ".join([f"{f} = :{f}" for f in player_fields])
-        sql = f"UPDATE players SET {set_clause} WHERE user_id = :user_id"
-        await self.conn.execute(sql, player.__dict__)
-        await self.conn.commit()
+        """在工作单元内仅登记待写入，由工作单元统一落库；否则立即写入"""
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.mark_dirty(player)
+            return
+        await self._write_players([player])
 
     async def update_players_in_transaction(self, players: List[Player]):
         if not players:
             return
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            for player in players:
+                uow.mark_dirty(player)
+            return
+        await self._write_players(players)
+
+    async def _write_players(self, players: List[Player]):
+        """
+        写入玩家更新。工作单元中读出的玩家只写改动过的字段，灵石、修为等累加型字段写为增量，
+        不会覆盖其他指令在此期间的直接SQL修改；没有读取快照的玩家整行写入。
+        """
+        uow = current_unit_of_work.get()
         player_fields = [f.name for f in fields(Player) if f.name != 'user_id']
-        set_clause = ", ".join([f"{f} = :{f}" for f in player_fields])
-        sql = f"UPDATE players SET {set_clause} WHERE user_id = :user_id"
+        # 相同改动字段的玩家共用一条语句批量执行
+        statements: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for player in players:
+            changed = uow.changes(player) if uow is not None else None
+            if changed is None:
+                statements.setdefault((), []).append(player.__dict__)
+            elif changed:
+                statements.setdefault(tuple(changed), []).append({**changed, "user_id": player.user_id})
+
         try:
-            await self.conn.execute("BEGIN")
-            for player in players:
-                await self.conn.execute(sql, player.__dict__)
-            await self.conn.commit()
+            async with self.transaction():
+                for columns, params in statements.items():
+                    if not columns:
+                        set_clause = ", ".join([f"{f} = :{f}" for f in player_fields])
+                    else:
+                        set_clause = ", ".join([
+                            f"{f} = {f} + :{f}" if f in UnitOfWork.ADDITIVE_FIELDS else f"{f} = :{f}" for f in columns
+                        ])
+                    await self.conn.executemany(f"UPDATE players SET {set_clause} WHERE user_id = :user_id", params)
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"批量更新玩家事务失败: {e}")
             raise
+        if uow is not None:
+            for player in players:
+                uow.written(player)
 
     async def create_sect(self, sect_name: str, leader_id: str) -> int:
-        async with self.conn.execute("INSERT INTO sects (name, leader_id) VALUES (?, ?)", (sect_name, leader_id)) as cursor:
-            await self.conn.commit()
-            return cursor.lastrowid
+        async with self.transaction():
+            async with self.conn.execute("INSERT INTO sects (name, leader_id) VALUES (?, ?)", (sect_name, leader_id)) as cursor:
+                return cursor.lastrowid
 
     async def delete_sect(self, sect_id: int):
-        await self.conn.execute("DELETE FROM sects WHERE id = ?", (sect_id,))
-        await self.conn.commit()
+        # 外键会将成员的 sect_id 置空，先落库待写入的更新并清空缓存
+        await self._flush_and_evict()
+        async with self.transaction():
+            await self.conn.execute("DELETE FROM sects WHERE id = ?", (sect_id,))
 
     async def get_sect_by_name(self, sect_name: str) -> Optional[Dict[str, Any]]:
         async with self.conn.execute("SELECT * FROM sects WHERE name = ?", (sect_name,)) as cursor:
@@ -167,13 +431,15 @@ class DataBase:
             return dict(row) if row else None
 
     async def get_sect_members(self, sect_id: int) -> List[Player]:
+        await self.flush()
         async with self.conn.execute("SELECT * FROM players WHERE sect_id = ?", (sect_id,)) as cursor:
             rows = await cursor.fetchall()
-            return [Player(**dict(row)) for row in rows]
+            return self._register_players(rows)
 
     async def update_player_sect(self, user_id: str, sect_id: Optional[int], sect_name: Optional[str]):
-        await self.conn.execute("UPDATE players SET sect_id = ?, sect_name = ? WHERE user_id = ?", (sect_id, sect_name, user_id))
-        await self.conn.commit()
+        await self._flush_and_evict([user_id])
+        async with self.transaction():
+            await self.conn.execute("UPDATE players SET sect_id = ?, sect_name = ? WHERE user_id = ?", (sect_id, sect_name, user_id))
 
     async def get_inventory_by_user_id(self, user_id: str, config_manager: ConfigManager) -> List[Dict[str, Any]]:
         async with self.conn.execute("SELECT item_id, quantity FROM inventory WHERE user_id = ?", (user_id,)) as cursor:
@@ -203,96 +469,85 @@ class DataBase:
 
     async def add_items_to_inventory_in_transaction(self, user_id: str, items: Dict[str, int]):
         try:
-            await self.conn.execute("BEGIN")
-            for item_id, quantity in items.items():
-                await self.conn.execute("""
-                    INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)
-                    ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
-                """, (user_id, item_id, quantity))
-            await self.conn.commit()
+            async with self.transaction():
+                for item_id, quantity in items.items():
+                    await self.conn.execute("""
+                        INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)
+                        ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
+                    """, (user_id, item_id, quantity))
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"批量添加物品事务失败: {e}")
             raise
 
     async def remove_item_from_inventory(self, user_id: str, item_id: str, quantity: int = 1) -> bool:
         try:
-            await self.conn.execute("BEGIN")
-            cursor = await self.conn.execute("""
-                UPDATE inventory SET quantity = quantity - ?
-                WHERE user_id = ? AND item_id = ? AND quantity >= ?
-            """, (quantity, user_id, item_id, quantity))
-
-            if cursor.rowcount == 0:
-                await self.conn.rollback()
-                return False
-
-            await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
-            await self.conn.commit()
+            async with self.transaction():
+                cursor = await self.conn.execute("""
+                    UPDATE inventory SET quantity = quantity - ?
+                    WHERE user_id = ? AND item_id = ? AND quantity >= ?
+                """, (quantity, user_id, item_id, quantity))
+                if cursor.rowcount == 0:
+                    return False  # 未做任何修改，提交空事务即可
+                await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
             return True
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"移除物品事务失败: {e}")
             return False
 
     async def transactional_buy_item(self, user_id: str, item_id: str, quantity: int, total_cost: int) -> Tuple[bool, str]:
+        # 扣款直接以SQL完成，之后需要最新灵石时重新读取
+        await self._flush_and_evict([user_id])
         try:
-            await self.conn.execute("BEGIN")
-            cursor = await self.conn.execute(
-                "UPDATE players SET gold = gold - ? WHERE user_id = ? AND gold >= ?",
-                (total_cost, user_id, total_cost)
-            )
-            if cursor.rowcount == 0:
-                await self.conn.rollback()
-                return False, "ERROR_INSUFFICIENT_FUNDS"
+            async with self.transaction():
+                cursor = await self.conn.execute(
+                    "UPDATE players SET gold = gold - ? WHERE user_id = ? AND gold >= ?",
+                    (total_cost, user_id, total_cost)
+                )
+                if cursor.rowcount == 0:
+                    return False, "ERROR_INSUFFICIENT_FUNDS"
 
-            await self.conn.execute("""
-                INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)
-                ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
-            """, (user_id, item_id, quantity))
-
-            await self.conn.commit()
+                await self.conn.execute("""
+                    INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)
+                    ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
+                """, (user_id, item_id, quantity))
             return True, "SUCCESS"
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"购买物品事务失败: {e}")
             return False, "ERROR_DATABASE"
 
     async def transactional_apply_item_effect(self, user_id: str, item_id: str, quantity: int, effect: PlayerEffect, breakthrough_bonus: float = 0.0) -> bool:
+        await self._flush_and_evict([user_id])
         try:
-            await self.conn.execute("BEGIN")
-            cursor = await self.conn.execute(
-                "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
-                (quantity, user_id, item_id, quantity)
-            )
-            if cursor.rowcount == 0:
-                await self.conn.rollback()
-                return False
-
-            await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
-
-            await self.conn.execute(
-                """
-                UPDATE players
-                SET experience = experience + ?,
-                    gold = gold + ?,
-                    hp = MIN(max_hp + ?, hp + ?),
-                    max_hp = max_hp + ?,
-                    spiritual_power = spiritual_power + ?,
-                    mental_power = mental_power + ?,
-                    attack = attack + ?,
-                    defense = defense + ?,
-                    breakthrough_bonus = ?
-                WHERE user_id = ?
-                """,
-                (effect.experience, effect.gold, effect.max_hp, effect.hp, 
-                 effect.max_hp, effect.spiritual_power, effect.mental_power,
-                 effect.attack, effect.defense, breakthrough_bonus, user_id)
-            )
-            await self.conn.commit()
+            async with self.transaction():
+                cursor = await self.conn.execute(
+                    "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
+                    (quantity, user_id, item_id, quantity)
+                )
+                if cursor.rowcount == 0:
+                    return False
+
+                await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
+
+                await self.conn.execute(
+                    """
+                    UPDATE players
+                    SET experience = experience + ?,
+                        gold = gold + ?,
+                        hp = MIN(max_hp + ?, hp + ?),
+                        max_hp = max_hp + ?,
+                        spiritual_power = spiritual_power + ?,
+                        mental_power = mental_power + ?,
+                        attack = attack + ?,
+                        defense = defense + ?,
+                        breakthrough_bonus = ?
+                    WHERE user_id = ?
+                    """,
+                    (effect.experience, effect.gold, effect.max_hp, effect.hp,
+                     effect.max_hp, effect.spiritual_power, effect.mental_power,
+                     effect.attack, effect.defense, breakthrough_bonus, user_id)
+                )
             return True
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"使用物品事务失败: {e}")
             return False
 
@@ -305,15 +560,13 @@ class DataBase:
     async def init_shop_inventory(self, date: str, inventory_dict: Dict[str, int]):
         """初始化指定日期的商店库存（批量插入）"""
         try:
-            await self.conn.execute("BEGIN")
-            for item_id, stock in inventory_dict.items():
-                await self.conn.execute("""
-                    INSERT INTO shop_inventory (date, item_id, stock) VALUES (?, ?, ?)
-                    ON CONFLICT(date, item_id) DO UPDATE SET stock = excluded.stock
-                """, (date, item_id, stock))
-            await self.conn.commit()
+            async with self.transaction():
+                for item_id, stock in inventory_dict.items():
+                    await self.conn.execute("""
+                        INSERT INTO shop_inventory (date, item_id, stock) VALUES (?, ?, ?)
+                        ON CONFLICT(date, item_id) DO UPDATE SET stock = excluded.stock
+                    """, (date, item_id, stock))
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"初始化商店库存失败: {e}")
             raise
 
@@ -329,30 +582,23 @@ class DataBase:
     async def decrease_shop_stock(self, date: str, item_id: str, quantity: int) -> bool:
         """减少商店库存，返回是否成功"""
         try:
-            await self.conn.execute("BEGIN")
-            cursor = await self.conn.execute("""
-                UPDATE shop_inventory SET stock = stock - ?
-                WHERE date = ? AND item_id = ? AND stock >= ?
-            """, (quantity, date, item_id, quantity))
-            
-            if cursor.rowcount == 0:
-                await self.conn.rollback()
-                return False
-            
-            await self.conn.commit()
-            return True
+            async with self.transaction():
+                cursor = await self.conn.execute("""
+                    UPDATE shop_inventory SET stock = stock - ?
+                    WHERE date = ? AND item_id = ? AND stock >= ?
+                """, (quantity, date, item_id, quantity))
+            return cursor.rowcount > 0
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"减少商店库存失败: {e}")
             return False
 
     async def set_boss_cooldown(self, boss_id: str, defeated_at: float, respawn_at: float):
         """设置Boss冷却时间"""
-        await self.conn.execute("""
-            INSERT INTO boss_cooldowns (boss_id, defeated_at, respawn_at) VALUES (?, ?, ?)
-            ON CONFLICT(boss_id) DO UPDATE SET defeated_at = excluded.defeated_at, respawn_at = excluded.respawn_at
-        """, (boss_id, defeated_at, respawn_at))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute("""
+                INSERT INTO boss_cooldowns (boss_id, defeated_at, respawn_at) VALUES (?, ?, ?)
+                ON CONFLICT(boss_id) DO UPDATE SET defeated_at = excluded.defeated_at, respawn_at = excluded.respawn_at
+            """, (boss_id, defeated_at, respawn_at))
 
     async def get_boss_cooldown(self, boss_id: str) -> Optional[Dict[str, float]]:
         """获取Boss冷却信息"""
@@ -367,8 +613,8 @@ class DataBase:
 
     async def remove_boss_cooldown(self, boss_id: str):
         """删除Boss冷却记录（Boss重生后清除）"""
-        await self.conn.execute("DELETE FROM boss_cooldowns WHERE boss_id = ?", (boss_id,))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute("DELETE FROM boss_cooldowns WHERE boss_id = ?", (boss_id,))
 
     async def get_all_boss_cooldowns(self) -> Dict[str, Dict[str, float]]:
         """获取所有Boss的冷却信息"""
@@ -386,12 +632,12 @@ class DataBase:
     
     async def create_fixed_deposit(self, user_id: str, amount: int, duration_hours: int, deposit_time: float, mature_time: float) -> int:
         """创建定期存款"""
-        async with self.conn.execute("""
-            INSERT INTO fixed_deposits (user_id, amount, deposit_time, mature_time, duration_hours)
-            VALUES (?, ?, ?, ?, ?)
-        """, (user_id, amount, deposit_time, mature_time, duration_hours)) as cursor:
-            await self.conn.commit()
-            return cursor.lastrowid
+        async with self.transaction():
+            async with self.conn.execute("""
+                INSERT INTO fixed_deposits (user_id, amount, deposit_time, mature_time, duration_hours)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, amount, deposit_time, mature_time, duration_hours)) as cursor:
+                return cursor.lastrowid
 
     async def get_fixed_deposits(self, user_id: str) -> List[Dict]:
         """获取用户的所有定期存款"""
@@ -413,19 +659,19 @@ class DataBase:
 
     async def delete_fixed_deposit(self, deposit_id: int):
         """删除定期存款（取款后）"""
-        await self.conn.execute("DELETE FROM fixed_deposits WHERE id = ?", (deposit_id,))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute("DELETE FROM fixed_deposits WHERE id = ?", (deposit_id,))
 
     async def create_or_update_current_deposit(self, user_id: str, amount: int, deposit_time: float):
         """创建或更新活期存款"""
-        await self.conn.execute("""
-            INSERT INTO current_deposits (user_id, amount, deposit_time)
-            VALUES (?, ?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET 
-                amount = amount + excluded.amount,
-                deposit_time = excluded.deposit_time
-        """, (user_id, amount, deposit_time))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute("""
+                INSERT INTO current_deposits (user_id, amount, deposit_time)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    amount = amount + excluded.amount,
+                    deposit_time = excluded.deposit_time
+            """, (user_id, amount, deposit_time))
 
     async def get_current_deposit(self, user_id: str) -> Optional[Dict]:
         """获取用户的活期存款"""
@@ -438,13 +684,149 @@ class DataBase:
 
     async def delete_current_deposit(self, user_id: str):
         """删除活期存款（取款后）"""
-        await self.conn.execute("DELETE FROM current_deposits WHERE user_id = ?", (user_id,))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute("DELETE FROM current_deposits WHERE user_id = ?", (user_id,))
 
     async def update_current_deposit_amount(self, user_id: str, new_amount: int, new_deposit_time: float):
         """更新活期存款金额（部分取款）"""
-        await self.conn.execute("""
-            UPDATE current_deposits SET amount = ?, deposit_time = ?
-            WHERE user_id = ?
-        """, (new_amount, new_deposit_time, user_id))
-        await self.conn.commit()
\ No newline at end of file
+        async with self.transaction():
+            await self.conn.execute("""
+                UPDATE current_deposits SET amount = ?, deposit_time = ?
+                WHERE user_id = ?
+            """, (new_amount, new_deposit_time, user_id))
+
+    async def get_pending_season_reset(self) -> Optional[Dict[str, Any]]:
+        """获取尚未完成的赛季重置进度"""
+        async with self.conn.execute(
+            "SELECT * FROM season_resets WHERE finished_at IS NULL ORDER BY season_id LIMIT 1"
+        ) as cursor:
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+    async def get_latest_season_id(self) -> int:
+        async with self.conn.execute("SELECT MAX(season_id) FROM season_resets") as cursor:
+            row = await cursor.fetchone()
+            return row[0] or 0
+
+    async def archive_season(self, season_id: int, archived_at: float) -> int:
+        """将全服最终排名快照写入赛季归档，并登记重置进度，二者在同一事务中完成"""
+        await self.flush()
+        try:
+            async with self.transaction():
+                cursor = await self.conn.execute("""
+                    INSERT INTO season_archive (season_id, rank, user_id, dao_name, spiritual_root, sect_name,
+                                                level_index, experience, gold, archived_at)
+                    SELECT ?, ROW_NUMBER() OVER (ORDER BY level_index DESC, experience DESC, user_id),
+                           user_id, dao_name, spiritual_root, sect_name, level_index, experience, gold, ?
+                    FROM players
+                """, (season_id, archived_at))
+                archived = cursor.rowcount
+                await self.conn.execute(
+                    "INSERT INTO season_resets (season_id, started_at) VALUES (?, ?)",
+                    (season_id, archived_at)
+                )
+            return archived
+        except aiosqlite.Error as e:
+            logger.error(f"归档第 {season_id} 赛季排名失败: {e}")
+            raise
+
+    async def reset_season_chunk(self, season_id: int, after_user_id: str, chunk_size: int,
+                                 reset_values: Dict[str, Any]) -> Tuple[int, str]:
+        """
+        按 user_id 键集分块重置一批玩家，并在同一事务中推进重置进度。
+        返回 (本批处理的玩家数, 新游标)，处理数为0时表示已全部完成。
+        """
+        await self._flush_and_evict()
+        try:
+            async with self.transaction():
+                # 在同一事务中确定本块范围，统计的人数与实际重置的玩家一致
+                async with self.conn.execute(
+                    "SELECT MAX(user_id), COUNT(*) FROM (SELECT user_id FROM players WHERE user_id > ? ORDER BY user_id LIMIT ?)",
+                    (after_user_id, chunk_size)
+                ) as cursor:
+                    upper, count = await cursor.fetchone()
+                if count:
+                    bounds = (after_user_id, upper)
+                    await self.conn.execute("""
+                        UPDATE players SET
+                            level_index = 0, experience = 0, gold = :gold,
+                            hp = :hp, max_hp = :max_hp, attack = :attack, defense = :defense,
+                            spiritual_power = :spiritual_power, mental_power = :mental_power,
+                            state = '空闲', state_start_time = 0, breakthrough_bonus = 0.0,
+                            realm_id = NULL, realm_floor = 0, realm_data = NULL,
+                            equipped_weapon = NULL, equipped_armor = NULL, equipped_accessory = NULL
+                        WHERE user_id > :lower AND user_id <= :upper
+                    """, {**reset_values, "lower": after_user_id, "upper": upper})
+                    await self.conn.execute("DELETE FROM inventory WHERE user_id > ? AND user_id <= ?", bounds)
+                    await self.conn.execute("DELETE FROM fixed_deposits WHERE user_id > ? AND user_id <= ?", bounds)
+                    await self.conn.execute("DELETE FROM current_deposits WHERE user_id > ? AND user_id <= ?", bounds)
+                    await self.conn.execute(
+                        "UPDATE season_resets SET cursor = ?, processed = processed + ? WHERE season_id = ?",
+                        (upper, count, season_id)
+                    )
+                else:
+                    await self.conn.execute(
+                        "UPDATE season_resets SET finished_at = ? WHERE season_id = ?",
+                        (time.time(), season_id)
+                    )
+            return count, upper if count else after_user_id
+        except aiosqlite.Error as e:
+            logger.error(f"第 {season_id} 赛季重置分块失败: {e}")
+            raise
+
+    async def get_season_archive(self, season_id: int, limit: int) -> List[Dict[str, Any]]:
+        async with self.conn.execute(
+            "SELECT * FROM season_archive WHERE season_id = ? ORDER BY rank LIMIT ?",
+            (season_id, limit)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+
+    async def _apply_to_players_in_chunks(self, statements: List[Tuple[str, Dict[str, Any]]],
+                                          player_filter: PlayerFilter, chunk_size: int) -> int:
+        """
+        按 user_id 键集将满足筛选条件的玩家分块，每块在一个事务中执行全部语句。
+        语句中以 :lower/:upper 限定本块范围，以 {where} 嵌入筛选条件。返回涉及的玩家数。
+        """
+        await self._flush_and_evict()
+        where, filter_params = player_filter.to_sql()
+        lower, total = "", 0
+        while True:
+            async with self.conn.execute(f"""
+                SELECT MAX(user_id), COUNT(*) FROM (
+                    SELECT user_id FROM players WHERE user_id > :lower AND {where} ORDER BY user_id LIMIT :limit
+                )
+            """, {**filter_params, "lower": lower, "limit": chunk_size}) as cursor:
+                upper, count = await cursor.fetchone()
+            if not count:
+                return total
+
+            try:
+                async with self.transaction():
+                    for sql, params in statements:
+                        await self.conn.execute(
+                            sql.format(where=where),
+                            {**params, **filter_params, "lower": lower, "upper": upper}
+                        )
+            except aiosqlite.Error as e:
+                logger.error(f"批量发放在 user_id > {lower!r} 处失败，已完成 {total} 名: {e}")
+                raise
+            total += count
+            lower = upper
+            await asyncio.sleep(0)
+
+    async def grant_gold(self, amount: int, player_filter: PlayerFilter, chunk_size: int = 5000) -> int:
+        """为满足条件的所有玩家发放灵石，返回发放人数"""
+        sql = "UPDATE players SET gold = gold + :amount WHERE user_id > :lower AND user_id <= :upper AND {where}"
+        return await self._apply_to_players_in_chunks([(sql, {"amount": amount})], player_filter, chunk_size)
+
+    async def grant_items(self, items: Dict[str, int], player_filter: PlayerFilter, chunk_size: int = 5000) -> int:
+        """为满足条件的所有玩家发放物品，返回发放人数"""
+        sql = """
+            INSERT INTO inventory (user_id, item_id, quantity)
+            SELECT user_id, :item_id, :quantity FROM players
+            WHERE user_id > :lower AND user_id <= :upper AND {where}
+            ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity
+        """
+        statements = [(sql, {"item_id": item_id, "quantity": quantity}) for item_id, quantity in items.items()]
+        return await self._apply_to_players_in_chunks(statements, player_filter, chunk_size)
@@ -1,11 +1,11 @@
 # data/migration.py
 
 import aiosqlite
-from typing import Dict, Callable, Awaitable
+from typing import Dict, Callable, Awaitable, Optional
 from astrbot.api import logger
 from ..config_manager import ConfigManager
 
-LATEST_DB_VERSION = 15 # 版本号提升 - 添加突破成功率加成
+LATEST_DB_VERSION = 18 # 版本号提升 - 玩家排名索引
 
 MIGRATION_TASKS: Dict[int, Callable[[aiosqlite.Connection, ConfigManager], Awaitable[None]]] = {}
 
@@ -31,7 +31,7 @@ class MigrationManager:
                 logger.info("未检测到数据库版本，将进行全新安装...")
                 await self.conn.execute("BEGIN")
                 # 使用最新的建表函数
-                await _create_all_tables_v15(self.conn)
+                await _create_all_tables_v18(self.conn)
                 await self.conn.execute("INSERT INTO db_info (version) VALUES (?)", (LATEST_DB_VERSION,))
                 await self.conn.commit()
                 logger.info(f"数据库已初始化到最新版本: v{LATEST_DB_VERSION}")
@@ -360,6 +360,84 @@ async def _create_all_tables_v14(conn: aiosqlite.Connection):
         )
     """)
 
+async def _create_season_tables(conn: aiosqlite.Connection):
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS season_archive (
+            season_id INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            user_id TEXT NOT NULL,
+            dao_name TEXT,
+            spiritual_root TEXT NOT NULL,
+            sect_name TEXT,
+            level_index INTEGER NOT NULL,
+            experience INTEGER NOT NULL,
+            gold INTEGER NOT NULL,
+            archived_at REAL NOT NULL,
+            PRIMARY KEY (season_id, rank)
+        )
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS season_resets (
+            season_id INTEGER PRIMARY KEY,
+            cursor TEXT NOT NULL DEFAULT '',
+            processed INTEGER NOT NULL DEFAULT 0,
+            started_at REAL NOT NULL,
+            finished_at REAL
+        )
+    """)
+
+# 以自然键聚簇存储的复合主键表，v17 起使用
+INVENTORY_TABLE_V17 = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        user_id TEXT NOT NULL,
+        item_id TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        PRIMARY KEY (user_id, item_id),
+        FOREIGN KEY (user_id) REFERENCES players (user_id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+"""
+
+WORLD_BOSS_PARTICIPANTS_TABLE_V17 = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        boss_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        user_name TEXT NOT NULL,
+        total_damage INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (boss_id, user_id),
+        FOREIGN KEY (user_id) REFERENCES players (user_id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+"""
+
+SHOP_INVENTORY_TABLE_V17 = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        date TEXT NOT NULL,
+        item_id TEXT NOT NULL,
+        stock INTEGER NOT NULL,
+        PRIMARY KEY (date, item_id)
+    ) WITHOUT ROWID
+"""
+
+async def _create_players_rank_index(conn: aiosqlite.Connection):
+    # 排行榜与世界Boss等级参考均按境界、修为降序取前N名
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_rank ON players (level_index DESC, experience DESC)"
+    )
+
+async def _create_all_tables_v18(conn: aiosqlite.Connection):
+    await _create_all_tables_v17(conn)
+    await _create_players_rank_index(conn)
+
+async def _create_all_tables_v17(conn: aiosqlite.Connection):
+    # 先建 WITHOUT ROWID 版本，之后的 CREATE TABLE IF NOT EXISTS 会跳过同名表
+    await conn.execute(INVENTORY_TABLE_V17.format(name="inventory"))
+    await conn.execute(WORLD_BOSS_PARTICIPANTS_TABLE_V17.format(name="world_boss_participants"))
+    await conn.execute(SHOP_INVENTORY_TABLE_V17.format(name="shop_inventory"))
+    await _create_all_tables_v16(conn)
+
+async def _create_all_tables_v16(conn: aiosqlite.Connection):
+    await _create_all_tables_v15(conn)
+    await _create_season_tables(conn)
+
 async def _create_all_tables_v15(conn: aiosqlite.Connection):
     await conn.execute("CREATE TABLE IF NOT EXISTS db_info (version INTEGER NOT NULL)")
     await conn.execute("""
@@ -570,7 +648,7 @@ async def _upgrade_v4_to_v5(conn: aiosqlite.Connection, config_manager: ConfigMa
             FOREIGN KEY (sect_id) REFERENCES sects (id) ON DELETE SET NULL
         )
     """)
-    level_name_to_index_map = {info['level_name']: i for i, info in enumerate(config_manager.level_data)}
+    level_name_to_index_map = config_manager.levels.name_to_index
     async with conn.execute("SELECT * FROM players_old_v4") as cursor:
         async for row in cursor:
             old_data = dict(row)
@@ -751,4 +829,52 @@ async def _upgrade_v14_to_v15(conn: aiosqlite.Connection, config_manager: Config
         columns = [row['name'] for row in await cursor.fetchall()]
         if 'breakthrough_bonus' not in columns:
             await conn.execute("ALTER TABLE players ADD COLUMN breakthrough_bonus REAL NOT NULL DEFAULT 0.0")
-    logger.info("v14 -> v15 数据库迁移完成！")
\ No newline at end of file
+    logger.info("v14 -> v15 数据库迁移完成！")
+
+@migration(16)
+async def _upgrade_v15_to_v16(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """添加赛季归档表与赛季重置进度表"""
+    logger.info("开始执行 v15 -> v16 数据库迁移...")
+    await _create_season_tables(conn)
+    logger.info("v15 -> v16 数据库迁移完成！")
+
+async def _rebuild_table(conn: aiosqlite.Connection, name: str, create_sql: str, columns: str,
+                         player_column: Optional[str] = None):
+    """
+    按新的表结构重建数据表并搬迁数据。迁移在外键约束开启时执行，
+    player_column 指定引用 players 的列，早期版本遗留的、玩家已不存在的孤儿行不再搬迁。
+    """
+    where = ""
+    if player_column:
+        where = f" WHERE {player_column} IN (SELECT user_id FROM players)"
+        async with conn.execute(
+            f"SELECT COUNT(*) FROM {name} WHERE {player_column} NOT IN (SELECT user_id FROM players)"
+        ) as cursor:
+            orphans = (await cursor.fetchone())[0]
+        if orphans:
+            logger.warning(f"{name} 表中有 {orphans} 行引用了不存在的玩家，重建时将丢弃。")
+    await conn.execute(f"DROP TABLE IF EXISTS {name}_new")
+    await conn.execute(create_sql.format(name=f"{name}_new"))
+    await conn.execute(f"INSERT INTO {name}_new ({columns}) SELECT {columns} FROM {name}{where}")
+    await conn.execute(f"DROP TABLE {name}")
+    await conn.execute(f"ALTER TABLE {name}_new RENAME TO {name}")
+    async with conn.execute(f"PRAGMA foreign_key_check({name})") as cursor:
+        if await cursor.fetchone() is not None:
+            raise RuntimeError(f"重建后的 {name} 表仍存在外键约束冲突")
+
+@migration(17)
+async def _upgrade_v16_to_v17(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """将 inventory、world_boss_participants、shop_inventory 重建为以自然键聚簇的 WITHOUT ROWID 表"""
+    logger.info("开始执行 v16 -> v17 数据库迁移...")
+    await _rebuild_table(conn, "inventory", INVENTORY_TABLE_V17, "user_id, item_id, quantity", "user_id")
+    await _rebuild_table(conn, "world_boss_participants", WORLD_BOSS_PARTICIPANTS_TABLE_V17,
+                         "boss_id, user_id, user_name, total_damage", "user_id")
+    await _rebuild_table(conn, "shop_inventory", SHOP_INVENTORY_TABLE_V17, "date, item_id, stock")
+    logger.info("v16 -> v17 数据库迁移完成！")
+
+@migration(18)
+async def _upgrade_v17_to_v18(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """为players表添加按境界、修为降序的排名索引"""
+    logger.info("开始执行 v17 -> v18 数据库迁移...")
+    await _create_players_rank_index(conn)
+    logger.info("v17 -> v18 数据库迁移完成！")
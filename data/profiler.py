@@ -0,0 +1,359 @@
+# data/profiler.py
+
+import logging
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Iterator
+
+import aiosqlite
+from astrbot.api import logger
+
+BACKGROUND_COMMAND = "(后台任务)"
+# 事务控制语句不参与重复查询检测
+TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PLACEHOLDER_LIST_RE = re.compile(r"\?(\s*,\s*\?)+")
+
+
+def normalize_sql(sql: str) -> str:
+    """将SQL归一化为"语句形态"：压缩空白，并把变长的 ?, ?, ? 占位符列表折叠为 ?+"""
+    shape = _WHITESPACE_RE.sub(" ", sql).strip().rstrip(";").strip()
+    return _PLACEHOLDER_LIST_RE.sub("?+", shape)
+
+
+@dataclass
+class StatementRecord:
+    """单条SQL语句的执行记录"""
+
+    shape: str
+    offset: float  # 相对指令开始的偏移（秒）
+    elapsed: float = 0.0
+    rows: int = 0
+
+
+@dataclass
+class CommandTrace:
+    """一次指令调用的完整执行轨迹"""
+
+    command: str
+    args: Tuple[Any, ...]
+    started_at: float
+    statements: List[StatementRecord] = field(default_factory=list)
+    duration: float = 0.0
+    # 指令生成器停在 yield 处等待消息发送的累计时长，不计入指令耗时
+    suspended: float = 0.0
+
+    @property
+    def sql_time(self) -> float:
+        return sum(s.elapsed for s in self.statements)
+
+
+@dataclass
+class CommandSummary:
+    """某个指令的累计统计"""
+
+    calls: int = 0
+    total_time: float = 0.0
+    sql_count: int = 0
+    sql_time: float = 0.0
+    rows: int = 0
+    # 语句形态 -> 单次调用内出现过的最大重复次数
+    repeated_shapes: Dict[str, int] = field(default_factory=dict)
+
+
+class SlowCommandLog:
+    """将耗时超过阈值的指令完整轨迹写入本地滚动日志文件"""
+
+    def __init__(self, path: Path, threshold_ms: int = 200, max_bytes: int = 1024 * 1024, backup_count: int = 3):
+        self.path = path
+        self.threshold = max(0, threshold_ms) / 1000
+        self._logger = logging.getLogger(f"xiuxian.slow_command.{path}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        if not self._logger.handlers:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                          encoding="utf-8", delay=True)
+            handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s"))
+            self._logger.addHandler(handler)
+
+    def maybe_record(self, trace: CommandTrace) -> bool:
+        if trace.duration < self.threshold:
+            return False
+        self._logger.info(self.format_trace(trace))
+        logger.warning(f"[慢指令] {trace.command} 耗时 {trace.duration * 1000:.1f}ms，轨迹已写入 {self.path.name}")
+        return True
+
+    @staticmethod
+    def format_trace(trace: CommandTrace) -> str:
+        """按时间顺序展开SQL语句，语句之间的空档即为 Python 代码（及其他 await）的耗时"""
+        sql_time = trace.sql_time
+        lines = [
+            f"{trace.command} 耗时 {trace.duration * 1000:.1f}ms"
+            f"（SQL {sql_time * 1000:.1f}ms，非SQL {(trace.duration - sql_time) * 1000:.1f}ms，"
+            f"共 {len(trace.statements)} 条语句）",
+            f"  参数: {trace.args!r}",
+        ]
+        cursor = 0.0
+        for statement in trace.statements:
+            gap = statement.offset - cursor
+            if gap >= 0.00005:
+                lines.append(f"  +{cursor * 1000:8.1f}ms  Python {gap * 1000:.1f}ms")
+            lines.append(f"  +{statement.offset * 1000:8.1f}ms  SQL {statement.elapsed * 1000:.1f}ms "
+                         f"{statement.rows}行  {statement.shape}")
+            cursor = max(cursor, statement.offset + statement.elapsed)
+        tail = trace.duration - cursor
+        if tail >= 0.00005:
+            lines.append(f"  +{cursor * 1000:8.1f}ms  Python {tail * 1000:.1f}ms")
+        return "\n".join(lines)
+
+
+_current_trace: ContextVar[Optional[CommandTrace]] = ContextVar("xiuxian_command_trace", default=None)
+
+
+class SqlProfiler:
+    """按指令归集SQL语句的分析器，并检测疑似 N+1 的重复查询"""
+
+    def __init__(self, enabled: bool = False, repeat_threshold: int = 5, slow_log: Optional[SlowCommandLog] = None):
+        self.enabled = enabled
+        self.repeat_threshold = max(1, repeat_threshold)
+        self.slow_log = slow_log
+        self._summaries: Dict[str, CommandSummary] = defaultdict(CommandSummary)
+        self._pending_background: List[CommandTrace] = []
+
+    def update_thresholds(self, repeat_threshold: int, slow_threshold_ms: int):
+        """运行中调整检测阈值；是否拦截数据库连接在连接时就已决定，开关类配置需重载插件"""
+        self.repeat_threshold = max(1, repeat_threshold)
+        if self.slow_log is not None:
+            self.slow_log.threshold = max(0, slow_threshold_ms) / 1000
+
+    @property
+    def active(self) -> bool:
+        """是否需要拦截数据库连接"""
+        return self.enabled or self.slow_log is not None
+
+    @contextmanager
+    def command(self, name: str, args: Tuple[Any, ...] = ()) -> Iterator[Optional[CommandTrace]]:
+        """在当前上下文中登记一次指令调用，期间执行的SQL都会归属到该指令"""
+        if not self.active:
+            yield None
+            return
+
+        trace = CommandTrace(command=name, args=args, started_at=time.perf_counter())
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            try:
+                _current_trace.reset(token)
+            except ValueError:
+                # 生成器在其他上下文中被回收时无法复原，直接清空即可
+                _current_trace.set(None)
+            trace.duration = time.perf_counter() - trace.started_at - trace.suspended
+            self._finish(trace)
+
+    @contextmanager
+    def suspend(self) -> Iterator[None]:
+        """指令生成器交出回复、等待框架发送期间暂停计时"""
+        trace = _current_trace.get()
+        if trace is None:
+            yield
+            return
+        paused_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            trace.suspended += time.perf_counter() - paused_at
+
+    def record(self, sql: str, started: float) -> StatementRecord:
+        trace = _current_trace.get()
+        if trace is None:
+            trace = CommandTrace(command=BACKGROUND_COMMAND, args=(), started_at=started)
+            record = StatementRecord(shape=normalize_sql(sql), offset=0.0)
+            trace.statements.append(record)
+            # 后台语句没有指令边界，先暂存，查看统计或积累过多时再计入
+            if len(self._pending_background) >= 256:
+                self.flush_background()
+            self._pending_background.append(trace)
+            return record
+
+        record = StatementRecord(shape=normalize_sql(sql), offset=started - trace.started_at - trace.suspended)
+        trace.statements.append(record)
+        return record
+
+    def _finish(self, trace: CommandTrace):
+        if self.slow_log is not None and trace.command != BACKGROUND_COMMAND:
+            self.slow_log.maybe_record(trace)
+        if not self.enabled:
+            return
+        summary = self._summaries[trace.command]
+        summary.calls += 1
+        summary.total_time += trace.duration
+        summary.sql_count += len(trace.statements)
+        summary.sql_time += trace.sql_time
+        summary.rows += sum(s.rows for s in trace.statements)
+
+        shape_counts: Dict[str, int] = defaultdict(int)
+        for statement in trace.statements:
+            shape_counts[statement.shape] += 1
+        for shape, count in shape_counts.items():
+            # 每个事务都会执行一次 BEGIN，重复并不意味着 N+1
+            if shape.startswith(TRANSACTION_CONTROL):
+                continue
+            if count > self.repeat_threshold:
+                if count > summary.repeated_shapes.get(shape, 0):
+                    summary.repeated_shapes[shape] = count
+                logger.warning(f"[SQL分析] 指令 {trace.command} 中同一语句执行了 {count} 次，疑似 N+1 查询: {shape}")
+
+    def flush_background(self):
+        """将后台语句计入统计"""
+        pending, self._pending_background = self._pending_background, []
+        for trace in pending:
+            trace.duration = trace.sql_time
+            self._finish(trace)
+
+    def reset(self):
+        self._summaries.clear()
+        self._pending_background = []
+
+    def summaries(self) -> Dict[str, CommandSummary]:
+        self.flush_background()
+        return dict(self._summaries)
+
+    def format_report(self, limit: int = 10) -> str:
+        summaries = self.summaries()
+        if not summaries:
+            return "暂无SQL统计数据。"
+
+        ranked = sorted(summaries.items(), key=lambda kv: kv[1].sql_time, reverse=True)[:limit]
+        lines = ["📊 SQL 指令统计", "━━━━━━━━━━━━━━━"]
+        for name, s in ranked:
+            lines.append(f"【{name}】调用 {s.calls} 次")
+            lines.append(f"  平均耗时 {s.total_time / s.calls * 1000:.1f}ms，"
+                         f"其中SQL {s.sql_time / s.calls * 1000:.1f}ms")
+            lines.append(f"  平均 {s.sql_count / s.calls:.1f} 条语句，{s.rows / s.calls:.1f} 行")
+            for shape, count in sorted(s.repeated_shapes.items(), key=lambda kv: kv[1], reverse=True)[:3]:
+                lines.append(f"  ⚠️ N+1 ×{count}: {shape[:80]}")
+        lines.append("━━━━━━━━━━━━━━━")
+        return "\n".join(lines)
+
+
+class _ProfiledCursor:
+    """计数读取行数的游标代理"""
+
+    def __init__(self, cursor: aiosqlite.Cursor, record: StatementRecord):
+        self._cursor = cursor
+        self._record = record
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    async def fetchone(self):
+        start = time.perf_counter()
+        row = await self._cursor.fetchone()
+        self._record.elapsed += time.perf_counter() - start
+        if row is not None:
+            self._record.rows += 1
+        return row
+
+    async def fetchall(self):
+        start = time.perf_counter()
+        rows = await self._cursor.fetchall()
+        self._record.elapsed += time.perf_counter() - start
+        self._record.rows += len(rows)
+        return rows
+
+    async def fetchmany(self, size: Optional[int] = None):
+        start = time.perf_counter()
+        rows = await (self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany())
+        self._record.elapsed += time.perf_counter() - start
+        self._record.rows += len(rows)
+        return rows
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            row = await self.fetchone()
+            if row is None:
+                break
+            yield row
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._cursor.close()
+
+
+class _ProfiledResult:
+    """与 aiosqlite 的 execute 返回值一样，既可 await 也可 async with"""
+
+    def __init__(self, conn: aiosqlite.Connection, profiler: SqlProfiler, method: str, sql: str, parameters: Any):
+        self._conn = conn
+        self._profiler = profiler
+        self._method = method
+        self._sql = sql
+        self._parameters = parameters
+        self._cursor: Optional[_ProfiledCursor] = None
+
+    async def _run(self) -> _ProfiledCursor:
+        start = time.perf_counter()
+        execute = getattr(self._conn, self._method)
+        if self._parameters is None:
+            cursor = await execute(self._sql)
+        else:
+            cursor = await execute(self._sql, self._parameters)
+        record = self._profiler.record(self._sql, start)
+        record.elapsed = time.perf_counter() - start
+        if cursor.rowcount and cursor.rowcount > 0:
+            record.rows = cursor.rowcount
+        return _ProfiledCursor(cursor, record)
+
+    def __await__(self):
+        return self._run().__await__()
+
+    async def __aenter__(self) -> _ProfiledCursor:
+        self._cursor = await self._run()
+        return self._cursor
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._cursor is not None:
+            await self._cursor.close()
+
+
+class ProfiledConnection:
+    """aiosqlite.Connection 的透明代理，将每条语句的耗时与行数记录到当前指令"""
+
+    def __init__(self, conn: aiosqlite.Connection, profiler: SqlProfiler):
+        self._conn = conn
+        self._profiler = profiler
+
+    @property
+    def raw(self) -> aiosqlite.Connection:
+        return self._conn
+
+    @property
+    def row_factory(self):
+        return self._conn.row_factory
+
+    @row_factory.setter
+    def row_factory(self, factory):
+        self._conn.row_factory = factory
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def execute(self, sql: str, parameters: Any = None) -> _ProfiledResult:
+        return _ProfiledResult(self._conn, self._profiler, "execute", sql, parameters)
+
+    def executemany(self, sql: str, parameters: Any) -> _ProfiledResult:
+        return _ProfiledResult(self._conn, self._profiler, "executemany", sql, parameters)
@@ -0,0 +1,84 @@
+# data/unit_of_work.py
+
+from contextvars import ContextVar
+from dataclasses import fields
+from typing import Any, Optional, Dict, Iterable, List, Tuple
+
+from ..models import Player
+
+
+class UnitOfWork:
+    """
+    单次指令内的工作单元。
+    identity_map 按 user_id 缓存本次指令已读取的玩家，保证同一玩家只查询一次；
+    dirty 记录待写入的玩家，在指令输出消息前及结束时统一落库。
+    每个读出的玩家对象都保存一份读取时的快照，落库时只写入相对快照改动过的字段，
+    累加型字段写为增量，不会覆盖其他指令在此期间以SQL直接做出的修改。
+    """
+
+    # 落库时按 col = col + 增量 写入的字段
+    ADDITIVE_FIELDS = ("gold", "experience")
+
+    def __init__(self):
+        self.identity_map: Dict[str, Player] = {}
+        # 按对象身份记录，被 evict 的旧对象之后再登记写入也能找到自己的快照
+        self.dirty: Dict[int, Player] = {}
+        self._snapshots: Dict[int, Tuple[Player, Dict[str, Any]]] = {}
+
+    def get(self, user_id: str) -> Optional[Player]:
+        return self.identity_map.get(user_id)
+
+    def register(self, player: Player) -> Player:
+        """登记从数据库读出的玩家；若已缓存则以缓存为准，保证同一 user_id 只有一个对象"""
+        cached = self.identity_map.setdefault(player.user_id, player)
+        if cached is player:
+            self._snapshot(player)
+        return cached
+
+    def mark_dirty(self, player: Player):
+        self.identity_map.setdefault(player.user_id, player)
+        self.dirty[id(player)] = player
+
+    def take_dirty(self, user_ids: Optional[Iterable[str]] = None) -> List[Player]:
+        """取出待写入的玩家，不指定 user_ids 时取出全部"""
+        if user_ids is None:
+            players, self.dirty = list(self.dirty.values()), {}
+            return players
+        wanted = set(user_ids)
+        players = [player for player in self.dirty.values() if player.user_id in wanted]
+        for player in players:
+            del self.dirty[id(player)]
+        return players
+
+    def changes(self, player: Player) -> Optional[Dict[str, Any]]:
+        """相对读取时快照改动过的字段；累加型字段给出增量。没有快照（并非从库中读出）时返回 None"""
+        entry = self._snapshots.get(id(player))
+        if entry is None:
+            return None
+        snapshot = entry[1]
+        changed = {}
+        for name, before in snapshot.items():
+            after = getattr(player, name)
+            if after == before:
+                continue
+            changed[name] = after - before if name in self.ADDITIVE_FIELDS else after
+        return changed
+
+    def written(self, player: Player):
+        """玩家已落库，以当前值作为新的快照"""
+        self._snapshot(player)
+
+    def evict(self, user_ids: Optional[Iterable[str]] = None):
+        """玩家数据被直接SQL修改后，丢弃对应缓存，不指定 user_ids 时清空全部；快照保留给仍持有旧对象的调用方"""
+        if user_ids is None:
+            self.identity_map.clear()
+            return
+        for uid in user_ids:
+            self.identity_map.pop(uid, None)
+
+    def _snapshot(self, player: Player):
+        # 同时持有对象本身，保证 id(player) 在工作单元存续期间不被复用
+        self._snapshots[id(player)] = (player, {f.name: getattr(player, f.name) for f in fields(Player) if f.name != "user_id"})
+
+
+current_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar("xiuxian_unit_of_work", default=None)
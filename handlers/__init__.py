@@ -8,6 +8,7 @@ from .realm_handler import RealmHandler
 from .misc_handler import MiscHandler
 from .equipment_handler import EquipmentHandler
 from .bank_handler import BankHandler
+from .admin_handler import AdminHandler
 
 __all__ = [
     "PlayerHandler",
@@ -17,5 +18,6 @@ __all__ = [
     "RealmHandler",
     "MiscHandler",
     "EquipmentHandler",
-    "BankHandler"
+    "BankHandler",
+    "AdminHandler"
 ]
\ No newline at end of file
@@ -0,0 +1,163 @@
+# handlers/admin_handler.py
+import time
+from typing import List, Optional, Tuple
+
+from astrbot.api.event import AstrMessageEvent
+from astrbot.api import AstrBotConfig
+from ..data import DataBase
+from ..config_manager import ConfigManager
+from ..core import SeasonManager
+from ..models import PlayerFilter
+from .utils import format_suggestions
+
+CMD_SQL_PROFILE = "修仙SQL统计"
+CMD_NEW_SEASON = "修仙新赛季"
+CMD_SEASON_RANKING = "修仙赛季排名"
+CMD_GRANT_GOLD = "修仙补偿灵石"
+CMD_GRANT_ITEM = "修仙补偿物品"
+
+GRANT_FILTER_HELP = "可选筛选：境界=最低-最高（境界名或序号）、宗门=宗门名、活跃=N（N天内签到过）"
+
+__all__ = ["AdminHandler"]
+
+class AdminHandler:
+    # 管理员指令处理器
+
+    def __init__(self, db: DataBase, config: AstrBotConfig, config_manager: ConfigManager):
+        self.db = db
+        self.config = config
+        self.config_manager = config_manager
+        self.season_manager = SeasonManager(db, config, config_manager)
+
+    async def handle_sql_profile(self, event: AstrMessageEvent, action: str):
+        """查看或重置按指令归集的SQL统计"""
+        profiler = self.db.profiler
+        if not profiler.enabled:
+            yield event.plain_result("SQL分析器未启用，请在插件配置「诊断工具」中开启后重载插件。")
+            return
+
+        if action == "重置":
+            profiler.reset()
+            yield event.plain_result("SQL统计数据已清空。")
+            return
+
+        yield event.plain_result(profiler.format_report())
+
+    async def handle_new_season(self, event: AstrMessageEvent, confirm: str):
+        """归档本赛季排名并重置全服玩家"""
+        if confirm != "确认":
+            yield event.plain_result(
+                f"⚠️ 开启新赛季将归档当前排名，并重置所有玩家的境界、修为、灵石、背包、装备与钱庄存款，且无法撤销。\n"
+                f"确认执行请发送「{CMD_NEW_SEASON} 确认」。"
+            )
+            return
+
+        pending = await self.db.get_pending_season_reset()
+        if pending and not self.season_manager.running:
+            yield event.plain_result(f"检测到第 {pending['season_id']} 赛季重置曾被中断，正在从断点继续...")
+            processed = await self.season_manager.resume_pending()
+            if processed is None:
+                yield event.plain_result("赛季重置正在进行中，请稍候。")
+            else:
+                yield event.plain_result(f"第 {pending['season_id']} 赛季重置已完成，共重置 {processed} 名道友。")
+            return
+
+        yield event.plain_result("正在归档排名并重置全服玩家，请稍候...")
+        _, msg = await self.season_manager.start_new_season()
+        yield event.plain_result(msg)
+
+    async def handle_season_ranking(self, event: AstrMessageEvent, season_id: int):
+        """查看已归档赛季的最终排名"""
+        if season_id <= 0:
+            season_id = await self.db.get_latest_season_id()
+        if season_id <= 0:
+            yield event.plain_result("尚无已归档的赛季。")
+            return
+
+        rows = await self.db.get_season_archive(season_id, 10)
+        if not rows:
+            yield event.plain_result(f"未找到第 {season_id} 赛季的归档排名。")
+            return
+
+        levels = self.config_manager.levels
+        lines = [f"🏆 第 {season_id} 赛季最终排名", "━━━━━━━━━━━━━━━"]
+        for row in rows:
+            index = row["level_index"]
+            level_name = levels.name_of(index)
+            name = row["dao_name"] or row["user_id"]
+            lines.append(f"{row['rank']}. {name}【{level_name}】修为 {row['experience']}")
+        lines.append("━━━━━━━━━━━━━━━")
+        yield event.plain_result("\n".join(lines))
+
+    async def _parse_grant_args(self, event: AstrMessageEvent, command: str) -> Tuple[List[str], Optional[PlayerFilter], str]:
+        """从原始消息中解析位置参数与 key=value 形式的筛选条件"""
+        text = event.get_message_str().strip()
+        if command in text:
+            text = text.split(command, 1)[1]
+        positional, player_filter = [], PlayerFilter()
+        for token in text.split():
+            if "=" not in token:
+                positional.append(token)
+                continue
+            key, value = token.split("=", 1)
+            if key == "境界":
+                bounds = value.split("-", 1)
+                indexes = []
+                for bound in bounds:
+                    if bound.isdigit():
+                        indexes.append(int(bound))
+                    elif self.config_manager.levels.index_of(bound) is not None:
+                        indexes.append(self.config_manager.levels.index_of(bound))
+                    else:
+                        return positional, None, f"无法识别的境界「{bound}」。"
+                player_filter.min_level = indexes[0]
+                player_filter.max_level = indexes[-1]
+            elif key == "宗门":
+                sect = await self.db.get_sect_by_name(value)
+                if not sect:
+                    return positional, None, f"未找到宗门「{value}」。"
+                player_filter.sect_id = sect["id"]
+            elif key == "活跃":
+                if not value.isdigit():
+                    return positional, None, "活跃天数需为正整数。"
+                player_filter.active_since = time.time() - int(value) * 24 * 60 * 60
+            else:
+                return positional, None, f"未知的筛选条件「{key}」。{GRANT_FILTER_HELP}"
+        return positional, player_filter, ""
+
+    async def handle_grant_gold(self, event: AstrMessageEvent):
+        """按条件为玩家批量发放灵石"""
+        args, player_filter, error = await self._parse_grant_args(event, CMD_GRANT_GOLD)
+        if player_filter is None:
+            yield event.plain_result(error)
+            return
+        if len(args) != 1 or not args[0].isdigit() or int(args[0]) <= 0:
+            yield event.plain_result(f"用法：{CMD_GRANT_GOLD} <数量> [筛选条件]\n{GRANT_FILTER_HELP}")
+            return
+
+        amount = int(args[0])
+        count = await self.db.grant_gold(amount, player_filter)
+        yield event.plain_result(f"补偿完成！共为 {count} 名道友发放 {amount} 灵石。")
+
+    async def handle_grant_item(self, event: AstrMessageEvent):
+        """按条件为玩家批量发放物品"""
+        args, player_filter, error = await self._parse_grant_args(event, CMD_GRANT_ITEM)
+        if player_filter is None:
+            yield event.plain_result(error)
+            return
+        if not 1 <= len(args) <= 2 or (len(args) == 2 and (not args[1].isdigit() or int(args[1]) <= 0)):
+            yield event.plain_result(f"用法：{CMD_GRANT_ITEM} <物品名> [数量] [筛选条件]\n{GRANT_FILTER_HELP}")
+            return
+
+        item_name = args[0]
+        quantity = int(args[1]) if len(args) == 2 else 1
+        item = self.config_manager.get_item_by_name(item_name)
+        if not item:
+            # 全服发放要求名称完全一致，这里只给出候选提示
+            suggestions = self.config_manager.suggest_items(item_name)
+            yield event.plain_result(f"未找到名为「{item_name}」的物品。{format_suggestions(suggestions)}")
+            return
+
+        item_id, _ = item
+        count = await self.db.grant_items({item_id: quantity}, player_filter)
+        yield event.plain_result(f"补偿完成！共为 {count} 名道友发放「{item_name}」x{quantity}。")
@@ -4,6 +4,7 @@ from astrbot.api.event import AstrMessageEvent
 from astrbot.api import AstrBotConfig
 from astrbot.core.message.components import At
 from ..data import DataBase
+from ..config_manager import ConfigManager
 from ..models import Player
 from .utils import player_required
 
@@ -18,9 +19,10 @@ __all__ = ["BankHandler"]
 class BankHandler:
     """钱庄相关指令处理器"""
     
-    def __init__(self, db: DataBase, config: AstrBotConfig):
+    def __init__(self, db: DataBase, config: AstrBotConfig, config_manager: ConfigManager):
         self.db = db
         self.config = config
+        self.config_manager = config_manager
 
     @player_required
     async def handle_bank_info(self, player: Player, event: AstrMessageEvent):
@@ -49,7 +51,7 @@ class BankHandler:
                 hours_total = deposit['duration_hours']
                 is_mature = current_time >= deposit['mature_time']
                 
-                rate_per_hour = self.config["VALUES"]["BANK_FIXED_RATE_PER_HOUR"]
+                rate_per_hour = self.config_manager.settings.values.bank_fixed_rate_per_hour
                 current_value = int(deposit['amount'] * (rate_per_hour ** hours_passed))
                 mature_value = int(deposit['amount'] * (rate_per_hour ** hours_total))
                 
@@ -69,8 +71,8 @@ class BankHandler:
         # 活期存款信息
         if current_deposit:
             hours_passed = (current_time - current_deposit['deposit_time']) / 3600
-            min_hours = self.config["VALUES"]["BANK_CURRENT_MIN_HOURS"]
-            rate_per_hour = self.config["VALUES"]["BANK_CURRENT_RATE_PER_HOUR"]
+            min_hours = self.config_manager.settings.values.bank_current_min_hours
+            rate_per_hour = self.config_manager.settings.values.bank_current_rate_per_hour
             
             can_withdraw = hours_passed >= min_hours
             current_value = int(current_deposit['amount'] * (rate_per_hour ** hours_passed))
@@ -101,8 +103,8 @@ class BankHandler:
         """定期存款"""
         # 检查是否提供了参数
         if amount <= 0 or hours <= 0:
-            min_hours = self.config["VALUES"]["BANK_FIXED_MIN_HOURS"]
-            rate_per_hour = self.config["VALUES"]["BANK_FIXED_RATE_PER_HOUR"]
+            min_hours = self.config_manager.settings.values.bank_fixed_min_hours
+            rate_per_hour = self.config_manager.settings.values.bank_fixed_rate_per_hour
             rate_percent = (rate_per_hour - 1) * 100
             
             msg = [
@@ -126,7 +128,7 @@ class BankHandler:
             yield event.plain_result("\n".join(msg))
             return
         
-        min_hours = self.config["VALUES"]["BANK_FIXED_MIN_HOURS"]
+        min_hours = self.config_manager.settings.values.bank_fixed_min_hours
         if hours < min_hours:
             yield event.plain_result(f"定期存款最少需要 {min_hours} 小时！")
             return
@@ -147,7 +149,7 @@ class BankHandler:
         )
         
         # 计算到期收益
-        rate_per_hour = self.config["VALUES"]["BANK_FIXED_RATE_PER_HOUR"]
+        rate_per_hour = self.config_manager.settings.values.bank_fixed_rate_per_hour
         mature_value = int(amount * (rate_per_hour ** hours))
         profit = mature_value - amount
         
@@ -169,8 +171,8 @@ class BankHandler:
         """活期存款"""
         # 检查是否提供了参数
         if amount <= 0:
-            min_hours = self.config["VALUES"]["BANK_CURRENT_MIN_HOURS"]
-            rate_per_hour = self.config["VALUES"]["BANK_CURRENT_RATE_PER_HOUR"]
+            min_hours = self.config_manager.settings.values.bank_current_min_hours
+            rate_per_hour = self.config_manager.settings.values.bank_current_rate_per_hour
             rate_percent = (rate_per_hour - 1) * 100
             
             msg = [
@@ -207,7 +209,7 @@ class BankHandler:
         current_time = time.time()
         await self.db.create_or_update_current_deposit(player.user_id, amount, current_time)
         
-        min_hours = self.config["VALUES"]["BANK_CURRENT_MIN_HOURS"]
+        min_hours = self.config_manager.settings.values.bank_current_min_hours
         
         msg = [
             "✅ 活期存款成功！",
@@ -253,7 +255,7 @@ class BankHandler:
             return
         
         current_time = time.time()
-        rate_per_hour = self.config["VALUES"]["BANK_FIXED_RATE_PER_HOUR"]
+        rate_per_hour = self.config_manager.settings.values.bank_fixed_rate_per_hour
         
         # 筛选到期的存款
         mature_deposits = [d for d in deposits if current_time >= d['mature_time']]
@@ -310,7 +312,7 @@ class BankHandler:
         
         current_time = time.time()
         hours_passed = (current_time - deposit['deposit_time']) / 3600
-        min_hours = self.config["VALUES"]["BANK_CURRENT_MIN_HOURS"]
+        min_hours = self.config_manager.settings.values.bank_current_min_hours
         
         if hours_passed < min_hours:
             remaining = int(min_hours - hours_passed)
@@ -318,7 +320,7 @@ class BankHandler:
             return
         
         # 计算当前总价值（本金+利息）
-        rate_per_hour = self.config["VALUES"]["BANK_CURRENT_RATE_PER_HOUR"]
+        rate_per_hour = self.config_manager.settings.values.bank_current_rate_per_hour
         current_total_value = int(deposit['amount'] * (rate_per_hour ** hours_passed))
         
         if amount > current_total_value:
@@ -1,4 +1,8 @@
 # handlers/combat_handler.py
+import asyncio
+import contextvars
+import time
+from typing import Dict, Optional, Tuple
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api import AstrBotConfig
 from astrbot.core.message.components import At
@@ -21,6 +25,9 @@ class CombatHandler:
         self.config = config
         self.config_manager = config_manager
         self.battle_manager = BattleManager(db, config, config_manager)
+        # 查看世界boss的渲染结果，键为 (Boss状态版本, 配置版本, 分钟)
+        self._boss_list_cache: Optional[Tuple[Tuple[int, int, int], str]] = None
+        self._boss_list_pending: Dict[Tuple[int, int, int], asyncio.Task] = {}
 
     @player_required
     async def handle_spar(self, attacker: Player, event: AstrMessageEvent):
@@ -63,15 +70,36 @@ class CombatHandler:
         yield event.plain_result("\n".join(report_lines))
 
     async def handle_boss_list(self, event: AstrMessageEvent):
-        import time
-        active_bosses_with_templates = await self.battle_manager.ensure_bosses_are_spawned()
+        yield event.plain_result(await self._boss_list_text())
+
+    async def _boss_list_text(self) -> str:
+        """
+        渲染结果只随Boss气血、伤害榜、生成与击败而变，按版本号缓存；倒计时按分钟显示，分钟也计入缓存键。
+        缓存失效时同时到达的请求共享同一次渲染。
+        """
+        key = (self.battle_manager.revision.value, self.config_manager.version, int(time.time() // 60))
+        if self._boss_list_cache is not None and self._boss_list_cache[0] == key:
+            return self._boss_list_cache[1]
+        task = self._boss_list_pending.get(key)
+        if task is None:
+            # 在空白上下文中渲染，不继承发起请求的指令的工作单元、SQL统计与配置快照
+            task = contextvars.Context().run(asyncio.create_task, self._render_boss_list())
+            self._boss_list_pending[key] = task
+            task.add_done_callback(lambda _: self._boss_list_pending.pop(key, None))
+        # 某个请求被取消时不影响其他等待同一次渲染的请求
+        text = await asyncio.shield(task)
+        self._boss_list_cache = (key, text)
+        return text
+
+    async def _render_boss_list(self) -> str:
+        active_bosses_with_templates = await self.battle_manager.list_active_bosses()
         
         # 获取所有Boss的冷却信息
         all_boss_cooldowns = await self.db.get_all_boss_cooldowns()
         current_time = time.time()
         
         # 获取所有Boss模板，包括冷却中的
-        all_boss_templates = self.config_manager.boss_data
+        all_boss_templates = self.config_manager.bosses
         cooldown_bosses = []
         for boss_id, cooldown_info in all_boss_cooldowns.items():
             if cooldown_info['respawn_at'] > current_time:
@@ -81,8 +109,10 @@ class CombatHandler:
                     cooldown_bosses.append((boss_id, cooldown_info, template_config))
 
         if not active_bosses_with_templates and not cooldown_bosses:
-            yield event.plain_result("天地间一片祥和，暂无妖兽作乱。")
-            return
+            return "天地间一片祥和，暂无妖兽作乱。"
+
+        # 一次取出所有Boss的伤害贡献前三
+        leaderboards = await self.db.get_boss_leaderboards(3)
 
         # 分类Boss
         alive_bosses = []
@@ -114,14 +144,14 @@ class CombatHandler:
                         boss_level_name = instance.get_level_name(self.config_manager)
                         
                         # 从配置中获取原始标签信息
-                        boss_config = self.config_manager.boss_data.get(instance.boss_id, {})
-                        boss_tags = boss_config.get('tags', [])
+                        boss_config = self.config_manager.bosses.get(instance.boss_id)
+                        boss_tags = boss_config.tags if boss_config else ()
                         
                         # 构建标签显示
                         tags_display = self._format_boss_tags(boss_tags)
                         
                         # 构建Boss名称显示（包含标签前缀）
-                        boss_name_display = self._format_boss_name(boss_tags, boss_config.get('name', template.name))
+                        boss_name_display = self._format_boss_name(boss_tags, boss_config.name if boss_config else template.name)
                         
                         report.append(
                             f"【{boss_name_display}】 (ID: {instance.boss_id})\n"
@@ -129,10 +159,10 @@ class CombatHandler:
                             f"  {tags_display}\n"
                             f"  ❤️剩余生命: {instance.current_hp}/{instance.max_hp}"
                         )
-                        participants = await self.db.get_boss_participants(instance.boss_id)
+                        participants = leaderboards.get(instance.boss_id)
                         if participants:
                             report.append("  - 伤害贡献榜 -")
-                            for p_data in participants[:3]:
+                            for p_data in participants:
                                 report.append(f"    - {p_data['user_name']}: {p_data['total_damage']} 伤害")
                         report.append("")  # 添加空行分隔
 
@@ -145,14 +175,14 @@ class CombatHandler:
                 boss_level_name = instance.get_level_name(self.config_manager)
                 
                 # 从配置中获取原始标签信息
-                boss_config = self.config_manager.boss_data.get(instance.boss_id, {})
-                boss_tags = boss_config.get('tags', [])
+                boss_config = self.config_manager.bosses.get(instance.boss_id)
+                boss_tags = boss_config.tags if boss_config else ()
                 
                 # 构建标签显示
                 tags_display = self._format_boss_tags(boss_tags)
                 
                 # 构建Boss名称显示（包含标签前缀）
-                boss_name_display = self._format_boss_name(boss_tags, boss_config.get('name', template.name))
+                boss_name_display = self._format_boss_name(boss_tags, boss_config.name if boss_config else template.name)
                 
                 report.append(
                     f"【{boss_name_display}】 (ID: {instance.boss_id})\n"
@@ -160,10 +190,10 @@ class CombatHandler:
                     f"  {tags_display}\n"
                     f"  ❤️剩余生命: {instance.current_hp}/{instance.max_hp}"
                 )
-                participants = await self.db.get_boss_participants(instance.boss_id)
+                participants = leaderboards.get(instance.boss_id)
                 if participants:
                     report.append("  - 伤害贡献榜 -")
-                    for p_data in participants[:3]:
+                    for p_data in participants:
                         report.append(f"    - {p_data['user_name']}: {p_data['total_damage']} 伤害")
                 report.append("")  # 添加空行分隔
 
@@ -188,8 +218,8 @@ class CombatHandler:
                 remaining_hours = int(remaining_time / 3600)
                 remaining_minutes = int((remaining_time % 3600) / 60)
                 
-                boss_name = template_config.get('name', 'Unknown')
-                boss_tags = template_config.get('tags', [])
+                boss_name = template_config.name
+                boss_tags = template_config.tags
                 tags_display = self._format_boss_tags(boss_tags)
                 boss_name_display = self._format_boss_name(boss_tags, boss_name)
                 
@@ -204,7 +234,7 @@ class CombatHandler:
 
         report.append(f"使用「{CMD_FIGHT_BOSS} <Boss ID>」发起挑战！")
 
-        yield event.plain_result("\n".join(report).strip())
+        return "\n".join(report).strip()
 
     @player_required
     async def handle_fight_boss(self, player: Player, event: AstrMessageEvent, boss_id: str):
@@ -257,8 +287,8 @@ class CombatHandler:
         # 获取标签前缀
         prefixes = []
         for tag in tags:
-            tag_config = self.config_manager.tag_data.get(tag, {})
-            prefix = tag_config.get('name_prefix', '')
+            tag_config = self.config_manager.tags.get(tag)
+            prefix = tag_config.name_prefix if tag_config else None
             if prefix and prefix not in prefixes:
                 prefixes.append(prefix)
         
@@ -284,8 +314,8 @@ class CombatHandler:
         
         for instance, template in bosses:
             # 从配置中获取原始标签信息
-            boss_config = self.config_manager.boss_data.get(instance.boss_id, {})
-            tags = boss_config.get('tags', [])
+            boss_config = self.config_manager.bosses.get(instance.boss_id)
+            tags = boss_config.tags if boss_config else ()
             categorized = False
             
             # 按优先级分类
@@ -53,8 +53,8 @@ class MiscHandler:
             f"【{CMD_REROLL_SPIRIT_ROOT}】: 逆天改命，重置灵根。\n"
             f"【{CMD_SET_DAO_NAME} <道号>】: 设置你的道号(2-20字)。\n"
             "--- 坊市与物品 ---\n"
-            f"【{CMD_SHOP}】: 查看坊市当日商品。\n"
-            f"【{CMD_BACKPACK}】: 查看个人背包。\n"
+            f"【{CMD_SHOP} [类别]】: 查看坊市当日商品。\n"
+            f"【{CMD_BACKPACK} [类别]】: 查看个人背包。\n"
             f"【{CMD_BUY} <名> [数]】: 购买物品。\n"
             f"【{CMD_USE_ITEM} <名> [数]】: 使用丹药或穿戴法器。\n"
             f"【{CMD_MY_EQUIPMENT}】: 查看已穿戴的装备。\n"
@@ -19,7 +19,7 @@ class SectHandler:
         self.db = db
         self.config = config
         self.config_manager = config_manager
-        self.sect_manager = SectManager(db, config)
+        self.sect_manager = SectManager(db, config, config_manager)
 
     @player_required
     async def handle_create_sect(self, player: Player, event: AstrMessageEvent, sect_name: str):
@@ -64,13 +64,14 @@ class SectHandler:
             yield event.plain_result("错误：找不到你的宗门信息，可能已被解散。已将你设为散修。")
             return
 
+        # 先读取全体成员，宗主通常也在其中，随后的读取直接命中缓存
+        members = await self.db.get_sect_members(player.sect_id)
         leader_player = await self.db.get_player_by_id(sect_info['leader_id'])
         leader_info = "宗主: (信息丢失)"
 
         if leader_player and leader_player.sect_id == sect_info['id']:
             leader_info = f"宗主: {leader_player.user_id[-4:]}"
 
-        members = await self.db.get_sect_members(player.sect_id)
         member_list = [f"{m.get_level(self.config_manager)}-{m.user_id[-4:]}" for m in members]
 
         reply_msg = (
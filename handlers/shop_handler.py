@@ -3,83 +3,17 @@ import random
 from datetime import datetime
 from typing import Optional, Tuple
 from astrbot.api.event import AstrMessageEvent
-from astrbot.api import AstrBotConfig
+from astrbot.api import AstrBotConfig, logger
 from ..data import DataBase
 from ..config_manager import ConfigManager
-from ..models import Player, PlayerEffect, Item
-from .utils import player_required
+from ..models import Player
+from .utils import player_required, format_suggestions
 
 CMD_BUY = "购买"
 CMD_USE_ITEM = "使用"
 
 __all__ = ["ShopHandler"]
 
-def calculate_item_effect(item_info: Optional[Item], quantity: int) -> Tuple[Optional[PlayerEffect], str, float]:
-    if not item_info or not (effect_config := item_info.effect):
-        return None, f"【{item_info.name if item_info else '未知物品'}】似乎只是凡物，无法使用。", 0.0
-
-    effect = PlayerEffect()
-    messages = []
-
-    # 新版effect格式：直接使用属性名作为key
-    if "add_experience" in effect_config:
-        value = effect_config["add_experience"] * quantity
-        effect.experience = value
-        messages.append(f"修为+{value}")
-    
-    if "add_gold" in effect_config:
-        value = effect_config["add_gold"] * quantity
-        effect.gold = value
-        messages.append(f"灵石+{value}")
-    
-    if "add_hp" in effect_config:
-        value = effect_config["add_hp"] * quantity
-        effect.hp = value
-        messages.append(f"气血+{value}")
-    
-    if "add_max_hp" in effect_config:
-        value = effect_config["add_max_hp"] * quantity
-        effect.max_hp = value
-        messages.append(f"气血上限+{value}")
-    
-    if "add_spiritual_power" in effect_config:
-        value = effect_config["add_spiritual_power"] * quantity
-        effect.spiritual_power = value
-        messages.append(f"灵力+{value}")
-    
-    if "add_mental_power" in effect_config:
-        value = effect_config["add_mental_power"] * quantity
-        effect.mental_power = value
-        messages.append(f"精神力+{value}")
-    
-    if "add_attack" in effect_config:
-        value = effect_config["add_attack"] * quantity
-        effect.attack = value
-        messages.append(f"攻击+{value}")
-    
-    if "add_defense" in effect_config:
-        value = effect_config["add_defense"] * quantity
-        effect.defense = value
-        messages.append(f"防御+{value}")
-    
-    # 突破成功率加成（buff效果，不叠加数量）
-    breakthrough_bonus = 0.0
-    if "add_breakthrough_bonus" in effect_config:
-        breakthrough_bonus = effect_config["add_breakthrough_bonus"]
-        bonus_percent = int(breakthrough_bonus * 100)
-        messages.append(f"💫突破成功率+{bonus_percent}%")
-
-    if not messages:
-        return None, f"你研究了半天，也没能参透【{item_info.name}】的用法。", 0.0
-
-    full_message = f"✨ 你使用了 {quantity} 个【{item_info.name}】\n" + "、".join(messages) + "！"
-    
-    # 如果有突破加成，添加提示
-    if breakthrough_bonus > 0:
-        full_message += f"\n💡 提示：突破加成buff已激活，下次突破时生效！"
-    
-    return effect, full_message, breakthrough_bonus
-
 class ShopHandler:
     # 坊市相关指令处理器
     
@@ -101,15 +35,31 @@ class ShopHandler:
         else:
             return rng.randint(1, 3)
 
-    async def handle_shop(self, event: AstrMessageEvent):
+    def _category_filter(self, category: str) -> Tuple[Optional[frozenset], str]:
+        """解析类别参数，返回 (物品ID集合, 错误提示)；未指定类别时集合为None"""
+        if not category:
+            return None, ""
+        members = self.config_manager.items_in_category(category)
+        if members is None:
+            categories = "、".join(self.config_manager.item_categories)
+            return None, f"没有「{category}」这个类别。可选类别：{categories}"
+        return members, ""
+
+    async def handle_shop(self, event: AstrMessageEvent, category: str = ""):
+        members, error = self._category_filter(category)
+        if error:
+            yield event.plain_result(error)
+            return
+
         today_date = datetime.now().strftime('%Y%m%d')
-        reply_msg = f"--- 仙途坊市 ({datetime.now().strftime('%Y-%m-%d')}) ---\n"
+        title = f"仙途坊市·{category}" if category else "仙途坊市"
+        reply_msg = f"--- {title} ({datetime.now().strftime('%Y-%m-%d')}) ---\n"
         
         # 获取所有可售卖的商品
-        all_sellable_items = [item for item in self.config_manager.item_data.values() if item.price > 0]
+        all_sellable_items = self.config_manager.sellable_items
         
         # 从配置中获取每日商品数量
-        item_count = self.config["VALUES"].get("SHOP_DAILY_ITEM_COUNT", 8)
+        item_count = self.config_manager.settings.values.shop_daily_item_count
 
         if not all_sellable_items:
             reply_msg += "今日坊市暂无商品。\n"
@@ -136,6 +86,10 @@ class ShopHandler:
                 existing_inventory = inventory_dict
             
             sorted_items = sorted(daily_items, key=lambda item: item.price)
+            if members is not None:
+                sorted_items = [item for item in sorted_items if item.id in members]
+                if not sorted_items:
+                    reply_msg += f"今日坊市没有{category}上架。\n"
 
             for info in sorted_items:
                 stock = existing_inventory.get(info.id, 0)
@@ -147,13 +101,24 @@ class ShopHandler:
         yield event.plain_result(reply_msg)
 
     @player_required
-    async def handle_backpack(self, player: Player, event: AstrMessageEvent):
+    async def handle_backpack(self, player: Player, event: AstrMessageEvent, category: str = ""):
+        members, error = self._category_filter(category)
+        if error:
+            yield event.plain_result(error)
+            return
+
         inventory = await self.db.get_inventory_by_user_id(player.user_id, self.config_manager)
+        if members is not None:
+            inventory = [item for item in inventory if item['item_id'] in members]
+            if not inventory:
+                yield event.plain_result(f"道友的背包中没有{category}。")
+                return
         if not inventory:
             yield event.plain_result("道友的背包空空如也。")
             return
 
-        reply_msg = f"--- {event.get_sender_name()} 的背包 ---\n"
+        title = f"{event.get_sender_name()} 的背包·{category}" if category else f"{event.get_sender_name()} 的背包"
+        reply_msg = f"--- {title} ---\n"
         for item in inventory:
             reply_msg += f"【{item['name']}】x{item['quantity']} - {item['description']}\n"
         reply_msg += "--------------------------"
@@ -165,12 +130,18 @@ class ShopHandler:
             yield event.plain_result(f"指令格式错误。正确用法: `{CMD_BUY} <物品名> [数量]`。")
             return
 
+        # 购买会扣除灵石，只接受完整的商品名；名称不符时仅列出候选，由玩家确认后重新下单
         item_to_buy = self.config_manager.get_item_by_name(item_name)
         if not item_to_buy or item_to_buy[1].price <= 0:
-            yield event.plain_result(f"道友，小店中并无「{item_name}」这件商品。")
+            suggestions = [
+                name for name in self.config_manager.suggest_items(item_name)
+                if self.config_manager.get_item_by_name(name)[1].price > 0
+            ]
+            yield event.plain_result(f"道友，小店中并无「{item_name}」这件商品。{format_suggestions(suggestions)}")
             return
 
         item_id_to_add, target_item_info = item_to_buy
+        item_name = target_item_info.name
         today_date = datetime.now().strftime('%Y%m%d')
         
         # 检查今日商店库存
@@ -217,12 +188,15 @@ class ShopHandler:
             yield event.plain_result(f"指令格式错误。正确用法: `{CMD_USE_ITEM} <物品名> [数量]`。")
             return
 
+        # 使用会消耗物品，与购买一样只接受完整的物品名；名称不符时仅列出候选
         item_to_use = self.config_manager.get_item_by_name(item_name)
         if not item_to_use:
-            yield event.plain_result(f"背包中似乎没有名为「{item_name}」的物品。")
+            suggestions = self.config_manager.suggest_items(item_name)
+            yield event.plain_result(f"背包中似乎没有名为「{item_name}」的物品。{format_suggestions(suggestions)}")
             return
         
         target_item_id, target_item_info = item_to_use
+        item_name = target_item_info.name
         
         # 检查背包数量
         inventory_item = await self.db.get_item_from_inventory(player.user_id, target_item_id)
@@ -264,7 +238,13 @@ class ShopHandler:
 
         else:
             # 消耗品
-            effect, msg, breakthrough_bonus = calculate_item_effect(target_item_info, quantity)
+            # 效果程序在加载配置时随物品一并编译，取不到说明快照本身不完整，不在指令中临时编译
+            program = self.config_manager.get_effect_program(target_item_id)
+            if program is None:
+                logger.error(f"物品 {target_item_id}({item_name}) 缺少已编译的效果程序，请检查配置后重新加载。")
+                yield event.plain_result(f"「{item_name}」的配置有误，暂时无法使用。")
+                return
+            effect, msg, breakthrough_bonus = program.apply(quantity)
             if not effect:
                 yield event.plain_result(msg)
                 return
@@ -2,7 +2,7 @@
 # 通用工具函数和装饰器
 
 from functools import wraps
-from typing import Callable, Coroutine, AsyncGenerator
+from typing import Callable, Coroutine, AsyncGenerator, List
 
 from astrbot.api.event import AstrMessageEvent
 from ..models import Player
@@ -19,6 +19,13 @@ CMD_BACKPACK = "我的背包"
 CMD_START_XIUXIAN = "我要修仙"
 
 
+def format_suggestions(suggestions: List[str]) -> str:
+    """名称未命中时附加的候选提示，没有候选则返回空串"""
+    if not suggestions:
+        return ""
+    return "\n道友是否要找：" + "、".join(f"「{name}」" for name in suggestions)
+
+
 def player_required(func: Callable[..., Coroutine[any, any, AsyncGenerator[any, None]]]):
     """
     一个装饰器，用于需要玩家登录才能执行的指令。
@@ -1,12 +1,16 @@
+import asyncio
+import time
+from functools import wraps
 from pathlib import Path
+from typing import Optional
 from astrbot.api import logger, AstrBotConfig
-from astrbot.api.star import Context, Star, register
+from astrbot.api.star import Context, Star, StarTools, register
 from astrbot.api.event import AstrMessageEvent, filter
-from .data import DataBase, MigrationManager
+from .data import DataBase, MigrationManager, SqlProfiler, SlowCommandLog
 from .config_manager import ConfigManager
 from .handlers import (
     MiscHandler, PlayerHandler, ShopHandler, SectHandler, CombatHandler, RealmHandler,
-    EquipmentHandler, BankHandler
+    EquipmentHandler, BankHandler, AdminHandler
 )
 
 # 指令定义
@@ -47,6 +51,29 @@ CMD_TRANSFER = "转账"
 # 道号相关指令
 CMD_SET_DAO_NAME = "道号"
 
+# 管理员指令
+CMD_SQL_PROFILE = "修仙SQL统计"
+CMD_NEW_SEASON = "修仙新赛季"
+CMD_SEASON_RANKING = "修仙赛季排名"
+CMD_GRANT_GOLD = "修仙补偿灵石"
+CMD_GRANT_ITEM = "修仙补偿物品"
+
+def command_scope(func):
+    """
+    为每次指令调用建立独立的执行上下文：期间的SQL语句都归属到该指令，超时的指令会写入慢指令日志；
+    同时开启工作单元，玩家的重复读取走缓存，更新在每次回复前统一落库；并固定本次指令使用的配置快照。
+    指令耗时只统计处理逻辑本身，停在 yield 处等待框架发送回复的时间不计入。
+    """
+    @wraps(func)
+    async def wrapper(self: "XiuXianPlugin", event: AstrMessageEvent, *args, **kwargs):
+        with self.profiler.command(func.__name__, args), self.config_manager.pin():
+            async with self.db.unit_of_work():
+                async for r in func(self, event, *args, **kwargs):
+                    await self.db.flush()
+                    with self.profiler.suspend():
+                        yield r
+    return wrapper
+
 @register(
     "astrbot_plugin_xiuxian",
     "oldPeter616",
@@ -59,11 +86,34 @@ class XiuXianPlugin(Star):
         super().__init__(context)
         self.config = config
         _current_dir = Path(__file__).parent
-        self.config_manager = ConfigManager(_current_dir)
-        
-        files_config = self.config.get("FILES", {})
-        db_file = files_config.get("DATABASE_FILE", "xiuxian_data.db")
-        self.db = DataBase(db_file)
+        self.config_manager = ConfigManager(
+            _current_dir, cache_dir=StarTools.get_data_dir("xiuxian"), config=self.config
+        )
+        settings = self.config_manager.settings
+
+        diagnostics = settings.diagnostics
+        slow_log = None
+        if diagnostics.slow_command_log_enabled:
+            slow_log = SlowCommandLog(
+                StarTools.get_data_dir("xiuxian") / diagnostics.slow_command_log_file,
+                threshold_ms=diagnostics.slow_command_threshold_ms
+            )
+        self.profiler = SqlProfiler(
+            enabled=diagnostics.sql_profiler_enabled,
+            repeat_threshold=diagnostics.sql_repeat_threshold,
+            slow_log=slow_log
+        )
+        self.config_manager.on_settings_changed(
+            lambda s: self.profiler.update_thresholds(
+                s.diagnostics.sql_repeat_threshold, s.diagnostics.slow_command_threshold_ms
+            )
+        )
+        self.db = DataBase(
+            settings.files.database_file,
+            profiler=self.profiler,
+            in_memory=settings.storage.in_memory_mode,
+            checkpoint_interval=settings.storage.checkpoint_interval_seconds
+        )
 
         self.misc_handler = MiscHandler(self.db)
         self.player_handler = PlayerHandler(self.db, self.config, self.config_manager)
@@ -72,10 +122,10 @@ class XiuXianPlugin(Star):
         self.combat_handler = CombatHandler(self.db, self.config, self.config_manager)
         self.realm_handler = RealmHandler(self.db, self.config, self.config_manager)
         self.equipment_handler = EquipmentHandler(self.db, self.config_manager)
-        self.bank_handler = BankHandler(self.db, self.config)
+        self.bank_handler = BankHandler(self.db, self.config, self.config_manager)
+        self.admin_handler = AdminHandler(self.db, self.config, self.config_manager)
 
-        access_control_config = self.config.get("ACCESS_CONTROL", {})
-        self.whitelist_groups = [str(g) for g in access_control_config.get("WHITELIST_GROUPS", [])]
+        self._season_resume_task: Optional[asyncio.Task] = None
         
         logger.info("【修仙插件】XiuXianPlugin __init__ 方法成功执行完毕。")
 
@@ -86,8 +136,9 @@ class XiuXianPlugin(Star):
         - True: 允许访问
         - False: 拒绝访问
         """
+        whitelist_groups = self.config_manager.settings.access_control.whitelist_groups
         # 如果没有配置白名单，允许所有访问
-        if not self.whitelist_groups:
+        if not whitelist_groups:
             return True
         
         # 获取群组ID，私聊时为None
@@ -98,7 +149,7 @@ class XiuXianPlugin(Star):
             return True
             
         # 检查群组是否在白名单中
-        if str(group_id) in self.whitelist_groups:
+        if str(group_id) in whitelist_groups:
             return True
         
         return False
@@ -112,16 +163,41 @@ class XiuXianPlugin(Star):
             pass
 
     async def initialize(self):
+        start = time.perf_counter()
         await self.db.connect()
+        connected = time.perf_counter()
         migration_manager = MigrationManager(self.db.conn, self.config_manager)
         await migration_manager.migrate()
+        files_settings = self.config_manager.settings.files
+        if files_settings.config_hot_reload:
+            self.config_manager.start_watching(files_settings.config_poll_seconds)
+        logger.info(f"启动耗时：连接数据库 {(connected - start) * 1000:.1f}ms，"
+                    f"数据库迁移 {(time.perf_counter() - connected) * 1000:.1f}ms")
+        # 上次赛季重置若因重启中断，在后台从断点继续
+        self._season_resume_task = asyncio.create_task(self.admin_handler.season_manager.resume_pending())
+        # 世界Boss按冷却时间在后台定时重生
+        await self.combat_handler.battle_manager.scheduler.start()
         logger.info("修仙插件已加载。")
 
     async def terminate(self):
+        self.config_manager.stop_watching()
+        if self._season_resume_task and not self._season_resume_task.done():
+            self._season_resume_task.cancel()
+            # 等待进行中的分块事务回滚结束后再关闭数据库，进度停在上一个已提交的分块
+            try:
+                await self._season_resume_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"赛季重置后台任务异常结束: {e}")
+        await self.combat_handler.battle_manager.scheduler.stop()
+        # 写入世界Boss尚未落库的气血与伤害
+        await self.combat_handler.battle_manager.arena.close()
         await self.db.close()
         logger.info("修仙插件已卸载。")
         
     @filter.command(CMD_HELP, "显示帮助信息")
+    @command_scope
     async def handle_help(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -129,6 +205,7 @@ class XiuXianPlugin(Star):
         async for r in self.misc_handler.handle_help(event): yield r
         
     @filter.command(CMD_START_XIUXIAN, "开始你的修仙之路")
+    @command_scope
     async def handle_start_xiuxian(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -136,6 +213,7 @@ class XiuXianPlugin(Star):
         async for r in self.player_handler.handle_start_xiuxian(event): yield r
         
     @filter.command(CMD_PLAYER_INFO, "查看你的角色信息")
+    @command_scope
     async def handle_player_info(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -143,6 +221,7 @@ class XiuXianPlugin(Star):
         async for r in self.player_handler.handle_player_info(event): yield r
         
     @filter.command(CMD_CHECK_IN, "每日签到领取奖励")
+    @command_scope
     async def handle_check_in(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -150,6 +229,7 @@ class XiuXianPlugin(Star):
         async for r in self.player_handler.handle_check_in(event): yield r
         
     @filter.command(CMD_START_CULTIVATION, "开始闭关修炼")
+    @command_scope
     async def handle_start_cultivation(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -157,6 +237,7 @@ class XiuXianPlugin(Star):
         async for r in self.player_handler.handle_start_cultivation(event): yield r
         
     @filter.command(CMD_END_CULTIVATION, "结束闭关修炼")
+    @command_scope
     async def handle_end_cultivation(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -164,6 +245,7 @@ class XiuXianPlugin(Star):
         async for r in self.player_handler.handle_end_cultivation(event): yield r
         
     @filter.command(CMD_BREAKTHROUGH, "尝试突破当前境界")
+    @command_scope
     async def handle_breakthrough(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -171,6 +253,7 @@ class XiuXianPlugin(Star):
         async for r in self.player_handler.handle_breakthrough(event): yield r
         
     @filter.command(CMD_REROLL_SPIRIT_ROOT, "花费灵石，重置灵根")
+    @command_scope
     async def handle_reroll_spirit_root(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -178,20 +261,23 @@ class XiuXianPlugin(Star):
         async for r in self.player_handler.handle_reroll_spirit_root(event): yield r
         
     @filter.command(CMD_SHOP, "查看坊市商品")
-    async def handle_shop(self, event: AstrMessageEvent):
+    @command_scope
+    async def handle_shop(self, event: AstrMessageEvent, category: str = ""):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
             return
-        async for r in self.shop_handler.handle_shop(event): yield r
+        async for r in self.shop_handler.handle_shop(event, category): yield r
         
     @filter.command(CMD_BACKPACK, "查看你的背包")
-    async def handle_backpack(self, event: AstrMessageEvent):
+    @command_scope
+    async def handle_backpack(self, event: AstrMessageEvent, category: str = ""):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
             return
-        async for r in self.shop_handler.handle_backpack(event): yield r
+        async for r in self.shop_handler.handle_backpack(event, category): yield r
         
     @filter.command(CMD_BUY, "购买物品")
+    @command_scope
     async def handle_buy(self, event: AstrMessageEvent, item_name: str, quantity: int = 1):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -199,6 +285,7 @@ class XiuXianPlugin(Star):
         async for r in self.shop_handler.handle_buy(event, item_name, quantity): yield r
         
     @filter.command(CMD_USE_ITEM, "使用背包中的物品")
+    @command_scope
     async def handle_use(self, event: AstrMessageEvent, item_name: str, quantity: int = 1):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -206,6 +293,7 @@ class XiuXianPlugin(Star):
         async for r in self.shop_handler.handle_use(event, item_name, quantity): yield r
         
     @filter.command(CMD_CREATE_SECT, "创建你的宗门")
+    @command_scope
     async def handle_create_sect(self, event: AstrMessageEvent, sect_name: str):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -213,6 +301,7 @@ class XiuXianPlugin(Star):
         async for r in self.sect_handler.handle_create_sect(event, sect_name): yield r
         
     @filter.command(CMD_JOIN_SECT, "加入一个宗门")
+    @command_scope
     async def handle_join_sect(self, event: AstrMessageEvent, sect_name: str):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -220,6 +309,7 @@ class XiuXianPlugin(Star):
         async for r in self.sect_handler.handle_join_sect(event, sect_name): yield r
         
     @filter.command(CMD_LEAVE_SECT, "退出当前宗门")
+    @command_scope
     async def handle_leave_sect(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -227,6 +317,7 @@ class XiuXianPlugin(Star):
         async for r in self.sect_handler.handle_leave_sect(event): yield r
         
     @filter.command(CMD_MY_SECT, "查看我的宗门信息")
+    @command_scope
     async def handle_my_sect(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -234,6 +325,7 @@ class XiuXianPlugin(Star):
         async for r in self.sect_handler.handle_my_sect(event): yield r
         
     @filter.command(CMD_SPAR, "与其他玩家切磋")
+    @command_scope
     async def handle_spar(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -241,6 +333,7 @@ class XiuXianPlugin(Star):
         async for r in self.combat_handler.handle_spar(event): yield r
         
     @filter.command(CMD_BOSS_LIST, "查看当前所有世界Boss")
+    @command_scope
     async def handle_boss_list(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -248,6 +341,7 @@ class XiuXianPlugin(Star):
         async for r in self.combat_handler.handle_boss_list(event): yield r
         
     @filter.command(CMD_FIGHT_BOSS, "讨伐指定ID的世界Boss")
+    @command_scope
     async def handle_fight_boss(self, event: AstrMessageEvent, boss_id: str):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -255,6 +349,7 @@ class XiuXianPlugin(Star):
         async for r in self.combat_handler.handle_fight_boss(event, boss_id): yield r
         
     @filter.command(CMD_ENTER_REALM, "根据当前境界，探索一个随机秘境")
+    @command_scope
     async def handle_enter_realm(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -262,6 +357,7 @@ class XiuXianPlugin(Star):
         async for r in self.realm_handler.handle_enter_realm(event): yield r
         
     @filter.command(CMD_REALM_ADVANCE, "在秘境中前进")
+    @command_scope
     async def handle_realm_advance(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -269,6 +365,7 @@ class XiuXianPlugin(Star):
         async for r in self.realm_handler.handle_realm_advance(event): yield r
         
     @filter.command(CMD_LEAVE_REALM, "离开当前秘境")
+    @command_scope
     async def handle_leave_realm(self, event: AstrMessageEvent):
         if not self._check_access(event): 
             await self._send_access_denied_message(event)
@@ -277,6 +374,7 @@ class XiuXianPlugin(Star):
 
     # --- 装备指令 ---
     @filter.command(CMD_UNEQUIP, "卸下一件装备")
+    @command_scope
     async def handle_unequip(self, event: AstrMessageEvent, subtype_name: str):
         if not self._check_access(event):
             await self._send_access_denied_message(event)
@@ -284,6 +382,7 @@ class XiuXianPlugin(Star):
         async for r in self.equipment_handler.handle_unequip(event, subtype_name): yield r
 
     @filter.command(CMD_MY_EQUIPMENT, "查看当前装备")
+    @command_scope
     async def handle_my_equipment(self, event: AstrMessageEvent):
         if not self._check_access(event):
             await self._send_access_denied_message(event)
@@ -292,6 +391,7 @@ class XiuXianPlugin(Star):
 
     # --- 钱庄指令 ---
     @filter.command(CMD_BANK_INFO, "查看钱庄信息")
+    @command_scope
     async def handle_bank_info(self, event: AstrMessageEvent):
         if not self._check_access(event):
             await self._send_access_denied_message(event)
@@ -299,6 +399,7 @@ class XiuXianPlugin(Star):
         async for r in self.bank_handler.handle_bank_info(event): yield r
 
     @filter.command(CMD_BANK_FIXED_DEPOSIT, "定期存款")
+    @command_scope
     async def handle_fixed_deposit(self, event: AstrMessageEvent, amount: int = 0, hours: int = 0):
         if not self._check_access(event):
             await self._send_access_denied_message(event)
@@ -306,6 +407,7 @@ class XiuXianPlugin(Star):
         async for r in self.bank_handler.handle_fixed_deposit(event, amount, hours): yield r
 
     @filter.command(CMD_BANK_CURRENT_DEPOSIT, "活期存款")
+    @command_scope
     async def handle_current_deposit(self, event: AstrMessageEvent, amount: int = 0):
         if not self._check_access(event):
             await self._send_access_denied_message(event)
@@ -313,6 +415,7 @@ class XiuXianPlugin(Star):
         async for r in self.bank_handler.handle_current_deposit(event, amount): yield r
 
     @filter.command(CMD_BANK_WITHDRAW, "取款")
+    @command_scope
     async def handle_withdraw(self, event: AstrMessageEvent, deposit_type: str = "", amount: int = 0):
         if not self._check_access(event):
             await self._send_access_denied_message(event)
@@ -334,6 +437,7 @@ class XiuXianPlugin(Star):
             yield event.plain_result(f"取款类型错误！请使用「{CMD_BANK_WITHDRAW} 定期」或「{CMD_BANK_WITHDRAW} 活期 [金额]」")
 
     @filter.command(CMD_TRANSFER, "转账")
+    @command_scope
     async def handle_transfer(self, event: AstrMessageEvent, amount: int = 0):
         if not self._check_access(event):
             await self._send_access_denied_message(event)
@@ -342,8 +446,40 @@ class XiuXianPlugin(Star):
 
     # --- 道号指令 ---
     @filter.command(CMD_SET_DAO_NAME, "设置道号")
+    @command_scope
     async def handle_set_dao_name(self, event: AstrMessageEvent, dao_name: str = ""):
         if not self._check_access(event):
             await self._send_access_denied_message(event)
             return
-        async for r in self.player_handler.handle_set_dao_name(event, dao_name): yield r
\ No newline at end of file
+        async for r in self.player_handler.handle_set_dao_name(event, dao_name): yield r
+
+    # --- 管理员指令 ---
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command(CMD_SQL_PROFILE, "查看按指令统计的SQL开销")
+    @command_scope
+    async def handle_sql_profile(self, event: AstrMessageEvent, action: str = ""):
+        async for r in self.admin_handler.handle_sql_profile(event, action): yield r
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command(CMD_NEW_SEASON, "归档排名并开启新赛季")
+    @command_scope
+    async def handle_new_season(self, event: AstrMessageEvent, confirm: str = ""):
+        async for r in self.admin_handler.handle_new_season(event, confirm): yield r
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command(CMD_SEASON_RANKING, "查看已归档赛季的最终排名")
+    @command_scope
+    async def handle_season_ranking(self, event: AstrMessageEvent, season_id: int = 0):
+        async for r in self.admin_handler.handle_season_ranking(event, season_id): yield r
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command(CMD_GRANT_GOLD, "按条件批量补偿灵石")
+    @command_scope
+    async def handle_grant_gold(self, event: AstrMessageEvent):
+        async for r in self.admin_handler.handle_grant_gold(event): yield r
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command(CMD_GRANT_ITEM, "按条件批量补偿物品")
+    @command_scope
+    async def handle_grant_item(self, event: AstrMessageEvent):
+        async for r in self.admin_handler.handle_grant_item(event): yield r
@@ -0,0 +1,191 @@
+# mapped_catalog.py
+# 编译后配置快照的二进制格式，供多个进程以只读 mmap 共享同一份数据。
+#
+# 文件布局（整数均为小端）：
+#   文件头   MAGIC | 内容哈希(64字节) | 分区数 u32
+#   分区表   每项：名称长度 u16 | 名称 | 类型 u8 | 起始偏移 u64 | 长度 u64
+#   映射分区 条目数 u32 | 条目表(键偏移 u32, 键长 u32, 值偏移 u32, 值长 u32)×N
+#            | 按键排序的条目序号 u32×N | 键与值的原始字节
+#   整体分区 单个 pickle 对象
+# 映射分区中的每条记录单独序列化，访问时才解码，且只解码一次。
+
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"XXCATLG1"
+HASH_SIZE = 64
+_HEADER = struct.Struct(f"<{len(MAGIC)}s{HASH_SIZE}sI")
+_SECTION_NAME = struct.Struct("<H")
+_SECTION = struct.Struct("<BQQ")
+_COUNT = struct.Struct("<I")
+_ENTRY = struct.Struct("<IIII")
+_ORDER = struct.Struct("<I")
+
+KIND_MAP = 0
+KIND_BLOB = 1
+
+# 快照中按键访问的大表，逐条存放；其余属性整体存放
+MAP_SECTIONS = (
+    "item_data", "effect_programs", "bosses", "monsters", "tags", "realm_data",
+    "item_name_to_id", "realm_name_to_id", "boss_name_to_id",
+)
+_UNSTORED = ("content_hash", "version")
+
+
+def _encode_map(records: Dict[str, Any]) -> bytes:
+    keys = [key.encode("utf-8") for key in records]
+    values = [pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL) for value in records.values()]
+    count = len(keys)
+    data_start = _COUNT.size + count * (_ENTRY.size + _ORDER.size)
+
+    entries, blobs, offset = [], [], data_start
+    for key, value in zip(keys, values):
+        entries.append(_ENTRY.pack(offset, len(key), offset + len(key), len(value)))
+        blobs.extend((key, value))
+        offset += len(key) + len(value)
+    order = sorted(range(count), key=keys.__getitem__)
+    return b"".join([_COUNT.pack(count), *entries, *(_ORDER.pack(i) for i in order), *blobs])
+
+
+def write_catalog(path: Path, snapshot: Any):
+    """把快照写成二进制目录文件，先写临时文件再原子替换"""
+    sections: List[Tuple[str, int, bytes]] = []
+    for name, value in vars(snapshot).items():
+        if name in _UNSTORED:
+            continue
+        if name in MAP_SECTIONS:
+            sections.append((name, KIND_MAP, _encode_map(value)))
+        else:
+            sections.append((name, KIND_BLOB, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    table_size = sum(_SECTION_NAME.size + len(name.encode("utf-8")) + _SECTION.size for name, _, _ in sections)
+    offset = _HEADER.size + table_size
+    parts = [_HEADER.pack(MAGIC, snapshot.content_hash.encode("ascii"), len(sections))]
+    for name, kind, payload in sections:
+        encoded = name.encode("utf-8")
+        parts.append(_SECTION_NAME.pack(len(encoded)) + encoded + _SECTION.pack(kind, offset, len(payload)))
+        offset += len(payload)
+    parts.extend(payload for _, _, payload in sections)
+
+    write_atomic(path, b"".join(parts))
+
+
+def write_atomic(path: Path, data: bytes):
+    """
+    先写入同目录下的唯一临时文件再原子替换目标文件。
+    临时文件名各不相同，多个进程同时写同一目标时不会互相截断对方尚未替换的临时文件。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False) as f:
+        tmp_path = Path(f.name)
+        try:
+            f.write(data)
+        except BaseException:
+            f.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+class MappedRecords(Mapping):
+    """只读映射视图：按键二分查找条目，值在首次访问时解码并缓存"""
+
+    def __init__(self, buffer: mmap.mmap, base: int):
+        self._buffer = buffer
+        self._base = base
+        self._count = _COUNT.unpack_from(buffer, base)[0]
+        self._order_start = base + _COUNT.size + self._count * _ENTRY.size
+        self._cache: Dict[int, Any] = {}
+
+    def _entry(self, index: int) -> Tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self._buffer, self._base + _COUNT.size + index * _ENTRY.size)
+
+    def _key(self, index: int) -> bytes:
+        key_offset, key_length, _, _ = self._entry(index)
+        start = self._base + key_offset
+        return self._buffer[start:start + key_length]
+
+    def _sorted_index(self, position: int) -> int:
+        return _ORDER.unpack_from(self._buffer, self._order_start + position * _ORDER.size)[0]
+
+    def _find(self, key: str) -> Optional[int]:
+        if not isinstance(key, str):
+            return None
+        target = key.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(self._sorted_index(mid)) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            index = self._sorted_index(lo)
+            if self._key(index) == target:
+                return index
+        return None
+
+    def _value(self, index: int) -> Any:
+        if index not in self._cache:
+            _, _, value_offset, value_length = self._entry(index)
+            start = self._base + value_offset
+            self._cache[index] = pickle.loads(self._buffer[start:start + value_length])
+        return self._cache[index]
+
+    def __getitem__(self, key: str) -> Any:
+        index = self._find(key)
+        if index is None:
+            raise KeyError(key)
+        return self._value(index)
+
+    def __contains__(self, key: object) -> bool:
+        return self._find(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        # 按写入时的顺序遍历，与原字典一致
+        for index in range(self._count):
+            yield self._key(index).decode("utf-8")
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def open_catalog(path: Path, content_hash: str) -> Optional[Dict[str, Any]]:
+    """映射目录文件，返回 {分区名: 映射视图或延迟解码函数}；文件缺失或哈希不符时返回None"""
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(buffer) < _HEADER.size:
+        buffer.close()
+        return None
+    magic, stored_hash, section_count = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or stored_hash.decode("ascii") != content_hash:
+        buffer.close()
+        return None
+
+    sections: Dict[str, Any] = {}
+    position = _HEADER.size
+    for _ in range(section_count):
+        name_length = _SECTION_NAME.unpack_from(buffer, position)[0]
+        position += _SECTION_NAME.size
+        name = buffer[position:position + name_length].decode("utf-8")
+        position += name_length
+        kind, offset, length = _SECTION.unpack_from(buffer, position)
+        position += _SECTION.size
+        if kind == KIND_MAP:
+            sections[name] = MappedRecords(buffer, offset)
+        else:
+            sections[name] = (lambda start=offset, end=offset + length: pickle.loads(buffer[start:end]))
+    return sections
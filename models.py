@@ -2,10 +2,11 @@
 
 import json
 from dataclasses import dataclass, field, replace, asdict
-from typing import Optional, List, Dict, Any, TYPE_CHECKING
+from typing import Optional, List, Dict, Any, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .config_manager import ConfigManager
+    from .catalog import LootTable
 
 @dataclass
 class Item:
@@ -72,9 +73,7 @@ class Player:
     breakthrough_bonus: float = 0.0
 
     def get_level(self, config_manager: "ConfigManager") -> str:
-        if 0 <= self.level_index < len(config_manager.level_data):
-            return config_manager.level_data[self.level_index]["level_name"]
-        return "未知境界"
+        return config_manager.levels.name_of(self.level_index)
 
     def get_combat_stats(self, config_manager: "ConfigManager") -> Dict[str, Any]:
         """计算并返回玩家的最终战斗属性（基础属性+装备加成）"""
@@ -118,8 +117,10 @@ class Player:
     def clone(self) -> "Player":
         return replace(self)
 
-@dataclass
+@dataclass(frozen=True)
 class PlayerEffect:
+    """属性增量；编译后的物品效果共享同一个实例，因此不可变"""
+
     experience: int = 0
     gold: int = 0
     hp: int = 0
@@ -129,6 +130,95 @@ class PlayerEffect:
     attack: int = 0
     defense: int = 0
 
+    def scaled(self, factor: int) -> "PlayerEffect":
+        return PlayerEffect(**{k: v * factor for k, v in vars(self).items()})
+
+# 物品 effect 配置键 -> (PlayerEffect 字段, 提示名称)，顺序即提示中的展示顺序
+ITEM_EFFECT_FIELDS = {
+    "add_experience": ("experience", "修为"),
+    "add_gold": ("gold", "灵石"),
+    "add_hp": ("hp", "气血"),
+    "add_max_hp": ("max_hp", "气血上限"),
+    "add_spiritual_power": ("spiritual_power", "灵力"),
+    "add_mental_power": ("mental_power", "精神力"),
+    "add_attack": ("attack", "攻击"),
+    "add_defense": ("defense", "防御"),
+}
+BREAKTHROUGH_BONUS_KEY = "add_breakthrough_bonus"
+
+@dataclass(frozen=True)
+class EffectProgram:
+    """
+    物品效果的编译结果，配置加载时生成。
+    per_unit 为单个物品的属性增量，使用 N 个时只需整体乘以 N。
+    """
+
+    item_name: str
+    per_unit: PlayerEffect
+    # (提示名称, 单个数值)，按 ITEM_EFFECT_FIELDS 顺序
+    message_terms: Tuple[Tuple[str, Any], ...] = ()
+    breakthrough_bonus: Optional[float] = None
+    failure_message: Optional[str] = None
+
+    @classmethod
+    def compile(cls, item: Item) -> Tuple["EffectProgram", List[str]]:
+        """编译物品效果，返回 (程序, 无法识别的配置键)"""
+        effect_config = item.effect
+        if not effect_config:
+            return cls(item.name, PlayerEffect(), failure_message=f"【{item.name}】似乎只是凡物，无法使用。"), []
+
+        unknown = [key for key in effect_config if key not in ITEM_EFFECT_FIELDS and key != BREAKTHROUGH_BONUS_KEY]
+        values, terms = {}, []
+        for key, (field_name, label) in ITEM_EFFECT_FIELDS.items():
+            if key in effect_config:
+                values[field_name] = effect_config[key]
+                terms.append((label, effect_config[key]))
+        bonus = effect_config.get(BREAKTHROUGH_BONUS_KEY)
+        if not terms and bonus is None:
+            return cls(item.name, PlayerEffect(), failure_message=f"你研究了半天，也没能参透【{item.name}】的用法。"), unknown
+        return cls(item.name, PlayerEffect(**values), tuple(terms), bonus), unknown
+
+    def apply(self, quantity: int) -> Tuple[Optional[PlayerEffect], str, float]:
+        """返回 (属性增量, 提示消息, 突破加成)；物品无法使用时增量为 None"""
+        if self.failure_message:
+            return None, self.failure_message, 0.0
+
+        messages = [f"{label}+{value * quantity}" for label, value in self.message_terms]
+        # 突破成功率加成为buff效果，不随数量叠加
+        bonus = self.breakthrough_bonus or 0.0
+        if self.breakthrough_bonus is not None:
+            messages.append(f"💫突破成功率+{int(bonus * 100)}%")
+
+        full_message = f"✨ 你使用了 {quantity} 个【{self.item_name}】\n" + "、".join(messages) + "！"
+        if bonus > 0:
+            full_message += "\n💡 提示：突破加成buff已激活，下次突破时生效！"
+        return self.per_unit.scaled(quantity), full_message, bonus
+
+@dataclass
+class PlayerFilter:
+    """批量操作的玩家筛选条件，各条件之间为与关系，None 表示不限"""
+
+    min_level: Optional[int] = None
+    max_level: Optional[int] = None
+    sect_id: Optional[int] = None
+    active_since: Optional[float] = None  # 该时间戳之后签到过的玩家
+
+    def to_sql(self) -> Tuple[str, Dict[str, Any]]:
+        clauses, params = [], {}
+        if self.min_level is not None:
+            clauses.append("level_index >= :min_level")
+            params["min_level"] = self.min_level
+        if self.max_level is not None:
+            clauses.append("level_index <= :max_level")
+            params["max_level"] = self.max_level
+        if self.sect_id is not None:
+            clauses.append("sect_id = :sect_id")
+            params["sect_id"] = self.sect_id
+        if self.active_since is not None:
+            clauses.append("last_check_in >= :active_since")
+            params["active_since"] = self.active_since
+        return " AND ".join(clauses) or "1", params
+
 @dataclass
 class Boss:
     """世界Boss数据模型"""
@@ -141,6 +231,8 @@ class Boss:
     defense: int
     cooldown_minutes: int
     rewards: dict
+    # 合并标签后的掉落表，击杀结算时才掷骰
+    loot: Optional["LootTable"] = None
 
 @dataclass
 class ActiveWorldBoss:
@@ -154,9 +246,7 @@ class ActiveWorldBoss:
 
     def get_level_name(self, config_manager: "ConfigManager") -> str:
         """根据level_index获取Boss的境界名称"""
-        if 0 <= self.level_index < len(config_manager.level_data):
-            return config_manager.level_data[self.level_index]["level_name"]
-        return "未知境界"
+        return config_manager.levels.name_of(self.level_index)
 
 @dataclass
 class Monster:
@@ -169,6 +259,7 @@ class Monster:
     attack: int
     defense: int
     rewards: dict
+    loot: Optional["LootTable"] = None
 
 @dataclass
 class AttackResult:
@@ -0,0 +1,115 @@
+# name_index.py
+
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+SUGGESTION_LIMIT = 3
+# 只对二元组重合度最高的若干候选做精细打分，保证大目录下查询仍在亚毫秒级
+RERANK_POOL = 20
+MIN_SIMILARITY = 0.3
+
+def normalize_name(name: str) -> str:
+    """统一全角/半角、大小写并去掉空白，玩家输入与配置名称按同一规则比较"""
+    return "".join(unicodedata.normalize("NFKC", name).lower().split())
+
+def _grams(text: str) -> List[str]:
+    # 单字名称没有二元组，退化为单字
+    if len(text) < 2:
+        return [text] if text else []
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+class NameIndex:
+    """
+    名称索引：精确查找、前缀补全与二元组模糊匹配。
+    在配置加载时构建并随配置快照一起缓存。
+    前缀树以排序后的名称数组形式存放（同一前缀的名称在数组中连续），
+    查找复杂度与字典树相同，但可直接随快照序列化，载入时无需重建节点。
+    """
+
+    def __init__(self, names: Dict[str, str]):
+        # 规范化名称 -> (原始名称, ID)
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        self._grams: Dict[str, List[str]] = {}
+
+        for name, target_id in names.items():
+            key = normalize_name(name)
+            if not key or key in self._entries:
+                continue
+            self._entries[key] = (name, target_id)
+            for gram in set(_grams(key)):
+                self._grams.setdefault(gram, []).append(key)
+        self._sorted_keys: List[str] = sorted(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _with_prefix(self, prefix: str, limit: int) -> List[str]:
+        start = bisect_left(self._sorted_keys, prefix)
+        found = []
+        for key in islice(self._sorted_keys, start, start + limit):
+            if not key.startswith(prefix):
+                break
+            found.append(key)
+        return found
+
+    def _gram_counts(self, query: str) -> Counter:
+        counts = Counter()
+        for gram in set(_grams(query)):
+            counts.update(self._grams.get(gram, ()))
+        return counts
+
+    def _contained_in_one(self, query: str, counts: Counter) -> Optional[str]:
+        """查询词恰好是唯一一个名称的连续片段时返回该名称，如「筑基丹」对应「三品筑基丹」"""
+        needed = len(set(_grams(query)))
+        found = None
+        for key, count in counts.items():
+            if count == needed and query in key:
+                if found is not None:
+                    return None
+                found = key
+        return found
+
+    def _similar(self, query: str, counts: Counter, exclude: List[str], limit: int) -> List[str]:
+        counts = counts.copy()
+        for key in exclude:
+            counts.pop(key, None)
+        if not counts:
+            return []
+        scored = []
+        for key, _ in counts.most_common(RERANK_POOL):
+            score = SequenceMatcher(None, query, key).ratio()
+            if score >= MIN_SIMILARITY:
+                scored.append((score, -abs(len(key) - len(query)), key))
+        scored.sort(reverse=True)
+        return [key for _, _, key in scored[:limit]]
+
+    def lookup(self, name: str, limit: int = SUGGESTION_LIMIT) -> Tuple[Optional[str], List[str]]:
+        """
+        查找名称，返回 (ID, 建议名称列表)。
+        精确命中、前缀唯一或仅一个名称包含该词时返回 ID；否则返回最多 limit 个相近名称供玩家选择。
+        """
+        query = normalize_name(name)
+        if not query:
+            return None, []
+        entry = self._entries.get(query)
+        if entry:
+            return entry[1], []
+
+        prefixed = self._with_prefix(query, limit + 1)
+        if len(prefixed) == 1:
+            return self._entries[prefixed[0]][1], []
+        candidates = prefixed[:limit]
+        if not candidates:
+            counts = self._gram_counts(query)
+            contained = self._contained_in_one(query, counts)
+            if contained:
+                return self._entries[contained][1], []
+            candidates = self._similar(query, counts, [], limit)
+        elif len(candidates) < limit:
+            candidates += self._similar(query, self._gram_counts(query), candidates, limit - len(candidates))
+        return None, [self._entries[key][0] for key in candidates]
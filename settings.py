@@ -0,0 +1,187 @@
+# settings.py
+
+import json
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Mapping, Tuple, Type, TypeVar
+
+from astrbot.api import logger
+
+T = TypeVar("T")
+
+# 字段名即配置项键名的小写形式，默认值统一取自 _conf_schema.json
+
+@dataclass(frozen=True, slots=True)
+class AccessControlSettings:
+    whitelist_groups: Tuple[str, ...]
+
+@dataclass(frozen=True, slots=True)
+class ValuesSettings:
+    initial_gold: int
+    check_in_reward_min: int
+    check_in_reward_max: int
+    base_exp_per_minute: int
+    cultivation_hp_recovery_ratio: float
+    reroll_spirit_root_cost: int
+    breakthrough_fail_punishment_ratio: float
+    create_sect_cost: int
+    world_boss_top_players_avg: int
+    shop_daily_item_count: int
+    bank_fixed_min_hours: int
+    bank_fixed_rate_per_hour: float
+    bank_current_rate_per_hour: float
+    bank_current_min_hours: int
+
+@dataclass(frozen=True, slots=True)
+class RealmRulesSettings:
+    realm_base_floors: int
+    realm_floors_per_level_divisor: int
+    realm_monster_chance: float
+    realm_boss_scaling_factor: float
+
+@dataclass(frozen=True, slots=True)
+class SpiritRootSpeedSettings:
+    pseudo_root_speed: float
+    quad_root_speed: float
+    tri_root_speed: float
+    dual_root_speed: float
+    wuxing_root_speed: float
+    thunder_root_speed: float
+    ice_root_speed: float
+    wind_root_speed: float
+    dark_root_speed: float
+    light_root_speed: float
+    heavenly_root_speed: float
+    yin_yang_root_speed: float
+    fusion_root_speed: float
+    chaos_root_speed: float
+    innate_body_speed: float
+    divine_body_speed: float
+
+    def speed_for(self, config_key: str, default: float = 1.0) -> float:
+        """按配置项键名（如 QUAD_ROOT_SPEED）取修炼速度倍率"""
+        return getattr(self, config_key.lower(), default)
+
+@dataclass(frozen=True, slots=True)
+class SpiritRootWeightSettings:
+    pseudo_root_weight: int
+    quad_root_weight: int
+    tri_root_weight: int
+    dual_root_weight: int
+    wuxing_root_weight: int
+    variant_root_weight: int
+    heavenly_root_weight: int
+    legendary_root_weight: int
+    mythic_root_weight: int
+    divine_body_weight: int
+
+@dataclass(frozen=True, slots=True)
+class DiagnosticsSettings:
+    sql_profiler_enabled: bool
+    sql_repeat_threshold: int
+    slow_command_log_enabled: bool
+    slow_command_threshold_ms: int
+    slow_command_log_file: str
+
+@dataclass(frozen=True, slots=True)
+class StorageSettings:
+    in_memory_mode: bool
+    checkpoint_interval_seconds: int
+    boss_flush_interval_ms: int
+
+@dataclass(frozen=True, slots=True)
+class FilesSettings:
+    database_file: str
+    config_hot_reload: bool
+    config_poll_seconds: int
+    config_shared_catalog: bool
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """插件配置的只读快照，由配置项定义与当前 AstrBotConfig 一次性构建并校验"""
+
+    access_control: AccessControlSettings
+    values: ValuesSettings
+    realm_rules: RealmRulesSettings
+    spirit_root_speeds: SpiritRootSpeedSettings
+    spirit_root_weights: SpiritRootWeightSettings
+    diagnostics: DiagnosticsSettings
+    storage: StorageSettings
+    files: FilesSettings
+
+    @classmethod
+    def build(cls, schema_path: Path, config: Mapping[str, Any]) -> "Settings":
+        schema = load_schema(schema_path)
+        sections = {}
+        for f in fields(cls):
+            section = f.name.upper()
+            raw = config.get(section) if config else None
+            sections[f.name] = _build_section(
+                f.type, section, schema.get(section, {}).get("items", {}), raw if isinstance(raw, Mapping) else {}
+            )
+        return _validate(cls(**sections))
+
+
+def load_schema(schema_path: Path) -> Dict[str, Any]:
+    try:
+        with open(schema_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"读取配置项定义 {schema_path} 失败: {e}")
+        return {}
+
+_COERCE = {
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "string": str,
+}
+
+def _coerce(value: Any, value_type: str, default: Any, name: str) -> Any:
+    if value_type == "list":
+        if not isinstance(value, (list, tuple)):
+            logger.warning(f"配置项 {name} 应为列表，已使用默认值。")
+            value = default or []
+        return tuple(str(v) for v in value)
+
+    converter = _COERCE.get(value_type)
+    if converter is None:
+        return value
+    if value_type == "bool" and not isinstance(value, bool):
+        logger.warning(f"配置项 {name} 应为布尔值，已使用默认值 {default}。")
+        return default
+    try:
+        return converter(value)
+    except (TypeError, ValueError):
+        logger.warning(f"配置项 {name} 的值 {value!r} 无效，已使用默认值 {default}。")
+        return default
+
+def _build_section(section_cls: Type[T], section: str, schema_items: Dict[str, Any], raw: Mapping[str, Any]) -> T:
+    kwargs = {}
+    for f in fields(section_cls):
+        key = f.name.upper()
+        spec = schema_items.get(key)
+        if spec is None:
+            raise KeyError(f"配置项定义中缺少 {section}.{key}")
+        kwargs[f.name] = _coerce(raw.get(key, spec.get("default")), spec.get("type"), spec.get("default"), f"{section}.{key}")
+    return section_cls(**kwargs)
+
+def _validate(settings: Settings) -> Settings:
+    """修正相互矛盾或越界的配置，并给出提示"""
+    values = settings.values
+    if values.check_in_reward_min > values.check_in_reward_max:
+        logger.warning("签到奖励下限大于上限，已交换二者。")
+        values = replace(values, check_in_reward_min=values.check_in_reward_max,
+                         check_in_reward_max=values.check_in_reward_min)
+    if values.world_boss_top_players_avg < 1:
+        logger.warning("世界Boss等级参考人数必须大于0，已按1处理。")
+        values = replace(values, world_boss_top_players_avg=1)
+    realm_rules = settings.realm_rules
+    if realm_rules.realm_floors_per_level_divisor < 1:
+        logger.warning("秘境层数境界除数必须大于0，已按1处理。")
+        realm_rules = replace(realm_rules, realm_floors_per_level_divisor=1)
+    storage = settings.storage
+    if storage.boss_flush_interval_ms < 1:
+        logger.warning("世界Boss写库间隔必须大于0，已按默认300毫秒处理。")
+        storage = replace(storage, boss_flush_interval_ms=300)
+    return replace(settings, values=values, realm_rules=realm_rules, storage=storage)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+世界Boss执行者测试：攻击按到达顺序串行结算、击杀只发生一次、写库失败的数据会重试、
+关闭时处理完已排队的攻击；后台写库与指令事务共用写锁，互不干扰。
+"""
+
+import asyncio
+import time
+
+
+def _strike(damage):
+    def strike(boss_hp):
+        return damage, damage, boss_hp
+    return strike
+
+
+async def _spawn(plugin, db, boss_id="1", hp=100):
+    models = plugin("models")
+    boss = models.ActiveWorldBoss(boss_id=boss_id, current_hp=hp, max_hp=hp, spawned_at=time.time(), level_index=1)
+    await db.create_active_boss(boss)
+
+
+async def _participants(db, boss_id="1"):
+    return {p["user_id"]: p["total_damage"] for p in await db.get_boss_participants(boss_id)}
+
+
+def test_attacks_resolve_in_order_and_kill_exactly_once(plugin, new_db, add_players):
+    boss_actor = plugin("core.boss_actor")
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, [f"u{i:02d}" for i in range(40)])
+        await _spawn(plugin, db, hp=100)
+        arena = boss_actor.BossArena(db, lambda: 50, boss_actor.BossRevision())
+        actor = await arena.get("1")
+
+        hits = await asyncio.gather(*[actor.attack(f"u{i:02d}", f"n{i}", _strike(7)) for i in range(40)])
+        landed = [hit for hit in hits if hit is not None]
+        # 按提交顺序结算：每次攻击看到的气血恰好是上一次结算后的剩余
+        assert [hit.hp_before for hit in landed] == [100 - 7 * i for i in range(len(landed))]
+        assert sum(hit.killed for hit in landed) == 1
+        assert landed[-1].killed and landed[-1].hp_after == 0
+        assert sum(hit.hp_damage for hit in landed) == 100
+        assert all(hit is None for hit in hits[len(landed):])
+        assert await arena.get("1") is None
+
+        await arena.discard("1")
+        assert sum((await _participants(db)).values()) == sum(hit.credited_damage for hit in landed)
+        assert (await db.get_active_boss("1")).current_hp == 0
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_is_requeued(plugin, new_db, add_players):
+    boss_actor = plugin("core.boss_actor")
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a", "b"])
+        await _spawn(plugin, db, hp=1000)
+        save = db.save_boss_progress
+        failures = [RuntimeError("磁盘已满")]
+
+        async def flaky_save(*args):
+            if failures:
+                raise failures.pop()
+            await save(*args)
+        db.save_boss_progress = flaky_save
+
+        actor = boss_actor.BossActor(db, await db.get_active_boss("1"), lambda: 3600, boss_actor.BossRevision())
+        await actor.attack("a", "na", _strike(10))
+        try:
+            await actor.flush()
+        except RuntimeError:
+            pass
+        assert actor.dirty
+        await actor.attack("a", "na", _strike(5))
+        await actor.attack("b", "nb", _strike(1))
+        await actor.close()
+
+        assert await _participants(db) == {"a": 15, "b": 1}
+        assert (await db.get_active_boss("1")).current_hp == 984
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_close_drains_queued_attacks(plugin, new_db, add_players):
+    boss_actor = plugin("core.boss_actor")
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a"])
+        await _spawn(plugin, db, hp=1000)
+        actor = boss_actor.BossActor(db, await db.get_active_boss("1"), lambda: 3600, boss_actor.BossRevision())
+
+        pending = [asyncio.create_task(actor.attack("a", "na", _strike(3))) for _ in range(20)]
+        await asyncio.sleep(0)  # 让攻击全部入队
+        await actor.close()
+        hits = await asyncio.gather(*pending)
+
+        assert all(hit is not None for hit in hits)
+        assert await actor.attack("a", "na", _strike(3)) is None
+        assert await _participants(db) == {"a": 60}
+        assert (await db.get_active_boss("1")).current_hp == 940
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_background_flush_does_not_break_command_transactions(plugin, new_db, add_players):
+    """执行者频繁写库的同时，指令的显式事务既不报嵌套事务错误，也不会回滚掉执行者的写入"""
+    boss_actor = plugin("core.boss_actor")
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a"], gold=10_000)
+        await _spawn(plugin, db, hp=10_000)
+        actor = boss_actor.BossActor(db, await db.get_active_boss("1"), lambda: 0.001, boss_actor.BossRevision())
+
+        async def attacks():
+            for _ in range(100):
+                await actor.attack("a", "na", _strike(1))
+                await asyncio.sleep(0)
+
+        async def purchases():
+            results = []
+            for _ in range(100):
+                results.append(await db.transactional_buy_item("a", "1", 1, 10))
+                await asyncio.sleep(0)
+            return results
+
+        _, bought = await asyncio.gather(attacks(), purchases())
+        await actor.close()
+
+        assert all(ok for ok, _ in bought)
+        assert await _participants(db) == {"a": 100}
+        assert (await db.get_active_boss("1")).current_hp == 9_900
+        assert (await db.get_player_by_id("a")).gold == 9_000
+        assert (await db.get_item_from_inventory("a", "1"))["quantity"] == 100
+        await db.close()
+
+    asyncio.run(scenario())
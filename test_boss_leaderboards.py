@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+世界Boss伤害榜测试：一条窗口查询取出每个Boss的伤害前N名，伤害相同按 user_id 排序。
+"""
+
+import asyncio
+import time
+
+
+async def _add_damage(plugin, db, boss_id, damages):
+    models = plugin("models")
+    await db.create_active_boss(models.ActiveWorldBoss(
+        boss_id=boss_id, current_hp=1, max_hp=1, spawned_at=time.time(), level_index=0
+    ))
+    await db.save_boss_progress(boss_id, 1, [(user_id, f"n{user_id}", damage) for user_id, damage in damages.items()])
+
+
+def test_boss_leaderboards_top_n_per_boss(plugin, new_db, add_players):
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a", "b", "c", "d"])
+        await _add_damage(plugin, db, "1", {"a": 10, "b": 30, "c": 20, "d": 30})
+        await _add_damage(plugin, db, "2", {"c": 5})
+
+        boards = await db.get_boss_leaderboards(3)
+        # 伤害相同按 user_id 排序，每个Boss只取前3名
+        assert [(e["user_id"], e["total_damage"]) for e in boards["1"]] == [("b", 30), ("d", 30), ("c", 20)]
+        assert boards["2"] == [{"user_id": "c", "user_name": "nc", "total_damage": 5}]
+        assert "3" not in boards
+        assert await db.get_boss_leaderboards(1) == {
+            "1": [{"user_id": "b", "user_name": "nb", "total_damage": 30}],
+            "2": [{"user_id": "c", "user_name": "nc", "total_damage": 5}],
+        }
+        await db.close()
+
+    asyncio.run(scenario())
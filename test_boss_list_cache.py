@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+查看世界boss的渲染缓存测试：同时到达的请求只渲染一次；Boss状态版本变化后重新渲染；
+渲染任务不继承发起请求的指令上下文，单个请求被取消不影响其他请求。
+"""
+
+import asyncio
+
+
+def _handler(plugin, db, config_manager):
+    return plugin("handlers.combat_handler").CombatHandler(db, {}, config_manager)
+
+
+def _counting_render(handler, seen=None, current_unit_of_work=None):
+    """替换渲染函数：记录每次渲染时的Boss状态版本，以及渲染任务中看到的工作单元"""
+    calls = []
+
+    async def render():
+        calls.append(handler.battle_manager.revision.value)
+        if seen is not None:
+            seen.append(current_unit_of_work.get())
+        await asyncio.sleep(0.05)
+        return f"渲染#{len(calls)}"
+    handler._render_boss_list = render
+    return calls
+
+
+def test_concurrent_requests_share_one_render(plugin, new_db, config_manager):
+    async def scenario():
+        db = await new_db()
+        handler = _handler(plugin, db, config_manager)
+        calls = _counting_render(handler)
+
+        texts = await asyncio.gather(*[handler._boss_list_text() for _ in range(10)])
+        assert texts == ["渲染#1"] * 10
+        assert len(calls) == 1
+        assert await handler._boss_list_text() == "渲染#1"
+        assert len(calls) == 1
+        assert not handler._boss_list_pending
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_revision_bump_invalidates_cache(plugin, new_db, config_manager):
+    async def scenario():
+        db = await new_db()
+        handler = _handler(plugin, db, config_manager)
+        calls = _counting_render(handler)
+
+        assert await handler._boss_list_text() == "渲染#1"
+        handler.battle_manager.revision.bump()
+        assert await handler._boss_list_text() == "渲染#2"
+        assert calls == [0, 1]
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_render_runs_outside_command_context(plugin, new_db, config_manager):
+    async def scenario():
+        db = await new_db()
+        handler = _handler(plugin, db, config_manager)
+        seen = []
+        _counting_render(handler, seen, plugin("data.unit_of_work").current_unit_of_work)
+
+        async with db.unit_of_work() as uow:
+            assert uow is not None
+            first = asyncio.create_task(handler._boss_list_text())
+            second = asyncio.create_task(handler._boss_list_text())
+            await asyncio.sleep(0.01)
+            first.cancel()
+            assert await second == "渲染#1"
+        assert seen == [None]
+        assert first.cancelled()
+        await db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+世界Boss奖励结算测试：一条SQL发放的奖励与逐人计算 int(奖励 * 伤害 / 总伤害) 完全一致，
+且在事务中与其他写入串行。
+"""
+
+import asyncio
+import random
+import time
+
+
+async def _spawn_with_damage(plugin, db, boss_id, damages):
+    models = plugin("models")
+    await db.create_active_boss(models.ActiveWorldBoss(
+        boss_id=boss_id, current_hp=1, max_hp=1, spawned_at=time.time(), level_index=1
+    ))
+    await db.save_boss_progress(boss_id, 0, [(user_id, f"n{user_id}", damage) for user_id, damage in damages.items()])
+
+
+def _expected(reward, damages):
+    total = sum(damages.values())
+    return {user_id: int(reward * damage / total) for user_id, damage in damages.items()}
+
+
+def test_even_split_truncates_like_python(plugin, new_db, add_players):
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a", "b", "c"], gold=0, experience=0)
+        await _spawn_with_damage(plugin, db, "1", {"a": 5, "b": 5, "c": 5})
+
+        winners = await db.award_boss_rewards("1", 1000, 100)
+        assert [w["gold_reward"] for w in winners] == [333, 333, 333]
+        assert [w["exp_reward"] for w in winners] == [33, 33, 33]
+        for user_id in "abc":
+            player = await db.get_player_by_id(user_id)
+            assert (player.gold, player.experience) == (333, 33)
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_rewards_match_per_player_formula(plugin, new_db, add_players):
+    rng = random.Random(47)
+    cases = [
+        (100, {"a": 29, "b": 71}),  # 100 * (29 / 100) 先算占比会舍入成 28
+        (1000, {"a": 1, "b": 1, "c": 1}),
+        (12345, {f"u{i}": rng.randint(1, 10_000) for i in range(50)}),
+        (999_999, {f"u{i}": rng.randint(1, 10 ** 9) for i in range(50)}),
+    ]
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, [f"u{i}" for i in range(50)] + ["a", "b", "c"], gold=0, experience=0)
+        for n, (gold, damages) in enumerate(cases):
+            boss_id = f"b{n}"
+            before = {user_id: (await db.get_player_by_id(user_id)).gold for user_id in damages}
+            await _spawn_with_damage(plugin, db, boss_id, damages)
+
+            winners = await db.award_boss_rewards(boss_id, gold, gold // 3)
+            expected_gold, expected_exp = _expected(gold, damages), _expected(gold // 3, damages)
+            assert {w["user_id"]: w["gold_reward"] for w in winners} == expected_gold
+            assert {w["user_id"]: w["exp_reward"] for w in winners} == expected_exp
+            for user_id in damages:
+                assert (await db.get_player_by_id(user_id)).gold == before[user_id] + expected_gold[user_id]
+            await db.clear_boss_data(boss_id)
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_award_is_serialized_with_other_writes(plugin, new_db, add_players):
+    """发放期间写入的伤害不会混进本次统计，也不会被发放覆盖"""
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a", "b"], gold=0, experience=0)
+        await _spawn_with_damage(plugin, db, "1", {"a": 1, "b": 3})
+
+        winners, _ = await asyncio.gather(
+            db.award_boss_rewards("1", 400, 0),
+            db.save_boss_progress("1", 0, [("a", "na", 100)]),
+        )
+        assert {w["user_id"]: w["gold_reward"] for w in winners} == {"a": 100, "b": 300}
+        assert (await db.get_player_by_id("a")).gold == 100
+        assert (await db.get_player_by_id("b")).gold == 300
+        await db.close()
+
+    asyncio.run(scenario())
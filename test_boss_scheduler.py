@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+世界Boss重生调度测试：启动时补齐缺失的Boss；无人造成伤害的Boss同样进入冷却并按时重生；
+既不活跃也不在冷却中的Boss会在定期核对时补齐。
+"""
+
+import asyncio
+import dataclasses
+import time
+
+
+def _battle_manager(plugin, db, config_manager):
+    return plugin("core.combat_manager").BattleManager(db, {}, config_manager)
+
+
+async def _active_ids(db):
+    return {boss.boss_id for boss in await db.get_active_bosses()}
+
+
+def test_start_spawns_all_missing_bosses(plugin, new_db, config_manager):
+    async def scenario():
+        db = await new_db()
+        manager = _battle_manager(plugin, db, config_manager)
+        await manager.scheduler.start()
+        try:
+            assert await _active_ids(db) == set(config_manager.bosses)
+            assert manager.revision.value > 0
+        finally:
+            await manager.scheduler.stop()
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_boss_without_winners_still_cools_down_and_respawns(plugin, new_db, config_manager):
+    async def scenario():
+        db = await new_db()
+        manager = _battle_manager(plugin, db, config_manager)
+        await manager.scheduler.start()
+        try:
+            boss_id = next(iter(config_manager.bosses))
+            instance = await db.get_active_boss(boss_id)
+            template = plugin("core.combat_manager").MonsterGenerator.create_boss(
+                boss_id, instance.level_index, config_manager
+            )
+
+            # 冷却为0时调度器应立即把Boss重新生成出来
+            report = await manager._end_battle(dataclasses.replace(template, cooldown_minutes=0), instance)
+            assert "无人" in report and "重生" in report
+            for _ in range(100):
+                if boss_id in await _active_ids(db):
+                    break
+                await asyncio.sleep(0.01)
+            assert boss_id in await _active_ids(db)
+            assert boss_id not in await db.get_all_boss_cooldowns()
+
+            instance = await db.get_active_boss(boss_id)
+            await manager._end_battle(dataclasses.replace(template, cooldown_minutes=60), instance)
+            await asyncio.sleep(0.05)
+            assert boss_id not in await _active_ids(db)
+            assert (await db.get_all_boss_cooldowns())[boss_id]["respawn_at"] > time.time() + 3000
+        finally:
+            await manager.scheduler.stop()
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_periodic_resync_spawns_boss_without_cooldown(plugin, new_db, config_manager):
+    async def scenario():
+        db = await new_db()
+        manager = _battle_manager(plugin, db, config_manager)
+        manager.scheduler.RESYNC_SECONDS = 0.05
+        await manager.scheduler.start()
+        try:
+            boss_id = next(iter(config_manager.bosses))
+            # 绕过 _end_battle 直接删除：既不活跃也没有冷却记录
+            await db.clear_boss_data(boss_id)
+            assert boss_id not in await _active_ids(db)
+            for _ in range(100):
+                if boss_id in await _active_ids(db):
+                    break
+                await asyncio.sleep(0.01)
+            assert boss_id in await _active_ids(db)
+        finally:
+            await manager.scheduler.stop()
+            await db.close()
+
+    asyncio.run(scenario())
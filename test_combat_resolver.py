@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+战斗结算公式测试：闭式结算须与原逐回合循环逐项一致
+"""
+
+import importlib.util
+import os
+import random
+
+# combat_resolver 不依赖插件其他模块，直接按文件加载
+_spec = importlib.util.spec_from_file_location(
+    "combat_resolver",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "core", "combat_resolver.py"),
+)
+combat_resolver = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(combat_resolver)
+
+DuelRules = combat_resolver.DuelRules
+TurnEffect = combat_resolver.TurnEffect
+resolve_duel = combat_resolver.resolve_duel
+
+
+def reference_monster(p_hp, m_hp, p_dmg, m_dmg):
+    """原打怪循环"""
+    dealt = taken = turn = 0
+    while p_hp > 1 and m_hp > 0:
+        turn += 1
+        m_hp -= p_dmg
+        dealt += p_dmg
+        if m_hp <= 0:
+            break
+        p_hp -= m_dmg
+        taken += m_dmg
+    return turn, dealt, taken, p_hp, m_hp
+
+
+def reference_boss(p_hp, b_hp, p_dmg, b_dmg):
+    """原世界Boss循环"""
+    dealt = taken = turn = 0
+    while p_hp > 0 and b_hp > 0 and turn < 50:
+        turn += 1
+        damage = min(p_dmg, b_hp)
+        b_hp -= damage
+        dealt += damage
+        if b_hp <= 0:
+            break
+        p_hp -= b_dmg
+        taken += b_dmg
+    return turn, dealt, taken, p_hp, b_hp
+
+
+def reference_pvp(p1_hp, p2_hp, p1_dmg, p2_dmg):
+    """原切磋循环"""
+    p1_dealt = p2_dealt = turn = 0
+    while p1_hp > 1 and p2_hp > 1 and turn < 30:
+        turn += 1
+        p2_hp -= p1_dmg
+        p1_dealt += p1_dmg
+        if p2_hp <= 1:
+            p2_hp = 1
+            break
+        p1_hp -= p2_dmg
+        p2_dealt += p2_dmg
+        if p1_hp <= 1:
+            p1_hp = 1
+            break
+    return p1_dealt, p2_dealt, p1_hp, p2_hp
+
+
+def _cases(seed=20260418, count=3000):
+    rng = random.Random(seed)
+    edges = [(hp, other, a, b) for hp in (-3, 0, 1, 2, 3) for other in (-1, 0, 1, 2, 5)
+             for a in (1, 2, 7) for b in (1, 3)]
+    randoms = [
+        (rng.randint(-5, 5000), rng.randint(-5, 50000), rng.randint(1, 800), rng.randint(1, 800))
+        for _ in range(count)
+    ]
+    return edges + randoms
+
+
+def test_monster_matches_reference():
+    """打怪：回合数、伤害与剩余生命一致"""
+    rules = DuelRules(attacker_floor=1, defender_floor=0)
+    for p_hp, m_hp, p_dmg, m_dmg in _cases():
+        o = resolve_duel(p_hp, m_hp, p_dmg, m_dmg, rules)
+        assert (o.turns, o.damage_dealt, o.damage_taken, o.attacker_hp, o.defender_hp) == \
+            reference_monster(p_hp, m_hp, p_dmg, m_dmg)
+
+
+def test_boss_matches_reference():
+    """世界Boss：溢出伤害由调用方截去后与原循环一致"""
+    rules = DuelRules(attacker_floor=0, defender_floor=0, max_turns=50)
+    for p_hp, b_hp, p_dmg, b_dmg in _cases():
+        o = resolve_duel(p_hp, b_hp, p_dmg, b_dmg, rules)
+        dealt = min(o.damage_dealt, max(b_hp, 0))
+        result = (o.turns, dealt, o.damage_taken, o.attacker_hp, b_hp - dealt)
+        assert result == reference_boss(p_hp, b_hp, p_dmg, b_dmg)
+
+
+def test_pvp_matches_reference():
+    """切磋：倒下的一方气血保留为1"""
+    rules = DuelRules(attacker_floor=1, defender_floor=1, max_turns=30)
+    for p1_hp, p2_hp, p1_dmg, p2_dmg in _cases():
+        o = resolve_duel(p1_hp, p2_hp, p1_dmg, p2_dmg, rules)
+        p1_left, p2_left = p1_hp, p2_hp
+        if o.turns:
+            p1_left = 1 if o.attacker_down else o.attacker_hp
+            p2_left = 1 if o.defender_down else o.defender_hp
+        assert (o.damage_dealt, o.damage_taken, p1_left, p2_left) == \
+            reference_pvp(p1_hp, p2_hp, p1_dmg, p2_dmg)
+
+
+def test_turn_effects_fall_back_to_simulation():
+    """挂上不改变任何数值的效果时，逐回合推演与闭式结果完全相同"""
+    effects = [TurnEffect()]
+    for rules in (DuelRules(1, 0), DuelRules(0, 0, 50), DuelRules(1, 1, 30)):
+        for case in _cases(count=500):
+            assert resolve_duel(*case, rules, effects) == resolve_duel(*case, rules)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+配置热重载测试：重载失败时继续使用旧配置且不记下本次修改，之后修复文件或故障消除都会被重新换入。
+未开启热重载时，配置面板中的插件配置修改在下一条指令固定快照时生效，并通知构造时复制了配置值的组件。
+配置文件复制到临时目录后再修改，不影响插件自带的配置。
+"""
+
+import asyncio
+import json
+import shutil
+
+import pytest
+
+from conftest import PLUGIN_DIR
+
+
+@pytest.fixture
+def plugin_copy(tmp_path):
+    base = tmp_path / "plugin"
+    shutil.copytree(PLUGIN_DIR / "config", base / "config")
+    shutil.copy(PLUGIN_DIR / "_conf_schema.json", base / "_conf_schema.json")
+    return base
+
+
+def _edit_items(base, edit):
+    path = base / "config" / "items.json"
+    items = json.loads(path.read_text(encoding="utf-8"))
+    edit(items)
+    path.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+
+
+def test_bad_edit_then_good_edit_is_picked_up(plugin, plugin_copy, tmp_path):
+    manager = plugin("config_manager").ConfigManager(plugin_copy, cache_dir=tmp_path / "cache")
+    item_id = next(iter(manager.item_data))
+    version = manager.version
+
+    async def scenario():
+        # 价格写成字符串，严格校验失败
+        _edit_items(plugin_copy, lambda items: items[item_id].update(price="很贵"))
+        await manager._check_for_changes()
+        assert manager.version == version
+        await manager._check_for_changes()
+        assert manager.version == version
+
+        _edit_items(plugin_copy, lambda items: items[item_id].update(price=12345))
+        await manager._check_for_changes()
+        assert manager.version == version + 1
+        assert manager.item_data[item_id].price == 12345
+
+    asyncio.run(scenario())
+
+
+def test_transient_failure_is_retried_without_touching_files(plugin, plugin_copy, tmp_path):
+    manager = plugin("config_manager").ConfigManager(plugin_copy, cache_dir=tmp_path / "cache")
+    item_id = next(iter(manager.item_data))
+    version = manager.version
+    rebuild = manager._rebuild
+    failures = [OSError("磁盘暂时不可用")]
+
+    def flaky_rebuild():
+        if failures:
+            raise failures.pop()
+        return rebuild()
+    manager._rebuild = flaky_rebuild
+
+    async def scenario():
+        _edit_items(plugin_copy, lambda items: items[item_id].update(price=777))
+        await manager._check_for_changes()
+        assert manager.version == version
+        await manager._check_for_changes()
+        assert manager.version == version + 1
+        assert manager.item_data[item_id].price == 777
+
+    asyncio.run(scenario())
+
+
+def test_plugin_config_change_applies_on_next_command_without_watcher(plugin, plugin_copy, tmp_path):
+    config = {"STORAGE": {"BOSS_FLUSH_INTERVAL_MS": 300}}
+    manager = plugin("config_manager").ConfigManager(plugin_copy, cache_dir=tmp_path / "cache", config=config)
+    seen = []
+    manager.on_settings_changed(seen.append)
+    assert manager.settings.storage.boss_flush_interval_ms == 300
+
+    config["STORAGE"]["BOSS_FLUSH_INTERVAL_MS"] = 50
+    config["DIAGNOSTICS"] = {"SQL_REPEAT_THRESHOLD": 9}
+    with manager.pin():
+        assert manager.settings.storage.boss_flush_interval_ms == 50
+        assert manager.settings.diagnostics.sql_repeat_threshold == 9
+    assert len(seen) == 1 and seen[0] is manager.settings
+
+    # 配置未变时不重建，也不重复通知
+    with manager.pin():
+        pass
+    assert len(seen) == 1
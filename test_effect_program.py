@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+物品效果程序测试：使用 N 个物品的增量为单个增量的 N 倍，且不会改动配置快照中共享的单个增量；
+使用物品时只取加载配置时编译好的程序，取不到时报配置错误而不临时编译。
+"""
+
+import asyncio
+import dataclasses
+
+import pytest
+
+from conftest import MessageEvent
+
+
+def test_apply_scales_without_touching_shared_per_unit(plugin):
+    models = plugin("models")
+    item = models.Item(id="1", name="聚灵丹", type="丹药", rank="一品", description="", price=10,
+                       effect={"add_experience": 100, "add_hp": 5, "add_breakthrough_bonus": 0.1})
+    program, unknown = models.EffectProgram.compile(item)
+    assert unknown == []
+
+    effect, message, bonus = program.apply(3)
+    assert (effect.experience, effect.hp, bonus) == (300, 15, 0.1)
+    assert "修为+300" in message and "突破成功率+10%" in message
+    assert effect is not program.per_unit
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        program.per_unit.experience = 0
+    assert program.apply(1)[0].experience == 100
+
+
+def test_use_takes_cached_program_and_never_recompiles(plugin, new_db, config_manager, add_players, monkeypatch):
+    shop_handler = plugin("handlers.shop_handler")
+    models = plugin("models")
+
+    def no_compile(item):
+        raise AssertionError("使用物品时不应重新编译效果程序")
+    monkeypatch.setattr(models.EffectProgram, "compile", staticmethod(no_compile))
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a"])
+        item_id, _ = config_manager.get_item_by_name("三品筑基丹")
+        await db.add_items_to_inventory_in_transaction("a", {item_id: 2})
+        handler = shop_handler.ShopHandler(db, config_manager, {})
+
+        replies = [r async for r in handler.handle_use(MessageEvent("a"), "三品筑基丹", 1)]
+        assert "使用了 1 个【三品筑基丹】" in replies[0]
+
+        # 快照中缺少程序时按配置错误处理，不消耗物品
+        monkeypatch.setattr(config_manager, "get_effect_program", lambda item_id: None)
+        replies = [r async for r in handler.handle_use(MessageEvent("a"), "三品筑基丹", 1)]
+        assert replies == ["「三品筑基丹」的配置有误，暂时无法使用。"]
+        assert (await db.get_item_from_inventory("a", item_id))["quantity"] == 1
+        await db.close()
+
+    asyncio.run(scenario())
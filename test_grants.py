@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+全服补偿测试：按筛选条件分块发放灵石与物品，跨多个分块时人数与数量都准确。
+"""
+
+import asyncio
+
+
+def test_grants_respect_filter_across_chunks(plugin, new_db, add_players):
+    PlayerFilter = plugin("models").PlayerFilter
+
+    async def scenario():
+        db = await new_db()
+        low = await add_players(db, [f"l{i:02d}" for i in range(7)], level_index=1, gold=0)
+        high = await add_players(db, [f"h{i:02d}" for i in range(5)], level_index=5, gold=0)
+
+        assert await db.grant_gold(100, PlayerFilter(min_level=3), chunk_size=2) == len(high)
+        assert await db.grant_gold(7, PlayerFilter(), chunk_size=5) == len(low) + len(high)
+        golds = {p.user_id: p.gold for p in (await db.get_players_by_ids([p.user_id for p in low + high])).values()}
+        assert all(golds[p.user_id] == 107 for p in high)
+        assert all(golds[p.user_id] == 7 for p in low)
+
+        items = {"1": 2, "2": 1}
+        assert await db.grant_items(items, PlayerFilter(max_level=1), chunk_size=3) == len(low)
+        assert await db.grant_items({"1": 3}, PlayerFilter(max_level=1), chunk_size=3) == len(low)
+        for player in low:
+            assert (await db.get_item_from_inventory(player.user_id, "1"))["quantity"] == 5
+            assert (await db.get_item_from_inventory(player.user_id, "2"))["quantity"] == 1
+        for player in high:
+            assert await db.get_item_from_inventory(player.user_id, "1") is None
+        await db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内存模式写回测试：写回与事务互斥，既不会把未提交的数据落盘，也不会在卸载时因事务未结束而丢数据。
+"""
+
+import asyncio
+import sqlite3
+
+
+def _disk_players(db):
+    with sqlite3.connect(db.db_path) as conn:
+        return {row[0]: row[1] for row in conn.execute("SELECT user_id, gold FROM players")}
+
+
+def test_checkpoint_waits_for_open_transaction(new_db, add_players):
+    async def scenario():
+        db = await new_db(in_memory=True, checkpoint_interval=3600)
+        await add_players(db, ["a"], gold=1)
+        assert await db.checkpoint()
+
+        in_transaction, release = asyncio.Event(), asyncio.Event()
+
+        async def command():
+            async with db.transaction():
+                await db.conn.execute("UPDATE players SET gold = 2 WHERE user_id = 'a'")
+                in_transaction.set()
+                await release.wait()
+                await db.conn.execute("UPDATE players SET gold = 3 WHERE user_id = 'a'")
+
+        task = asyncio.create_task(command())
+        await in_transaction.wait()
+        checkpoint = asyncio.create_task(db.checkpoint())
+        await asyncio.sleep(0.05)
+        assert not checkpoint.done()  # 事务未提交，写回须等待
+        release.set()
+        await task
+        assert await checkpoint
+        assert _disk_players(db) == {"a": 3}
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_close_writes_back_after_transaction_finishes(new_db, add_players):
+    async def scenario():
+        db = await new_db(in_memory=True, checkpoint_interval=3600)
+        await add_players(db, ["a"], gold=1)
+        started = asyncio.Event()
+
+        async def command():
+            async with db.transaction():
+                await db.conn.execute("UPDATE players SET gold = 5 WHERE user_id = 'a'")
+                started.set()
+                await asyncio.sleep(0.05)
+
+        task = asyncio.create_task(command())
+        await started.wait()
+        await db.close()
+        await task
+        assert _disk_players(db) == {"a": 5}
+
+    asyncio.run(scenario())
+
+
+def test_checkpoint_loop_survives_errors(new_db, add_players):
+    async def scenario():
+        db = await new_db(in_memory=True, checkpoint_interval=1)
+        db.checkpoint_interval = 0.01
+        calls = []
+        checkpoint = db.checkpoint
+
+        async def flaky_checkpoint():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("意外错误")
+            return await checkpoint()
+        db.checkpoint = flaky_checkpoint
+
+        db._checkpoint_task.cancel()
+        db._checkpoint_task = asyncio.create_task(db._checkpoint_loop())
+        await asyncio.sleep(0.1)
+        assert len(calls) > 1 and not db._checkpoint_task.done()
+        db.checkpoint = checkpoint
+        await db.close()
+
+    asyncio.run(scenario())
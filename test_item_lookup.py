@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+物品名称查找测试：购买、使用等扣费或消耗类指令只认完整名称，名称不符时只给出候选而不执行。
+"""
+
+import asyncio
+
+from conftest import MessageEvent
+
+
+def test_exact_lookup_does_not_resolve_fragments(config_manager):
+    assert config_manager.get_item_by_name("三品筑基丹") is not None
+    assert config_manager.get_item_by_name("筑基丹") is None
+
+
+def test_suggestions_for_fragment_and_typo(config_manager):
+    assert config_manager.suggest_items("筑基丹") == ["三品筑基丹"]
+    assert "三品筑基丹" in config_manager.suggest_items("三品筑基单")
+    assert config_manager.suggest_items("") == []
+
+
+def test_use_with_partial_name_does_not_consume(plugin, new_db, config_manager, add_players):
+    shop_handler = plugin("handlers.shop_handler")
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a"])
+        item_id, _ = config_manager.get_item_by_name("三品筑基丹")
+        await db.add_items_to_inventory_in_transaction("a", {item_id: 2})
+        handler = shop_handler.ShopHandler(db, config_manager, {})
+
+        replies = [r async for r in handler.handle_use(MessageEvent("a"), "筑基丹", 1)]
+        assert len(replies) == 1 and "「三品筑基丹」" in replies[0]
+        assert (await db.get_item_from_inventory("a", item_id))["quantity"] == 2
+
+        replies = [r async for r in handler.handle_use(MessageEvent("a"), "三品筑基丹", 1)]
+        assert "使用了 1 个【三品筑基丹】" in replies[0]
+        assert (await db.get_item_from_inventory("a", item_id))["quantity"] == 1
+        await db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+掉落表测试：LootTable.roll_many 一次掷出的汇总分布与逐次调用 roll() 一致，
+NumPy 路径与纯 Python 回退路径都要覆盖；相同种子的结果可复现；数量下限大于上限的掉落配置在加载时报错。
+"""
+
+import math
+import random
+
+import pytest
+
+N = 20_000
+ENTRIES = (("a", 0.3, 1, 3), ("b", 0.8, 2, 2), ("c", 0.05, 5, 10), ("d", 1.0, 0, 4))
+
+
+@pytest.fixture(params=["numpy", "fallback"])
+def loot_table(request, plugin, monkeypatch):
+    catalog = plugin("catalog")
+    if request.param == "numpy":
+        if catalog.np is None:
+            pytest.skip("未安装 NumPy")
+    else:
+        monkeypatch.setattr(catalog, "np", None)
+    return catalog.LootTable.compile(catalog.LootEntry(*entry) for entry in ENTRIES)
+
+
+def _rolled_one_by_one(table, n, seed):
+    random.seed(seed)
+    totals = {}
+    for _ in range(n):
+        for item_id, qty in table.roll().items():
+            totals[item_id] = totals.get(item_id, 0) + qty
+    return totals
+
+
+def test_roll_many_matches_roll_distribution(loot_table):
+    many = loot_table.roll_many(N, seed=43)
+    single = _rolled_one_by_one(loot_table, N, seed=43)
+    for item_id, chance, low, high in ENTRIES:
+        # 单次击杀掉落数量的期望与方差
+        mean = (low + high) / 2
+        qty_var = ((high - low + 1) ** 2 - 1) / 12
+        expected = chance * mean
+        std = math.sqrt(chance * (qty_var + mean ** 2) - expected ** 2)
+        tolerance = 5 * std / math.sqrt(N) * N
+        assert abs(many.get(item_id, 0) - expected * N) <= tolerance, item_id
+        assert abs(single.get(item_id, 0) - expected * N) <= tolerance, item_id
+
+
+def test_roll_many_is_reproducible(loot_table):
+    assert loot_table.roll_many(1000, seed=7) == loot_table.roll_many(1000, seed=7)
+    assert loot_table.roll_many(0, seed=7) == {}
+
+
+def test_loot_quantity_low_above_high_is_rejected(plugin):
+    catalog = plugin("catalog")
+    raw = {"火": {"add_to_loot": [{"item_id": "1", "chance": 0.5, "quantity": [3, 1]},
+                                   {"item_id": "2", "chance": 0.5, "quantity": [1, 3]}]}}
+    with pytest.raises(catalog.CatalogError, match="下限不应大于上限"):
+        catalog.compile_tags(raw, strict=True)
+
+    # 非严格模式下跳过该条目，其余掉落照常加载
+    loot = catalog.compile_tags(raw)["火"].add_to_loot
+    assert [(e.item_id, e.min_qty, e.max_qty) for e in loot] == [("2", 1, 3)]
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+配置目录文件写入测试：多个写入方同时替换同一文件时，各自使用独立的临时文件，结果总是完整的。
+"""
+
+import threading
+
+
+def test_concurrent_atomic_writes_never_interleave(plugin, tmp_path):
+    write_atomic = plugin("mapped_catalog").write_atomic
+    target = tmp_path / "catalog.bin"
+    payloads = [bytes([i]) * 200_000 for i in range(8)]
+    errors = []
+
+    def writer(payload):
+        try:
+            for _ in range(20):
+                write_atomic(target, payload)
+        except Exception as e:
+            # 子线程中的异常在主线程统一断言
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(payload,)) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert target.read_bytes() in payloads
+    assert [p.name for p in tmp_path.iterdir()] == ["catalog.bin"]
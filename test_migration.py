@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+数据库迁移测试：v15 数据库经 v16~v18 迁移后的表结构与全新安装一致，数据完整搬迁；
+早期遗留的、引用了不存在玩家的孤儿行在重建时被丢弃，不会阻塞启动。
+"""
+
+import asyncio
+
+import aiosqlite
+
+
+async def _schema(conn):
+    async with conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name"
+    ) as cursor:
+        return {(row["type"], row["name"]): " ".join(row["sql"].split()) for row in await cursor.fetchall()}
+
+
+def test_migrations_v16_to_v18_match_fresh_install(plugin, config_manager, tmp_path):
+    migration = plugin("data.migration")
+
+    async def open_db(name):
+        conn = await aiosqlite.connect(tmp_path / name)
+        conn.row_factory = aiosqlite.Row
+        return conn
+
+    async def scenario():
+        # 迁移失败时也要关闭连接，否则 aiosqlite 的工作线程会让测试挂起而不是报错
+        old, fresh = await open_db("v15.db"), await open_db("fresh.db")
+        try:
+            await old.execute("BEGIN")
+            await migration._create_all_tables_v15(old)
+            await old.execute("INSERT INTO db_info (version) VALUES (15)")
+            await old.execute("""
+                INSERT INTO players (user_id, level_index, spiritual_root, experience, gold, last_check_in, state,
+                                     state_start_time, hp, max_hp, attack, defense)
+                VALUES ('a', 3, '金', 40, 100, 0, '空闲', 0, 100, 100, 10, 5)
+            """)
+            await old.execute("INSERT INTO inventory (user_id, item_id, quantity) VALUES ('a', '1', 4)")
+            await old.execute("INSERT INTO world_boss_participants VALUES ('1', 'a', 'na', 77)")
+            # 早期版本未开启外键约束时遗留的孤儿行：玩家已删除，背包与伤害记录仍在
+            await old.execute("INSERT INTO inventory (user_id, item_id, quantity) VALUES ('gone', '1', 2)")
+            await old.execute("INSERT INTO world_boss_participants VALUES ('1', 'gone', 'ngone', 5)")
+            await old.execute("INSERT INTO shop_inventory VALUES ('20260101', '1', 9)")
+            await old.commit()
+
+            await migration.MigrationManager(old, config_manager).migrate()
+            async with old.execute("SELECT version FROM db_info") as cursor:
+                assert (await cursor.fetchone())[0] == migration.LATEST_DB_VERSION == 18
+
+            await migration.MigrationManager(fresh, config_manager).migrate()
+            upgraded, installed = await _schema(old), await _schema(fresh)
+            assert set(upgraded) == set(installed)
+            for table in ("inventory", "world_boss_participants", "shop_inventory"):
+                assert "WITHOUT ROWID" in upgraded[("table", table)]
+            assert ("index", "idx_players_rank") in upgraded
+            assert ("table", "season_archive") in upgraded and ("table", "season_resets") in upgraded
+
+            async with old.execute("SELECT user_id, item_id, quantity FROM inventory") as cursor:
+                assert [tuple(row) for row in await cursor.fetchall()] == [("a", "1", 4)]
+            async with old.execute("SELECT * FROM world_boss_participants") as cursor:
+                assert [tuple(row) for row in await cursor.fetchall()] == [("1", "a", "na", 77)]
+            async with old.execute("PRAGMA foreign_key_check") as cursor:
+                assert await cursor.fetchall() == []
+            async with old.execute("SELECT * FROM shop_inventory") as cursor:
+                assert [tuple(row) for row in await cursor.fetchall()] == [("20260101", "1", 9)]
+            async with old.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM players ORDER BY level_index DESC, experience DESC LIMIT 5"
+            ) as cursor:
+                assert any("idx_players_rank" in row["detail"] for row in await cursor.fetchall())
+
+            # 已是最新版本时再次迁移不做任何改动
+            await migration.MigrationManager(old, config_manager).migrate()
+            assert await _schema(old) == upgraded
+        finally:
+            await old.close()
+            await fresh.close()
+
+    asyncio.run(scenario())
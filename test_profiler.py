@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SQL分析器测试：指令耗时不包含生成器停在 yield 处、等待框架发送回复的时间。
+"""
+
+import asyncio
+import time
+
+
+def test_command_duration_excludes_time_suspended_at_yield(plugin):
+    profiler_module = plugin("data.profiler")
+    profiler = profiler_module.SqlProfiler(enabled=True)
+    traces = []
+
+    async def handler():
+        with profiler.command("handle_test") as trace:
+            traces.append(trace)
+            for i in range(3):
+                await asyncio.sleep(0.01)
+                profiler.record("SELECT 1", time.perf_counter())
+                with profiler.suspend():
+                    yield i
+
+    async def scenario():
+        async for _ in handler():
+            # 模拟框架发送回复耗时
+            await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    trace = traces[0]
+    assert trace.suspended >= 0.4
+    assert 0.03 <= trace.duration < 0.2
+    assert all(statement.offset < 0.2 for statement in trace.statements)
+    assert profiler.summaries()["handle_test"].total_time == trace.duration
+
+
+def test_suspend_without_active_command_is_noop(plugin):
+    profiler = plugin("data.profiler").SqlProfiler(enabled=False)
+    with profiler.command("handle_test") as trace, profiler.suspend():
+        assert trace is None
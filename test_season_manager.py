@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+赛季重置流水线测试：并发发起的两次重置只有一次生效；被取消的重置停在已提交的分块，之后可从断点继续；
+分块重置按 user_id 键集推进，进度与重置在同一事务中提交。
+"""
+
+import asyncio
+import time
+
+
+def _season_manager(plugin, db, config_manager):
+    return plugin("core.season_manager").SeasonManager(db, {}, config_manager)
+
+
+def test_concurrent_new_season_runs_once(plugin, new_db, config_manager, add_players):
+    async def scenario():
+        db = await new_db()
+        await add_players(db, [f"u{i:03d}" for i in range(20)], gold=999)
+        manager = _season_manager(plugin, db, config_manager)
+
+        results = await asyncio.gather(manager.start_new_season(), manager.start_new_season())
+        assert sorted(ok for ok, _ in results) == [False, True]
+        assert "进行中" in next(msg for ok, msg in results if not ok)
+        assert not manager.running
+        assert await db.get_latest_season_id() == 1
+        assert len(await db.get_season_archive(1, 100)) == 20
+        assert await db.get_pending_season_reset() is None
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_reset_resumes_from_last_chunk(plugin, new_db, config_manager, add_players, monkeypatch):
+    season_module = plugin("core.season_manager")
+    monkeypatch.setattr(season_module, "RESET_CHUNK_SIZE", 3)
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, [f"u{i:03d}" for i in range(10)], gold=999)
+        manager = _season_manager(plugin, db, config_manager)
+        initial_gold = config_manager.settings.values.initial_gold
+
+        reset_chunk = db.reset_season_chunk
+        chunks = []
+
+        async def counting_chunk(*args):
+            result = await reset_chunk(*args)
+            chunks.append(result)
+            if len(chunks) == 2:
+                await asyncio.Event().wait()  # 停在第二块提交之后，等待被取消
+            return result
+        db.reset_season_chunk = counting_chunk
+
+        task = asyncio.create_task(manager.start_new_season())
+        while len(chunks) < 2:
+            await asyncio.sleep(0.01)
+        assert manager.running
+        assert await manager.resume_pending() is None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert not manager.running
+
+        pending = await db.get_pending_season_reset()
+        assert (pending["processed"], pending["cursor"]) == (6, "u005")
+        db.reset_season_chunk = reset_chunk
+        assert await manager.resume_pending() == 10
+        assert await db.get_pending_season_reset() is None
+        for player in (await db.get_players_by_ids([f"u{i:03d}" for i in range(10)])).values():
+            assert player.gold == initial_gold
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_reset_season_chunk_walks_keyset_and_records_progress(plugin, new_db, add_players):
+    async def scenario():
+        db = await new_db()
+        user_ids = [f"u{i:02d}" for i in range(7)]
+        await add_players(db, user_ids, level_index=9, experience=500, gold=999, equipped_weapon="1")
+        for user_id in user_ids:
+            await db.add_items_to_inventory_in_transaction(user_id, {"1": 3})
+        await db.archive_season(1, time.time())
+        reset_values = {"gold": 50, "hp": 100, "max_hp": 100, "attack": 10, "defense": 5,
+                        "spiritual_power": 50, "mental_power": 50}
+
+        cursor, chunks = "", []
+        while True:
+            count, cursor = await db.reset_season_chunk(1, cursor, 3, reset_values)
+            chunks.append((count, cursor))
+            if count == 0:
+                break
+            progress = await db.get_pending_season_reset()
+            assert (progress["cursor"], progress["processed"]) == (cursor, sum(c for c, _ in chunks))
+        assert chunks == [(3, "u02"), (3, "u05"), (1, "u06"), (0, "u06")]
+        assert await db.get_pending_season_reset() is None
+
+        for player in (await db.get_players_by_ids(user_ids)).values():
+            assert (player.level_index, player.experience, player.gold, player.equipped_weapon) == (0, 0, 50, None)
+            assert await db.get_item_from_inventory(player.user_id, "1") is None
+        archive = await db.get_season_archive(1, 10)
+        assert [row["gold"] for row in archive] == [999] * 7
+        await db.close()
+
+    asyncio.run(scenario())
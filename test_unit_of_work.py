@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+工作单元测试：同一指令内同一玩家只有一个对象；延迟落库只写改动过的字段，
+灵石、修为写为增量，不会覆盖同时进行的其他指令以SQL直接做出的修改。
+"""
+
+import asyncio
+
+
+def test_identity_map_returns_same_object(new_db, add_players):
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a", "b"])
+        async with db.unit_of_work() as uow:
+            player = await db.get_player_by_id("a")
+            assert await db.get_player_by_id("a") is player
+            assert (await db.get_players_by_ids(["a", "b"]))["a"] is player
+            assert uow.get("b") is not None
+        async with db.unit_of_work():
+            assert await db.get_player_by_id("a") is not player
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_pending_updates_are_flushed_before_set_based_writes(plugin, new_db, add_players):
+    """award_boss_rewards 之前先落库本指令的改动，发放之后读到的是合并后的结果"""
+    models = plugin("models")
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a"], gold=100)
+        await db.create_active_boss(models.ActiveWorldBoss(boss_id="1", current_hp=0, max_hp=1, spawned_at=0, level_index=0))
+        await db.save_boss_progress("1", 0, [("a", "na", 1)])
+        async with db.unit_of_work():
+            player = await db.get_player_by_id("a")
+            player.gold += 50
+            player.hp = 42
+            await db.update_player(player)
+            await db.award_boss_rewards("1", 1000, 0)
+            fresh = await db.get_player_by_id("a")
+            assert fresh is not player
+            assert (fresh.gold, fresh.hp) == (1150, 42)
+        assert (await db.get_player_by_id("a")).gold == 1150
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_stale_command_does_not_overwrite_concurrent_changes(plugin, new_db, add_players):
+    """指令A读取玩家后，指令B以SQL发放灵石、修改宗门；A之后落库只写自己改动的字段与增量"""
+    models = plugin("models")
+
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a"], gold=100, experience=10)
+        await db.create_active_boss(models.ActiveWorldBoss(boss_id="1", current_hp=0, max_hp=1, spawned_at=0, level_index=0))
+        await db.save_boss_progress("1", 0, [("a", "na", 1)])
+        sect_id = await db.create_sect("青云门", "a")
+        loaded, awarded = asyncio.Event(), asyncio.Event()
+
+        async def command_a():
+            async with db.unit_of_work():
+                player = await db.get_player_by_id("a")
+                loaded.set()
+                await awarded.wait()
+                player.gold -= 30
+                player.experience += 5
+                player.hp = 7
+                await db.update_player(player)
+
+        async def command_b():
+            await loaded.wait()
+            async with db.unit_of_work():
+                await db.award_boss_rewards("1", 1000, 200)
+                await db.update_player_sect("a", sect_id, "青云门")
+            awarded.set()
+
+        await asyncio.gather(command_a(), command_b())
+        player = await db.get_player_by_id("a")
+        assert (player.gold, player.experience, player.hp) == (1070, 215, 7)
+        assert (player.sect_id, player.sect_name) == (sect_id, "青云门")
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_repeated_flush_writes_each_change_once(new_db, add_players):
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a"], gold=100)
+        async with db.unit_of_work():
+            player = await db.get_player_by_id("a")
+            player.gold += 10
+            await db.update_player(player)
+            await db.flush()
+            player.gold += 5
+            await db.update_player(player)
+            await db.flush()
+            await db.update_player(player)
+        assert (await db.get_player_by_id("a")).gold == 115
+        await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_buy_does_not_mutate_cached_player(new_db, add_players):
+    async def scenario():
+        db = await new_db()
+        await add_players(db, ["a"], gold=100)
+        async with db.unit_of_work():
+            player = await db.get_player_by_id("a")
+            player.hp = 50
+            await db.update_player(player)
+            ok, _ = await db.transactional_buy_item("a", "1", 1, 30)
+            assert ok
+            assert player.gold == 100
+            updated = await db.get_player_by_id("a")
+            assert (updated.gold, updated.hp) == (70, 50)
+            # 仍持有旧对象的调用方再次登记写入，不会把扣掉的灵石写回去
+            await db.update_player(player)
+        player = await db.get_player_by_id("a")
+        assert (player.gold, player.hp) == (70, 50)
+        await db.close()
+
+    asyncio.run(scenario())